@@ -0,0 +1,272 @@
+"""
+Benchmark the pipeline end to end without GitHub: harvest, clone and filter.
+
+Starts mock_api in a separate process and harvests it with extract_and_save,
+then turns the first --clone-repos results into synthetic bare git repos
+(source files of --lang mixed with docs, binaries, oversized files and
+shebang scripts) served over file:// URLs. The stages timed are:
+
+- harvest: extract_and_save against the mock search API
+- clone_script: create_clone_script for the cloned repos
+- clone: running the clone commands of that script
+- filter: filter_dataset, the pass the script ends with
+- clone_run: clone_all, cloning and filtering in-process (clone_repos --run)
+
+Everything is seeded, so two runs with the same arguments do the same work.
+Timings, counts, the METRICS snapshot and the environment are written to
+--output as JSON so that results can be compared between commits.
+
+python -m github_dataset_maker.benchmark --work-dir /tmp/benchmark --output benchmark.json
+"""
+from __future__ import annotations
+
+import datetime
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Tuple
+
+import requests
+from tap import Tap as TypedArgumentParser
+
+from . import client, utils
+from .clone_repos import clone_all, create_clone_script, read_repo_list
+from .filter_files import DEFAULT_MAX_FILE_SIZE, SupportedExtensions, filter_dataset
+from .get_repos import extract_and_save
+from .metrics import METRICS
+from .mock_api import MockGitHub, make_universe
+from .supported_languages import programming_languages
+
+WORDS = ["data", "value", "result", "index", "count", "name", "items", "config", "path", "node", "total", "state"]
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@localhost",
+    "GIT_COMMITTER_NAME": "benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@localhost",
+}
+
+
+def serve_mock(connection: Connection, repos: int, language: str, seed: int, url_template: str, latency: float,
+               rate_limit: int, rate_limit_window: float) -> None:
+    """Run a MockGitHub on a free port, sending its URL through connection."""
+    universe = make_universe(repos, [language], seed, url_template=url_template)
+    server = MockGitHub(("127.0.0.1", 0), universe, latency, rate_limit, rate_limit_window)
+    connection.send(server.url)
+    server.serve_forever()
+
+
+def source_file(rng: random.Random, lines: int) -> str:
+    body = []
+    for _ in range(lines):
+        words = rng.choices(WORDS, k=rng.randint(1, 6))
+        body.append("    " * rng.randint(0, 3) + f"{words[0]} = {' + '.join(words[1:]) or rng.randint(0, 999)}")
+    return "\n".join(body) + "\n"
+
+
+def write_repo_files(root: Path, rng: random.Random, files: int, extension: str, oversized: bool) -> int:
+    """Write a synthetic working tree, return its size in bytes."""
+    size = 0
+    for i in range(files):
+        directory = root / f"pkg{i % 4}" / ("sub" if i % 3 == 0 else "")
+        directory.mkdir(parents=True, exist_ok=True)
+        kind = rng.random()
+        if kind < 0.6:
+            path, content = directory / f"module{i}.{extension}", source_file(rng, rng.randint(5, 400)).encode()
+        elif kind < 0.8:
+            path, content = directory / f"notes{i}.md", f"# Notes {i}\n\n{source_file(rng, 20)}".encode()
+        elif kind < 0.9:
+            path, content = directory / f"image{i}.png", b"\x89PNG\r\n\x1a\n\0" + rng.randbytes(rng.randint(100, 20_000))
+        else:
+            path, content = directory / f"tool{i}", f"#!/bin/sh\necho {i}\n".encode()
+        path.write_bytes(content)
+        size += len(content)
+    if oversized:
+        content = source_file(rng, DEFAULT_MAX_FILE_SIZE // 20).encode()
+        (root / f"generated.{extension}").write_bytes(content)
+        size += len(content)
+    return size
+
+
+def make_bare_repo(path: Path, seed: int, files: int, extension: str, oversized: bool) -> int:
+    """Create a bare repo at path with one commit of synthetic files, return their size in bytes."""
+    work_tree = path.with_name(path.name + ".work")
+    work_tree.mkdir(parents=True)
+    size = write_repo_files(work_tree, random.Random(seed), files, extension, oversized)
+    env = {**os.environ, **GIT_IDENTITY}
+    git = ["git", "--git-dir", str(path), "--work-tree", str(work_tree)]
+    subprocess.run(["git", "init", "--quiet", "--bare", str(path)], check=True, env=env)
+    subprocess.run(git + ["add", "--all"], check=True, env=env, cwd=work_tree)
+    subprocess.run(git + ["commit", "--quiet", "--message", "Synthetic repo"], check=True, env=env)
+    # allow the partial clones of --sparse
+    subprocess.run(git + ["config", "uploadpack.allowFilter", "true"], check=True, env=env)
+    shutil.rmtree(work_tree)
+    return size
+
+
+def make_bare_repos(urls: List[str], language: str, files: int, seed: int, workers: int) -> int:
+    """Create the bare repo of every file:// URL, return the size of their files in bytes."""
+    extension = next(iter(SupportedExtensions.get(language)))
+    paths = [Path(url[len("file://"):]) for url in urls]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        sizes = executor.map(
+            lambda i: make_bare_repo(paths[i], seed + i, files, extension, oversized=i % 10 == 0), range(len(paths))
+        )
+        return sum(sizes)
+
+
+class Stopwatch:
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def seconds(self) -> float:
+        return round(time.perf_counter() - self.start, 4)
+
+
+def per_second(count: int, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+
+def environment() -> Dict[str, Any]:
+    git = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": git,
+    }
+
+
+class BenchmarkArgs(TypedArgumentParser):
+    work_dir: Path = Path("benchmark")  # Scratch directory, emptied before the run
+    output: Path = Path("benchmark.json")  # Where to write the results
+    lang: str = "python"  # Language of the harvested repos and of the files kept
+    repos: int = 5000  # Number of repos served by the mock search API
+    stars: Tuple[int, int] = (0, 200_000)  # Range of stars harvested
+    mode: Literal["auto", "exact", "greater-than", "ranged"] = "auto"  # Search operator, as in get_repos
+    step: int = 0  # Size of step in range of stars, as in get_repos
+    concurrency: int = 4  # Number of parallel search requests
+    latency: float = 0.05  # Seconds the mock API waits before each response
+    rate_limit: int = 0  # Search requests allowed per window by the mock API, 0 for unlimited
+    rate_limit_window: float = 60.0  # Seconds after which the mock search budget is refilled
+    clone_repos: int = 50  # Number of harvested repos turned into bare repos and cloned
+    files_per_repo: int = 40  # Files committed to each synthetic repo
+    workers: int = os.cpu_count() or 1  # Workers of the clone and filter stages
+    seed: int = 0  # Seed of the mock universe and the synthetic repos
+
+    def process_args(self) -> None:
+        if self.lang not in programming_languages:
+            raise ValueError(f"{self.lang} is not a supported programming language")
+
+
+def run_benchmark(args: BenchmarkArgs) -> Dict[str, Any]:
+    work_dir = args.work_dir.resolve()
+    if work_dir.exists():
+        shutil.rmtree(work_dir)
+    harvest_dir, remotes_dir = work_dir / "harvest", work_dir / "remotes"
+    harvest_dir.mkdir(parents=True)
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    url_template = f"file://{remotes_dir}/{{full_name}}.git"
+    mock = context.Process(
+        target=serve_mock,
+        args=(sender, args.repos, args.lang, args.seed, url_template, args.latency, args.rate_limit,
+              args.rate_limit_window),
+        daemon=True,
+    )
+    mock.start()
+    try:
+        api_url = receiver.recv()
+        os.environ["GITHUB_API_URL"] = api_url
+        client.configure(tokens=["benchmark"], pool_size=args.concurrency)
+        # output files of the auto mode are named after their queries, in the working directory
+        cwd = os.getcwd()
+        os.chdir(harvest_dir)
+        try:
+            stopwatch = Stopwatch()
+            extract_and_save(args.stars, args.lang, f"{args.lang}_benchmark", args.step, args.mode, args.concurrency)
+            seconds = stopwatch.seconds()
+        finally:
+            os.chdir(cwd)
+        statuses = requests.get(f"{api_url}/_stats", timeout=10).json()["statuses"]
+    finally:
+        mock.terminate()
+        client.configure()  # drop the client pointing at the mock
+    urls = list(dict.fromkeys(url for path in sorted(harvest_dir.glob("*.txt")) for url in read_repo_list(path)))
+    stages["harvest"] = {
+        "seconds": seconds,
+        "repos": len(urls),
+        "requests": sum(statuses.values()),
+        "statuses": statuses,
+        "repos_per_second": per_second(len(urls), seconds),
+    }
+
+    urls = urls[: args.clone_repos]
+    stopwatch = Stopwatch()
+    size = make_bare_repos(urls, args.lang, args.files_per_repo, args.seed, args.workers)
+    stages["generate_repos"] = {"seconds": stopwatch.seconds(), "repos": len(urls), "bytes": size}
+
+    repo_list, script_path, clone_dir = work_dir / "clone_list.txt", work_dir / "clone.sh", work_dir / "cloned"
+    utils.save_multiline_txt(repo_list, urls)
+    stopwatch = Stopwatch()
+    create_clone_script(repo_list, clone_dir, script_path, [args.lang])
+    stages["clone_script"] = {"seconds": stopwatch.seconds(), "repos": len(urls)}
+
+    # the last line of the script is the filter pass, timed on its own below
+    clone_commands = utils.read_multiline_txt_file(script_path)[:-1]
+    stopwatch = Stopwatch()
+    subprocess.run(["bash", "-c", "\n".join(clone_commands)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    seconds = stopwatch.seconds()
+    cloned = sum(1 for _ in clone_dir.glob("*/*")) if clone_dir.exists() else 0
+    stages["clone"] = {"seconds": seconds, "repos": cloned, "repos_per_second": per_second(cloned, seconds)}
+
+    stopwatch = Stopwatch()
+    stats = filter_dataset(clone_dir, [args.lang], workers=args.workers)
+    seconds = stopwatch.seconds()
+    stages["filter"] = {
+        "seconds": seconds,
+        **stats._asdict(),
+        "bytes_per_second": per_second(stats.kept_bytes + stats.removed_bytes, seconds),
+    }
+
+    stopwatch = Stopwatch()
+    results = clone_all(urls, work_dir / "cloned_run", [args.lang], workers=args.workers,
+                        failure_log=work_dir / "clone_failures.txt")
+    seconds = stopwatch.seconds()
+    ok = sum(result.ok for result in results)
+    stages["clone_run"] = {
+        "seconds": seconds,
+        "repos": ok,
+        "failed": len(results) - ok,
+        "repos_per_second": per_second(ok, seconds),
+    }
+
+    config = {key: str(value) if isinstance(value, Path) else value for key, value in args.as_dict().items()}
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": dict(sorted(config.items())),
+        "stages": stages,
+        "metrics": METRICS.snapshot(),
+    }
+
+
+def main():
+    args = BenchmarkArgs(underscores_to_dashes=True).parse_args()
+    results = run_benchmark(args)
+    for stage, result in results["stages"].items():
+        print(f"{stage:<15} {result['seconds']:>9.3f}s")
+    utils.save_json(results, args.output)
+    print("Saved results to", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Binary shards giving random access to every file of a packed corpus.
+
+A shard is made of three files:
+
+- NAME.bin, the UTF-8 contents of its files, concatenated
+- NAME.names, the org/repo/path of its files, concatenated
+- NAME.idx.npy, one fixed-width INDEX_DTYPE record per file, pointing into both
+
+and, once github_dataset_maker.quality has run, NAME.keep.npy flagging the
+files that passed the quality filters.
+
+Language codes index the list saved in languages.json next to the shards.
+BinaryCorpus memory-maps every shard, so record N is read without copying or
+scanning anything else, and filters run as vectorized NumPy expressions over
+the indexes.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .pack import SourceFile
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),  # of the content in .bin
+    ("size", "<u8"),  # bytes of content
+    ("name_offset", "<u8"),  # of org/repo/path in .names
+    ("name_size", "<u4"),
+    ("language", "<u2"),  # position in languages.json, 0 when unknown
+    ("hash", "V16"),  # BLAKE2b digest of the original file
+])
+LANGUAGES_FILE = "languages.json"
+
+
+def save_languages(output_dir: Path, languages: Iterable[str]) -> List[str]:
+    """Save the language table of a corpus, "" (unknown) first, and return it."""
+    table = ["", *sorted(set(languages))]
+    with open(output_dir / LANGUAGES_FILE, "w", encoding="utf-8") as f:
+        json.dump(table, f)
+    return table
+
+
+class BinaryShardWriter:
+    def __init__(self, path: Path, languages: Sequence[str]):
+        self.path = path
+        self.codes = {language: code for code, language in enumerate(languages)}
+        self.data = open(path.with_suffix(".bin"), "wb")
+        self.names = open(path.with_suffix(".names"), "wb")
+        self.index: List[np.ndarray] = []
+        self.offset = self.name_offset = 0
+
+    def write(self, records: List[SourceFile]) -> None:
+        index = np.zeros(len(records), dtype=INDEX_DTYPE)
+        contents = [record["content"].encode("utf-8") for record in records]
+        names = [f"{record['repo']}/{record['path']}".encode("utf-8") for record in records]
+        sizes = np.fromiter(map(len, contents), dtype=np.uint64, count=len(records))
+        name_sizes = np.fromiter(map(len, names), dtype=np.uint64, count=len(records))
+        index["size"] = sizes
+        index["offset"] = self.offset + np.cumsum(sizes) - sizes
+        index["name_size"] = name_sizes
+        index["name_offset"] = self.name_offset + np.cumsum(name_sizes) - name_sizes
+        index["language"] = [self.codes.get(record["language"] or "", 0) for record in records]
+        index["hash"] = [bytes.fromhex(record["hash"]) for record in records]
+        self.data.write(b"".join(contents))
+        self.names.write(b"".join(names))
+        self.offset += int(sizes.sum())
+        self.name_offset += int(name_sizes.sum())
+        self.index.append(index)
+
+    def close(self) -> None:
+        self.data.close()
+        self.names.close()
+        index = np.concatenate(self.index) if self.index else np.zeros(0, dtype=INDEX_DTYPE)
+        np.save(self.path.with_suffix(".idx.npy"), index)
+
+
+class BinaryShard:
+    def __init__(self, path: Path):
+        self.index: np.ndarray = np.load(path.with_suffix(".idx.npy"), mmap_mode="r")
+        self.data = self._map(path.with_suffix(".bin"))
+        self.names = self._map(path.with_suffix(".names"))
+        keep_path = path.with_suffix(".keep.npy")
+        self.keep: Optional[np.ndarray] = np.load(keep_path, mmap_mode="r") if keep_path.is_file() else None
+
+    @staticmethod
+    def _map(path: Path) -> np.ndarray:
+        # np.memmap refuses empty files
+        if path.stat().st_size == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
+
+    def content(self, i: int) -> memoryview:
+        offset, size = int(self.index["offset"][i]), int(self.index["size"][i])
+        return memoryview(self.data[offset : offset + size])
+
+    def name(self, i: int) -> str:
+        offset, size = int(self.index["name_offset"][i]), int(self.index["name_size"][i])
+        return bytes(self.names[offset : offset + size]).decode("utf-8")
+
+
+class BinaryCorpus:
+    """Read-only view of the binary shards of a directory, indexed by record id."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        with open(self.path / LANGUAGES_FILE, encoding="utf-8") as f:
+            self.languages: List[str] = json.load(f)
+        self.shards = [
+            BinaryShard(self.path / path.name[: -len(".idx.npy")]) for path in sorted(self.path.glob("*.idx.npy"))
+        ]
+        # first record id of each shard, and the total count at the end
+        self.starts = np.cumsum([0] + [len(shard.index) for shard in self.shards])
+
+    def __len__(self) -> int:
+        return int(self.starts[-1])
+
+    def locate(self, record_id: int) -> tuple[BinaryShard, int]:
+        if not 0 <= record_id < len(self):
+            raise IndexError(record_id)
+        shard = int(np.searchsorted(self.starts, record_id, side="right")) - 1
+        return self.shards[shard], record_id - int(self.starts[shard])
+
+    def __getitem__(self, record_id: int) -> memoryview:
+        """Content of a record, without copying it out of the shard."""
+        shard, i = self.locate(record_id)
+        return shard.content(i)
+
+    def name(self, record_id: int) -> str:
+        shard, i = self.locate(record_id)
+        return shard.name(i)
+
+    def language(self, record_id: int) -> str:
+        shard, i = self.locate(record_id)
+        return self.languages[int(shard.index["language"][i])]
+
+    def select(
+        self,
+        languages: Optional[List[str]] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        keep_only: bool = False,
+    ) -> np.ndarray:
+        """Ids of the records matching every filter, keep_only skips those failing the quality filters."""
+        codes = [self.languages.index(language) for language in languages or [] if language in self.languages]
+        ids = []
+        for start, shard in zip(self.starts, self.shards):
+            mask = np.ones(len(shard.index), dtype=bool)
+            if languages is not None:
+                mask &= np.isin(shard.index["language"], codes)
+            if min_size is not None:
+                mask &= shard.index["size"] >= min_size
+            if max_size is not None:
+                mask &= shard.index["size"] <= max_size
+            if keep_only and shard.keep is not None:
+                mask &= shard.keep
+            ids.append(np.flatnonzero(mask) + start)
+        return np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,158 @@
+"""
+Generate language_index.py, the lookup tables used to detect the language of a file.
+
+Reads GitHub Linguist's languages.yml (or any YAML/JSON file with the same
+layout: language name -> extensions, filenames and interpreters), keeps the
+languages listed in supported_languages and writes dict literals mapping
+lowercase extensions, exact filenames and shebang interpreters to lowercase
+language names. Several sources are merged in order, so put the most recent
+first. The source "identify" converts the tables of the installed identify
+package to the same layout. Needs PyYAML, which is only required to
+regenerate the index, not to use it.
+
+python -m github_dataset_maker.build_language_index --sources linguist/lib/linguist/languages.yml
+
+The committed index was generated from the files of these PyPI releases:
+
+pip download --no-deps linguist==0.1.1 programming-languages==2.0.3 && pip install identify==2.6.20
+tar xzf linguist-0.1.1.tar.gz && unzip programming_languages-2.0.3-py2.py3-none-any.whl -d programming-languages
+python -m github_dataset_maker.build_language_index --sources \\
+    programming-languages/programming_languages/programming-languages.json \\
+    identify \\
+    linguist-0.1.1/linguist/libs/languages.yml
+"""
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, List
+
+import requests
+from tap import Tap as TypedArgumentParser
+
+from .supported_languages import popular_languages, programming_languages
+
+LINGUIST_LANGUAGES_URL = "https://raw.githubusercontent.com/github-linguist/linguist/master/lib/linguist/languages.yml"
+INDEX_PATH = Path(__file__).parent / "language_index.py"
+
+
+# owners Linguist falls back to when its content heuristics (heuristics.yml) do not match
+HEURISTIC_DEFAULTS = {".h": "c", ".mm": "objective-c++"}
+# tags of identify that tell the kind of a file rather than its language
+IDENTIFY_KINDS = {"text", "binary", "executable", "non-executable", "file", "directory", "symlink", "socket"}
+
+
+def identify_languages() -> dict[str, dict[str, list[str]]]:
+    """Tables of the identify package in the layout of languages.yml, keeping tags named like languages."""
+    from identify import extensions, interpreters
+
+    languages: dict[str, dict[str, list[str]]] = {}
+    tables = {
+        "extensions": {f".{ext}": tags for ext, tags in extensions.EXTENSIONS.items()},
+        "filenames": extensions.NAMES,
+        "interpreters": interpreters.INTERPRETERS,
+    }
+    for field, mapping in tables.items():
+        for key in sorted(mapping):
+            # tags are sets, sorted so the generated index does not change between runs
+            for tag in sorted(mapping[key] - IDENTIFY_KINDS):
+                if tag in programming_languages:
+                    languages.setdefault(tag, {}).setdefault(field, []).append(key)
+    return languages
+
+
+def source_name(source: str) -> str:
+    if source == "identify":
+        from importlib.metadata import version
+
+        return f"identify {version('identify')}"
+    return source
+
+
+def load_source(source: str) -> dict[str, Any]:
+    if source == "identify":
+        return identify_languages()
+    import yaml
+
+    if source.startswith(("http://", "https://")):
+        response = requests.get(source, timeout=60)
+        response.raise_for_status()
+        return yaml.safe_load(response.text)
+    with open(source, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def build_tables(sources: List[dict[str, Any]]) -> dict[str, dict[str, list[str]]]:
+    tables: dict[str, dict[str, list[str]]] = {"EXTENSIONS": {}, "FILENAMES": {}, "INTERPRETERS": {}}
+    votes: Counter[tuple[str, str]] = Counter()  # sources listing each (extension, language)
+    for languages in sources:
+        for name, info in languages.items():
+            language = name.lower()
+            if language not in programming_languages:
+                continue
+            extensions = list(info.get("extensions") or [])
+            if info.get("primary_extension"):  # older languages.yml
+                extensions.append(info["primary_extension"])
+            keys = {
+                "EXTENSIONS": list(dict.fromkeys(ext.lower() for ext in extensions)),
+                "FILENAMES": info.get("filenames") or [],
+                "INTERPRETERS": info.get("interpreters") or [],
+            }
+            for table, table_keys in keys.items():
+                for key in table_keys:
+                    candidates = tables[table].setdefault(key, [])
+                    if language not in candidates:
+                        candidates.append(language)
+            votes.update((ext, language) for ext in keys["EXTENSIONS"])
+    # filenames and interpreters keep the order of the sources; a shared extension goes to a popular
+    # language first (.rs is Rust before RenderScript), then to the one most sources agree on (.md is Markdown)
+    for ext, candidates in tables["EXTENSIONS"].items():
+        candidates.sort(
+            key=lambda language: (
+                language != HEURISTIC_DEFAULTS.get(ext),
+                language not in popular_languages,
+                -votes[ext, language],
+            )
+        )
+    return tables
+
+
+def render_index(tables: dict[str, dict[str, list[str]]], sources: List[str]) -> str:
+    lines = ["# Generated by python -m github_dataset_maker.build_language_index from:"]
+    lines += [f"#   {source_name(source)}" for source in sources]
+    lines += [
+        "# Do not edit by hand.",
+        '"""',
+        "Languages of supported_languages by file extension, filename and shebang interpreter.",
+        "",
+        "Values list every candidate language, the most likely first.",
+        '"""',
+    ]
+    for table, mapping in tables.items():
+        lines += ["", f"{table}: dict[str, tuple[str, ...]] = {{"]
+        for key in sorted(mapping):
+            candidates = "".join(f"{language!r}, " for language in mapping[key]).rstrip(" ")
+            lines.append(f"    {key!r}: ({candidates}),")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+class BuildLanguageIndexArgs(TypedArgumentParser):
+    sources: List[str] = [LINGUIST_LANGUAGES_URL]  # Paths or URLs of languages.yml files (or "identify"), merged in order
+    output: Path = INDEX_PATH  # Where to write the generated module
+
+
+def main():
+    args = BuildLanguageIndexArgs(underscores_to_dashes=True).parse_args()
+    tables = build_tables([load_source(source) for source in args.sources])
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(render_index(tables, args.sources))
+    covered = {language for mapping in tables.values() for candidates in mapping.values() for language in candidates}
+    print(f"Indexed {len(covered)} of {len(programming_languages)} languages in {args.output}.")
+    missing = sorted(programming_languages - covered)
+    if missing:
+        print("Languages without extensions, filenames or interpreters:", ", ".join(missing))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Columnar catalog of harvested repos, keyed by repository id.
+
+The catalog is a directory of Parquet parts sorted by id. Upserts are written
+as new parts and merged in tiers (every `fanout` parts of a level become one
+part of the next level), keeping the newest row of each id, so a repo found by
+several queries is stored once. Readers apply the same rule across parts.
+"""
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple, TypedDict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("full_name", pa.string()),
+    ("url", pa.string()),
+    ("language", pa.string()),  # language the repo was harvested for
+    ("stars", pa.int64()),
+    ("size", pa.int64()),  # in KB, as reported by the API
+    ("fork", pa.bool_()),
+    ("archived", pa.bool_()),
+    ("default_branch", pa.string()),
+    ("created_at", pa.string()),
+    ("pushed_at", pa.string()),
+    # filled in by github_dataset_maker.enrich
+    ("license", pa.string()),  # SPDX id
+    ("languages", pa.list_(pa.struct([("name", pa.string()), ("bytes", pa.int64())]))),
+    ("enriched", pa.bool_()),
+])
+PART_NAME = re.compile(r"part-(\d+)-(\d+)\.parquet")
+
+
+class CatalogRecord(TypedDict):
+    id: int
+    full_name: str
+    url: str
+    language: str
+    stars: int
+    size: Optional[int]
+    fork: Optional[bool]
+    archived: Optional[bool]
+    default_branch: Optional[str]
+    created_at: Optional[str]
+    pushed_at: Optional[str]
+    license: Optional[str]
+    languages: Optional[List[dict[str, Any]]]
+    enriched: bool
+
+
+def record_from_item(item: dict[str, Any], language: str) -> CatalogRecord:
+    return {
+        "id": item["id"],
+        "full_name": item["full_name"],
+        "url": item["html_url"],
+        "language": language,
+        "stars": item["stargazers_count"],
+        "size": item.get("size"),
+        "fork": item.get("fork"),
+        "archived": item.get("archived"),
+        "default_branch": item.get("default_branch"),
+        "created_at": item.get("created_at"),
+        "pushed_at": item.get("pushed_at"),
+        "license": None,
+        "languages": None,
+        "enriched": False,
+    }
+
+
+def latest_rows(table: pa.Table) -> pa.Table:
+    """Keep the row with the highest _seq of each id, sorted by id."""
+    table = table.take(pc.sort_indices(table, [("id", "ascending"), ("_seq", "descending")]))
+    ids = table.column("id").to_numpy()
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = ids[1:] != ids[:-1]
+    return table.filter(pa.array(keep))
+
+
+def read_part(path: Path, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read a part, filling columns it predates with nulls."""
+    names = set(pq.read_schema(path).names)
+    wanted = [field for field in SCHEMA if columns is None or field.name in columns]
+    table = pq.read_table(path, columns=[field.name for field in wanted if field.name in names])
+    for field in wanted:
+        if field.name not in names:
+            table = table.append_column(field, pa.nulls(len(table), field.type))
+    return table.select([field.name for field in wanted])
+
+
+class Catalog:
+    def __init__(self, path: Path | str, fanout: int = 16, batch_size: int = 100_000):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fanout = fanout
+        self.batch_size = batch_size
+        self.buffer: List[CatalogRecord] = []
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def parts(self, level: Optional[int] = None) -> List[Tuple[int, int, Path]]:
+        """List (level, seq, path) of the parts, oldest first."""
+        parts = []
+        for path in self.path.glob("part-*.parquet"):
+            match = PART_NAME.fullmatch(path.name)
+            if match is not None and (level is None or int(match[1]) == level):
+                parts.append((int(match[1]), int(match[2]), path))
+        return sorted(parts, key=lambda part: part[1])
+
+    def read_parts(self, parts: List[Tuple[int, int, Path]], columns: Optional[List[str]] = None) -> pa.Table:
+        tables = []
+        for _, seq, path in parts:
+            table = read_part(path, columns)
+            tables.append(table.append_column("_seq", pa.array(np.full(len(table), seq, dtype=np.int64))))
+        if not tables:
+            schema = pa.schema([field for field in SCHEMA if columns is None or field.name in columns])
+            return schema.empty_table().append_column("_seq", pa.array([], pa.int64()))
+        return latest_rows(pa.concat_tables(tables))
+
+    def write_part(self, table: pa.Table, level: int, seq: int) -> Path:
+        path = self.path / f"part-{level:02d}-{seq:010d}.parquet"
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(table.drop_columns(["_seq"]).cast(SCHEMA), tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def upsert(self, records: Iterable[CatalogRecord]) -> None:
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records as a new part, then merge full tiers."""
+        if not self.buffer:
+            return
+        parts = self.parts()
+        seq = parts[-1][1] + 1 if parts else 0
+        table = pa.Table.from_pylist(self.buffer, schema=SCHEMA)
+        table = table.append_column("_seq", pa.array(np.arange(len(table), dtype=np.int64)))
+        self.write_part(latest_rows(table), 0, seq)
+        self.buffer.clear()
+        level = 0
+        while len(self.parts(level)) >= self.fanout:
+            self.merge(self.parts(level), level + 1)
+            level += 1
+
+    def merge(self, parts: List[Tuple[int, int, Path]], level: int) -> None:
+        # the merged part takes the newest seq, newer parts still win over it
+        merged_path = self.write_part(self.read_parts(parts), level, parts[-1][1])
+        for _, _, path in parts:
+            if path != merged_path:
+                path.unlink()
+
+    def compact(self) -> None:
+        """Merge every part into a single one."""
+        self.flush()
+        parts = self.parts()
+        if len(parts) > 1:
+            self.merge(parts, max(level for level, _, _ in parts) + 1)
+
+    def load(
+        self,
+        languages: Optional[List[str]] = None,
+        min_stars: Optional[int] = None,
+        max_stars: Optional[int] = None,
+        max_size: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """Read the newest row of every repo matching the filters (sizes in KB)."""
+        self.flush()
+        filter_columns = ["id", "language", "stars", "size"]
+        if columns is not None:
+            columns = list(dict.fromkeys(filter_columns + columns))
+        table = self.read_parts(self.parts(), columns)
+        mask = pa.array(np.ones(len(table), dtype=bool))
+        if languages:
+            mask = pc.and_(mask, pc.is_in(table["language"], pa.array([lang.lower() for lang in languages])))
+        if min_stars is not None:
+            mask = pc.and_(mask, pc.greater_equal(table["stars"], min_stars))
+        if max_stars is not None:
+            mask = pc.and_(mask, pc.less_equal(table["stars"], max_stars))
+        if max_size is not None:
+            # repos of unknown size are kept
+            mask = pc.and_(mask, pc.fill_null(pc.less_equal(table["size"], max_size), True))
+        return table.filter(mask).drop_columns(["_seq"])
+
+    def urls(self, **filters: Any) -> List[str]:
+        return self.load(columns=["url"], **filters).column("url").to_pylist()
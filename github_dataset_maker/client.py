@@ -0,0 +1,251 @@
+"""
+One HTTP client shared by every request made to the GitHub API.
+
+Connections are pooled and kept alive for the whole harvest instead of paying
+connection setup and a TLS handshake per Github() object. HTTP/2 is used when
+requested and httpx (with h2) is installed.
+
+Requests are spread over a pool of tokens read from GITHUB_API_TOKENS
+(comma-separated), the file at GITHUB_API_TOKENS_FILE (one per line) or
+GITHUB_API_TOKEN. Set GITHUB_API_URL to point the client at a local mock of
+the API. GET responses are revalidated with ETags when a ResponseCache is
+given (see http_cache).
+
+Tokens are only read, and requests only imported, when the shared client is
+first used, so importing this module never fails for lack of credentials.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from . import utils
+from .http_cache import ResponseCache, cache_key
+from .metrics import METRICS
+from .rate_limit import TokenPool
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_POOL_SIZE = 10
+MAX_PER_PAGE = 100
+RETRIED_METHODS = ("GET", "HEAD")  # idempotent, safe to send again after a transient failure
+RETRIED_STATUSES = (500, 502, 503, 504)
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        base_url: str = DEFAULT_API_URL,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        http2: bool = False,
+        timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        retries: int = 3,
+        backoff: float = 2.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        # GitHub Enterprise serves REST under /api/v3 and GraphQL under /api/graphql
+        if self.base_url.endswith("/api/v3"):
+            self.graphql_url = self.base_url[: -len("v3")] + "graphql"
+        else:
+            self.graphql_url = f"{self.base_url}/graphql"
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        self.tokens = TokenPool(tokens)
+        self.http2 = http2 and http2_available()
+        headers = {"Accept": "application/vnd.github+json"}
+        # both clients are safe to share between threads and reuse idle connections
+        if self.http2:
+            import httpx
+
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            self.session: Any = httpx.Client(http2=True, headers=headers, limits=limits)
+            self.transient_errors: tuple[type[Exception], ...] = (httpx.TransportError,)
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            self.session.headers.update(headers)
+            self.transient_errors = (requests.ConnectionError, requests.Timeout)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        resource: Optional[str] = "core",
+        idempotent: Optional[bool] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Send a request with the token that has the most budget left for resource.
+
+        Waits while every token is exhausted and retries rate limited requests.
+        GET requests, and others sent with idempotent=True, are also retried,
+        with exponential backoff, after connection errors, timeouts and 5xx
+        responses. Pass resource=None for endpoints that do not count against
+        any budget.
+        """
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        headers = kwargs.pop("headers", {})
+        if idempotent is None:
+            idempotent = method.upper() in RETRIED_METHODS
+        retries = self.retries if idempotent else 0
+        failures = 0
+        while True:
+            if resource is None:
+                token, scheduler = self.tokens.pick("core")
+            else:
+                token, scheduler = self.tokens.acquire(resource)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    headers={**headers, "Authorization": f"token {token}"},
+                    timeout=self.timeout,
+                    **kwargs,
+                )
+            except self.transient_errors as e:
+                METRICS.inc("requests_total", resource=resource, status="error")
+                if failures >= retries:
+                    raise
+                failures += 1
+                self.wait_before_retry(failures, f"{type(e).__name__} on {method} {url}", resource)
+                continue
+            METRICS.observe("request_seconds", time.perf_counter() - start, resource=resource)
+            METRICS.inc("requests_total", resource=resource, status=response.status_code)
+            if response.status_code == 304 and resource is not None:
+                scheduler.refund(resource, response.headers)
+            body = response.text if response.status_code == 403 else ""
+            if scheduler.observe(response.status_code, response.headers, body):
+                METRICS.inc("rate_limited_total", resource=resource)
+                continue
+            if response.status_code not in RETRIED_STATUSES or failures >= retries:
+                return response
+            failures += 1
+            self.wait_before_retry(failures, f"{response.status_code} on {method} {url}", resource)
+
+    def wait_before_retry(self, failures: int, error: str, resource: Optional[str]) -> None:
+        wait = self.backoff * 2 ** (failures - 1)
+        print(f"Retrying in {wait:.0f}s after {error} (attempt {failures + 1} of {self.retries + 1}).")
+        METRICS.inc("request_retries_total", resource=resource)
+        time.sleep(wait)
+
+    def get_json(self, path: str, resource: Optional[str] = "core", params: Optional[dict[str, Any]] = None) -> Any:
+        """GET path, replaying the cached body when the server answers 304 Not Modified."""
+        if self.cache is None:
+            response = self.request("GET", path, resource, params=params)
+            response.raise_for_status()
+            return response.json()
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        key = cache_key(url, params)
+        cached = self.cache.get(key)
+        headers = {"If-None-Match": cached.etag} if cached is not None else {}
+        response = self.request("GET", path, resource, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(key)
+            METRICS.inc("http_cache_total", result="unchanged")
+            return json.loads(cached.body)
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.cache.put(key, etag, response.content)
+            METRICS.inc("http_cache_total", result="stored")
+        return response.json()
+
+    def search_repositories(self, query: str, page: int = 1, per_page: int = MAX_PER_PAGE) -> dict[str, Any]:
+        params = {"q": query, "sort": "stars", "order": "desc", "per_page": per_page, "page": page}
+        return self.get_json("/search/repositories", "search", params=params)
+
+    def graphql(self, query: str, variables: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """Run a read-only query, retried after transient failures like a GET."""
+        response = self.request(
+            "POST",
+            self.graphql_url,
+            "graphql",
+            idempotent=True,
+            json={"query": query, "variables": variables or {}},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("data") is None:
+            raise RuntimeError(f"GraphQL query failed: {payload.get('errors')}")
+        return payload["data"]
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def load_tokens(tokens_file: Optional[Path] = None) -> list[str]:
+    """Read tokens from tokens_file, GITHUB_API_TOKENS_FILE, GITHUB_API_TOKENS or GITHUB_API_TOKEN."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    tokens_file = tokens_file or os.environ.get("GITHUB_API_TOKENS_FILE")
+    if tokens_file:
+        lines = utils.read_multiline_txt_file(tokens_file)
+    elif os.environ.get("GITHUB_API_TOKENS"):
+        lines = os.environ["GITHUB_API_TOKENS"].split(",")
+    elif os.environ.get("GITHUB_API_TOKEN"):
+        lines = [os.environ["GITHUB_API_TOKEN"]]
+    else:
+        raise ValueError(
+            "No GitHub API token: set GITHUB_API_TOKEN, GITHUB_API_TOKENS or GITHUB_API_TOKENS_FILE (or use .env)."
+        )
+    return [token.strip() for token in lines if token.strip()]
+
+
+_client: Optional[GitHubClient] = None
+_client_lock = threading.Lock()
+_settings: dict[str, Any] = {}
+
+
+def configure(**settings: Any) -> None:
+    """
+    Set GitHubClient keyword arguments (tokens, pool_size, http2, ...) of the shared client.
+
+    tokens_file is read when the client is created, instead of tokens.
+    """
+    global _client
+    with _client_lock:
+        _settings.update(settings)
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_client() -> GitHubClient:
+    """Return the client shared by the whole process, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            settings = dict(_settings)
+            tokens_file = settings.pop("tokens_file", None)
+            if "tokens" not in settings:
+                settings["tokens"] = load_tokens(tokens_file)
+            _client = GitHubClient(
+                base_url=os.environ.get("GITHUB_API_URL", DEFAULT_API_URL),
+                **settings,
+            )
+        return _client
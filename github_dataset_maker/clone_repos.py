@@ -2,98 +2,479 @@
 Read repo_list_path, filter git URLs, and save a clone script to script_path.
 
 Read repo lists in the format created by
-python -m github_dataset_maker.get_repos --mode ranged as well.
+python -m github_dataset_maker.get_repos --mode ranged as well, or select
+repos from a catalog created with python -m github_dataset_maker.get_repos --catalog.
+
+With --run, repos are cloned and cleaned in-process by a pool of workers
+instead, with timeouts, retries and a log of failures. Repos listed in
+destination_dir/.cloned.txt are skipped, so an interrupted run can resume.
+With --run --archive, a snapshot of each repo is downloaded as a tarball over
+pooled connections and only files of the wanted languages are extracted.
+With --run --pack-dir, the cloned files are then packed into compressed
+shards (see github_dataset_maker.pack), destination_dir being a staging area.
+
+requests, the catalog and the packer (pyarrow, numpy) are only imported by
+the options that use them, so that writing a script or cloning starts fast.
 """
 from __future__ import annotations
 
 import itertools
+import os
+import shlex
+import shutil
+import subprocess
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Literal, Optional
+from typing import TYPE_CHECKING, Callable, Iterable, List, Literal, NamedTuple, Optional
 
 from tap import Tap as TypedArgumentParser
 
 from . import utils
+from .filter_files import (
+    FilterStats,
+    LanguageMatcher,
+    check_languages,
+    filter_tree,
+)
+from .metrics import METRICS, progress, save_outputs
+from .schedule import CloneCandidate, CloneOrder, DiskBudget, disk_usage, schedule, with_repo_info
+
+if TYPE_CHECKING:
+    import requests
+
+
+def repo_output_path(url: str, destination: Path) -> Path:
+    org, repo = url.split("/")[-2:]
+    if org.startswith("git@github.com:"):
+        org = org[15:]
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return destination / f"{org}/{repo}"
+
+
+def sparse_clone_commands(
+    url: str,
+    output_path: Path,
+    patterns: List[str],
+    custom_ssh_key: Path | None = None,
+) -> list[list[str]]:
+    """
+    Partially clone url, fetching only the blobs of files matching sparse-checkout patterns.
+
+    Trees are fetched without blobs (--filter=blob:none) and the checkout is
+    restricted by sparse-checkout patterns, so other files never cross the
+    network or touch the disk.
+    """
+    clone = ["git", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", url, str(output_path)]
+    if custom_ssh_key is not None and custom_ssh_key.is_file():
+        clone += ["--config", f"core.sshCommand=ssh -i {custom_ssh_key}"]
+    git = ["git", "-C", str(output_path)]
+    return [clone, git + ["sparse-checkout", "set", "--no-cone", *patterns], git + ["checkout"]]
 
 
 def clone_each(
     repos_urls: Iterable[str],
     destination: Path,
-    supported_files: Iterable[str],
+    matcher: LanguageMatcher,
     custom_ssh_key: Path | None = None,
+    sparse: bool = False,
 ) -> list[str]:
 
+    patterns = matcher.sparse_patterns()
     base_command = "git clone --depth 1 {url} {folder}"
     if custom_ssh_key is not None and custom_ssh_key.is_file():
         base_command += f" --config core.sshCommand=ssh -i {custom_ssh_key}"
-    or_regex = r"\|".join(supported_files)
-    all_files_ending_in = rf".*.\({or_regex}\)"
     lines = []
     for url in repos_urls:
-        org, repo = url.split("/")[-2:]
-        if org.startswith("git@github.com:"):
-            org = org[15:]
-        if repo.endswith(".git"):
-            repo = repo[:-4]
-        output_path = destination / f"{org}/{repo}"
-        cmd = base_command.format(url=url, folder=output_path)
+        output_path = repo_output_path(url, destination)
+        if sparse:
+            commands = sparse_clone_commands(url, output_path, patterns, custom_ssh_key)
+            cmd = " && ".join(map(shlex.join, commands))
+        else:
+            cmd = base_command.format(url=url, folder=output_path)
         cmd += f" ; rm -rf {output_path / '.git'}"
-        cmd += f" ; find {output_path} -type f ! -regex '{all_files_ending_in}' -delete"
         lines.append(cmd)
     return lines
 
 
-class SupportedExtensions:
-    mapping: dict[str, list[str]] = {
-        "python": ["py"],
-        "javascript": ["es", "es6", "js", "jsx", "ts", "tsx"],
-        "java": [".java", ".class", ".apex", ".cls", ".kt", ".kts", ".ktm",".scala", ".sc"],
-    }
-    @classmethod
-    def get(cls, *languages: str) -> Iterable[str]:
-        return itertools.chain(*[cls.mapping[lang] for lang in languages])
+def read_repo_list(repo_list_path: Path) -> Iterable[str]:
+    txt_lines = utils.read_multiline_txt_file(repo_list_path)
+    # TODO add support for org/repo paths
+    return filter(lambda x: x.startswith(("git", "https", "file://")), txt_lines)
+
+
+def read_candidates(repo_list_path: Path) -> list[CloneCandidate]:
+    """Read a repo list with the stars and sizes of the .csv get_repos saved next to it."""
+    return with_repo_info(read_repo_list(repo_list_path), repo_list_path.with_suffix(".csv"))
 
 
 def create_clone_script(repo_list_path: Path, destination_dir: Path, script_path: Path, languages: list[str]):
-    txt_lines = utils.read_multiline_txt_file(repo_list_path)
-    # TODO add support for org/repo paths
-    repos_urls = filter(lambda x: x.startswith(("git", "https")), txt_lines)
+    write_clone_script(read_repo_list(repo_list_path), destination_dir, script_path, languages)
+
+
+def write_clone_script(
+    repos_urls: Iterable[str],
+    destination_dir: Path,
+    script_path: Path,
+    languages: list[str],
+    sparse: bool = False,
+):
     commands = clone_each(
         repos_urls,
         destination_dir,
-        supported_files=SupportedExtensions.get(*languages),
+        matcher=LanguageMatcher.for_languages(languages),
+        sparse=sparse,
     )
+    # one filter pass over every cloned repo instead of a find per repo
+    filter_command = ["python", "-m", "github_dataset_maker.filter_files"]
+    filter_command += ["--destination-dir", str(destination_dir), "--languages", *languages]
+    commands.append(shlex.join(filter_command))
     utils.save_multiline_txt(script_path, commands, append=True)
     print("Done:", script_path)
 
 
+DONE_LOG = ".cloned.txt"
+
+
+class CloneResult(NamedTuple):
+    url: str
+    ok: bool
+    attempts: int
+    error: str = ""
+    size: int = 0  # bytes of the files kept
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, subprocess.TimeoutExpired):
+        return f"timed out after {error.timeout}s"
+    if isinstance(error, subprocess.CalledProcessError):
+        lines = error.stderr.strip().splitlines()
+        fatal = [line for line in lines if line.startswith("fatal:")]
+        return (fatal or lines or [f"exit status {error.returncode}"])[0]
+    return str(error) or type(error).__name__
+
+
+def fetch_with_retries(
+    url: str, output_path: Path, fetch: Callable[[], FilterStats], retries: int, backoff: float
+) -> CloneResult:
+    """Call fetch until it succeeds, starting from an empty output_path each time."""
+    error = ""
+    for attempt in range(1, retries + 2):
+        shutil.rmtree(output_path, ignore_errors=True)
+        METRICS.inc("clone_attempts_total")
+        try:
+            with METRICS.stage("clone", url=url, attempt=attempt):
+                stats = fetch()
+        # requests.RequestException is an OSError
+        except (subprocess.SubprocessError, tarfile.TarError, OSError) as e:
+            error = describe_error(e)
+        else:
+            count_bytes(stats)
+            return CloneResult(url, True, attempt, size=stats.kept_bytes)
+        if attempt <= retries:
+            time.sleep(backoff * 2 ** (attempt - 1))
+    shutil.rmtree(output_path, ignore_errors=True)
+    return CloneResult(url, False, retries + 1, error)
+
+
+def count_bytes(stats: FilterStats) -> None:
+    METRICS.inc("cloned_bytes_total", stats.kept_bytes, kept=True)
+    METRICS.inc("cloned_bytes_total", stats.removed_bytes, kept=False)
+
+
+def clone_repo(
+    url: str,
+    destination: Path,
+    matcher: LanguageMatcher,
+    custom_ssh_key: Path | None = None,
+    timeout: float = 600,
+    retries: int = 2,
+    backoff: float = 5.0,
+    sparse: bool = False,
+) -> CloneResult:
+    """Shallow clone url, drop .git and unwanted files, retrying with exponential backoff."""
+    output_path = repo_output_path(url, destination)
+    if sparse:
+        commands = sparse_clone_commands(url, output_path, matcher.sparse_patterns(), custom_ssh_key)
+    else:
+        commands = [["git", "clone", "--depth", "1", url, str(output_path)]]
+        if custom_ssh_key is not None and custom_ssh_key.is_file():
+            commands[0] += ["--config", f"core.sshCommand=ssh -i {custom_ssh_key}"]
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}  # fail instead of asking for credentials
+
+    def fetch() -> FilterStats:
+        for command in commands:
+            subprocess.run(command, check=True, timeout=timeout, capture_output=True, text=True, env=env)
+        shutil.rmtree(output_path / ".git", ignore_errors=True)
+        return filter_tree(output_path, matcher)
+
+    return fetch_with_retries(url, output_path, fetch, retries, backoff)
+
+
+# {owner} and {repo} are filled in, HEAD is the default branch
+ARCHIVE_URL = "https://codeload.github.com/{owner}/{repo}/tar.gz/HEAD"
+
+
+def extract_supported_files(archive: tarfile.TarFile, output_path: Path, matcher: LanguageMatcher) -> None:
+    """Write the regular files of a streamed archive that may match, skip the rest."""
+    for member in archive:
+        name = os.path.basename(member.name)
+        if not member.isfile() or not (matcher.matches_name(name) or matcher.may_be_script(name)):
+            continue
+        # drop the top-level <repo>-<commit>/ directory of GitHub archives
+        parts = Path(member.name).parts[1:]
+        if not parts or ".." in parts or Path(member.name).is_absolute():
+            continue
+        target = output_path.joinpath(*parts)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        source = archive.extractfile(member)
+        assert source is not None
+        with source, open(target, "wb") as f:
+            shutil.copyfileobj(source, f)
+
+
+def download_repo(
+    url: str,
+    destination: Path,
+    matcher: LanguageMatcher,
+    session: requests.Session,
+    archive_url: str = ARCHIVE_URL,
+    timeout: float = 600,
+    retries: int = 2,
+    backoff: float = 5.0,
+) -> CloneResult:
+    """Stream the tarball of url's default branch, extracting only supported files."""
+    output_path = repo_output_path(url, destination)
+    owner, repo = output_path.parts[-2:]
+
+    def fetch() -> FilterStats:
+        output_path.mkdir(parents=True, exist_ok=True)
+        response = session.get(archive_url.format(owner=owner, repo=repo), stream=True, timeout=timeout)
+        with response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with tarfile.open(fileobj=response.raw, mode="r|*") as archive:
+                extract_supported_files(archive, output_path, matcher)
+        # drop binary, oversized and other scripts, which the archive listing cannot tell apart
+        return filter_tree(output_path, matcher)
+
+    return fetch_with_retries(url, output_path, fetch, retries, backoff)
+
+
+def archive_session(workers: int) -> requests.Session:
+    """A session keeping one connection per worker alive between archive downloads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def clone_progress(total: int) -> str:
+    done, failed = METRICS.value("repos_cloned_total"), METRICS.value("repos_cloned_total", ok=False)
+    kept_bytes = METRICS.value("cloned_bytes_total", kept=True)
+    return f"{done:.0f}/{total} repos ({failed:.0f} failed), {kept_bytes / 1e6:.1f} MB kept"
+
+
+def clone_all(
+    repos_urls: Iterable[str],
+    destination_dir: Path,
+    languages: list[str],
+    custom_ssh_key: Path | None = None,
+    workers: int = 8,
+    timeout: float = 600,
+    retries: int = 2,
+    failure_log: Path = Path("clone_failures.txt"),
+    sparse: bool = False,
+    archive: bool = False,
+    archive_url: str = ARCHIVE_URL,
+    disk_budget: Optional[int] = None,
+) -> list[CloneResult]:
+    """
+    Clone every repo not cloned yet with a pool of workers, in the order of repos_urls.
+
+    With a disk_budget (in bytes), no clone is started once the files kept in
+    destination_dir take that much; the clones in flight still finish.
+    """
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    done_log = destination_dir / DONE_LOG
+    done = set(utils.read_multiline_txt_file(done_log)) if done_log.is_file() else set()
+    todo = [url for url in dict.fromkeys(repos_urls) if url not in done]
+    print(f"Cloning {len(todo)} repos, skipping {len(done)} already cloned.")
+    matcher = LanguageMatcher.for_languages(languages)
+    results = []
+    budget = DiskBudget(disk_budget, disk_usage(destination_dir)) if disk_budget is not None else None
+    session = archive_session(workers) if archive else None
+    if archive:
+        clone = partial(
+            download_repo,
+            destination=destination_dir,
+            matcher=matcher,
+            session=session,
+            archive_url=archive_url,
+            timeout=timeout,
+            retries=retries,
+        )
+    else:
+        clone = partial(
+            clone_repo,
+            destination=destination_dir,
+            matcher=matcher,
+            custom_ssh_key=custom_ssh_key,
+            timeout=timeout,
+            retries=retries,
+            sparse=sparse,
+        )
+    queue = iter(todo)
+    pending: set[Future[CloneResult]] = set()
+    with session or nullcontext(), ThreadPoolExecutor(max_workers=workers) as executor:
+        # results are logged from this thread only, one line at a time
+        with utils.LineWriter(done_log, batch_size=1) as done_writer:
+            with utils.LineWriter(failure_log, batch_size=1) as failure_writer:
+                with progress(lambda: clone_progress(len(todo))):
+                    while True:
+                        # clones are started as others finish, so the budget is checked before each one
+                        while len(pending) < workers and (budget is None or not budget.spent()):
+                            url = next(queue, None)
+                            if url is None:
+                                break
+                            pending.add(executor.submit(clone, url))
+                        if not pending:
+                            break
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            result = future.result()
+                            results.append(result)
+                            METRICS.inc("repos_cloned_total", ok=result.ok)
+                            if result.ok:
+                                done_writer.write(result.url)
+                            else:
+                                failure_writer.write(f"{result.url}\t{result.error}")
+                            if budget is not None:
+                                budget.add(result.size)
+    failed = sum(not result.ok for result in results)
+    print(f"Done: {len(results) - failed} cloned, {failed} failed (see {failure_log}).")
+    if budget is not None and budget.spent():
+        print(
+            f"Stopped at the disk budget: {budget.used / 1e6:.1f} of {budget.limit / 1e6:.1f} MB used,",
+            f"{len(todo) - len(results)} repos left to clone.",
+        )
+    return results
+
+
 class CloneScriptCreatorArgs(TypedArgumentParser):
     custom_ssh_key: Optional[Path] = None  # Path to the ssh key to use for cloning.
     destination_dir: Path = Path(".")  # Where to save the cloned repos
-    languages: List[Literal["python", "javascript", "java"]]
-    repo_list_path: Path  # Path to file containing repo URLs (one per line)
+    languages: List[str]  # Languages of the files to keep (see supported_languages)
+    repo_list_path: Optional[Path] = None  # Path to file containing repo URLs (one per line)
+    catalog: Optional[Path] = None  # Path to a repo catalog to read instead of repo_list_path
+    catalog_languages: List[str] = []  # Only clone catalog repos harvested for these languages
+    min_stars: Optional[int] = None  # Only clone repos with at least this many stars (from the catalog or the .csv lists)
+    max_size: Optional[int] = None  # Only clone repos up to this size in KB (from the catalog or the .csv lists)
+    order: CloneOrder = "file"  # Clone repos as listed, most starred first ("stars") or smallest first ("size")
+    disk_budget: Optional[int] = None  # With --run, start no clone once the kept files take this many bytes
     script_path: Path = Path("clone.sh") # Path to save the created script
     split_lists: bool = False  # If true, glob repo_list_path for repo lists *.txt.
     split_scripts: bool = False  # If true, each repo_list will be saved to a separate script.
+    run: bool = False  # If true, clone the repos now instead of saving a script.
+    workers: int = 8  # Number of repos cloned in parallel with --run
+    timeout: int = 600  # Seconds before a clone is aborted with --run
+    retries: int = 2  # Attempts after a failed clone with --run
+    failure_log: Path = Path("clone_failures.txt")  # Where --run logs the repos it could not clone
+    sparse: bool = False  # Partial clone that only downloads and checks out files with supported extensions
+    archive: bool = False  # With --run, download tarball snapshots instead of cloning
+    archive_url: str = ARCHIVE_URL  # Tarball URL template with {owner} and {repo} placeholders
+    pack_dir: Optional[Path] = None  # With --run, pack the cloned files into shards in this directory
+    pack_format: Literal["jsonl", "parquet", "bin"] = "jsonl"  # Shard format used with --pack-dir (see pack.ShardFormat)
+    metrics: Optional[Path] = None  # With --run, save counters and latency histograms (.prom for Prometheus, else JSON)
+    trace: Optional[Path] = None  # With --run, save per-stage spans in Chrome trace format (chrome://tracing, Perfetto)
 
     def process_args(self) -> None:
+        check_languages(self.languages)
+        if (self.repo_list_path is None) == (self.catalog is None):
+            raise ValueError("Pass exactly one of --repo-list-path and --catalog.")
+        if self.split_lists and self.catalog is not None:
+            raise ValueError("--split-lists requires --repo-list-path.")
         if self.split_scripts and not self.split_lists:
             raise ValueError("--split-scripts requires --split-lists.")
+        if self.archive and not self.run:
+            raise ValueError("--archive requires --run.")
+        if self.archive and self.sparse:
+            raise ValueError("Pass at most one of --archive and --sparse.")
+        if self.pack_dir is not None and not self.run:
+            raise ValueError("--pack-dir requires --run.")
+        if (self.metrics is not None or self.trace is not None) and not self.run:
+            raise ValueError("--metrics and --trace require --run.")
+        if self.disk_budget is not None and not self.run:
+            raise ValueError("--disk-budget requires --run.")
 
 
 def main():
     args = CloneScriptCreatorArgs(underscores_to_dashes=True).parse_args()
-    repo_lists = [args.repo_list_path]
-    if args.split_lists:
-        repo_lists = sorted(
-            args.repo_list_path.glob(r"*.txt"),
-            key=lambda x: int(x.stem.split("_")[-1].split("-")[0]),
+    if args.trace is not None:
+        METRICS.enable_tracing()
+    if args.catalog is not None:
+        from .catalog import Catalog
+
+        table = Catalog(args.catalog).load(
+            languages=args.catalog_languages,
+            min_stars=args.min_stars,
+            max_size=args.max_size,
+            columns=["url"],
+        )
+        columns = [table.column(name).to_pylist() for name in ("url", "stars", "size")]
+        candidate_lists = [[CloneCandidate(*row) for row in zip(*columns)]]
+    else:
+        repo_lists = [args.repo_list_path]
+        if args.split_lists:
+            repo_lists = sorted(
+                args.repo_list_path.glob(r"*.txt"),
+                key=lambda x: int(x.stem.split("_")[-1].split("-")[0]),
+            )
+        candidate_lists = [read_candidates(sub_list) for sub_list in repo_lists]
+    if args.run:
+        candidates = schedule(itertools.chain(*candidate_lists), args.order, args.max_size, args.min_stars)
+        clone_all(
+            [candidate.url for candidate in candidates],
+            args.destination_dir,
+            args.languages,
+            args.custom_ssh_key,
+            args.workers,
+            args.timeout,
+            args.retries,
+            args.failure_log,
+            args.sparse,
+            args.archive,
+            args.archive_url,
+            args.disk_budget,
         )
-    for i, sub_list in enumerate(repo_lists):
+        if args.pack_dir is not None:
+            from .pack import pack_dataset
+
+            with METRICS.stage("pack"):
+                pack_dataset(args.destination_dir, args.pack_dir, args.pack_format)
+        save_outputs(args.metrics, args.trace)
+        return
+    url_lists = [
+        [candidate.url for candidate in schedule(candidates, args.order, args.max_size, args.min_stars)]
+        for candidates in candidate_lists
+    ]
+    if not args.split_scripts:
+        # one script, so a single filter pass after the clones of every list
+        url_lists = [list(itertools.chain(*url_lists))]
+    for i, repos_urls in enumerate(url_lists):
         sub_script_path = args.script_path
         if args.split_scripts:
             sub_script_path = args.script_path.parent / f"{args.script_path.stem}_{i}.sh"
-        create_clone_script(
-            sub_list, args.destination_dir, sub_script_path, args.languages
+        write_clone_script(
+            repos_urls, args.destination_dir, sub_script_path, args.languages, args.sparse
         )
 
 
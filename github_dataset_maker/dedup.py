@@ -0,0 +1,388 @@
+"""
+Find exact and near-duplicate files among cloned repos.
+
+Exact duplicates share the BLAKE2b digest of their content. Near duplicates
+are found with MinHash signatures of token shingles and LSH banding: a file
+whose signature collides in a band with a kept file, and agrees with it on at
+least --threshold of the MinHash values, is a duplicate of that file. The
+first file seen is kept, repos being visited in sorted order.
+
+Signatures are one permutation MinHashes: tokens are found and hashed with
+numpy, each shingle is hashed once and lands in one of NUM_PERM bins, whose
+minimums make the signature (empty bins borrow the value of a full one). That
+costs O(shingles) per file instead of O(shingles * NUM_PERM).
+
+Digests and signatures are computed in a pool of processes, with a bounded
+number of repos in flight. Kept files are indexed in a SQLite file, looked up
+and inserted a repo at a time, so rerunning over a destination_dir only
+processes the repos added since the last run. Every decision is appended to a
+keep/drop manifest (.csv); nothing is deleted.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from tap import Tap as TypedArgumentParser
+
+from . import utils
+from .filter_files import repo_dirs
+
+NUM_PERM = 128  # bins of the one permutation hash, a power of two
+BANDS = 16  # 8 rows per band, collisions become likely above ~0.7 similarity
+SHINGLE_SIZE = 5  # tokens per shingle
+DEFAULT_THRESHOLD = 0.85
+SIGNATURE_VERSION = "3"  # stored in the index, bumped whenever the signature of a file changes
+SQL_BATCH = 900  # values per IN (...) lookup, under SQLite's limit on bound parameters
+
+# fixed so signatures are comparable between runs
+TOKEN_BASE = 0x100000001B3  # odd, hence invertible modulo 2**64
+SHINGLE_BASE = np.uint64(1099511628211)
+MIX = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))  # splitmix64 finalizer
+BIN_SHIFT = np.uint64(64 - NUM_PERM.bit_length() + 1)
+DENSIFY_ATTEMPTS = 64
+# bins an empty bin tries in turn to borrow a value from (optimal densification), drawn
+# from blake2b rather than a numpy Generator whose streams may change between versions
+DENSIFY_BINS = np.array([
+    [
+        int.from_bytes(hashlib.blake2b(f"{empty_bin}:{attempt}".encode(), digest_size=8).digest(), "little")
+        % NUM_PERM
+        for attempt in range(DENSIFY_ATTEMPTS)
+    ]
+    for empty_bin in range(NUM_PERM)
+])
+DENSIFY_OFFSET = np.uint32(0x9E3779B1)  # added per bin skipped when no bin it tried was full
+
+MANIFEST_FIELDS = ["path", "size", "digest", "status", "reason", "duplicate_of", "similarity"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS repos (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT, size INTEGER, signature BLOB, duplicate_of INTEGER, reason TEXT
+);
+CREATE TABLE IF NOT EXISTS exact (digest BLOB PRIMARY KEY, file_id INTEGER);
+CREATE TABLE IF NOT EXISTS lsh (key INTEGER, file_id INTEGER);
+CREATE INDEX IF NOT EXISTS lsh_key ON lsh (key);
+"""
+
+
+class FileDigest(NamedTuple):
+    path: str  # relative to destination_dir
+    size: int
+    digest: bytes
+    signature: Optional[bytes]  # None for files shorter than a shingle
+
+
+class Decision(NamedTuple):
+    duplicate_of: Optional[int]  # id of the kept file
+    reason: str  # "", "exact" or "near"
+    similarity: float
+    duplicate_path: str = ""  # path of the kept file
+
+
+_powers = (np.ones(1, dtype=np.uint64), np.ones(1, dtype=np.uint64))
+
+
+def powers(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """TOKEN_BASE**i and its inverse**i modulo 2**64 for i < n, cached and grown by doubling."""
+    global _powers
+    if len(_powers[0]) < n:
+        size = max(n, 2 * len(_powers[0]))
+        factors = np.empty((2, size), dtype=np.uint64)
+        factors[0], factors[1] = np.uint64(TOKEN_BASE), np.uint64(pow(TOKEN_BASE, -1, 2**64))
+        factors[:, 0] = 1
+        _powers = tuple(np.cumprod(factors, axis=1))
+    return _powers[0][:n], _powers[1][:n]
+
+
+def token_hashes(content: bytes) -> np.ndarray:
+    """Polynomial hash of each \\w+ token of content, independent of where the token is."""
+    data = np.frombuffer(content, dtype=np.uint8)
+    # [0-9A-Za-z_], as matched by \\w in a bytes regex
+    letter = (data | np.uint8(0x20)) - np.uint8(ord("a")) < 26
+    word = letter | (data - np.uint8(ord("0")) < 10) | (data == ord("_"))
+    padded = np.zeros(len(data) + 2, dtype=bool)
+    padded[1:-1] = word
+    starts = np.flatnonzero(padded[1:] != padded[:-1])[::2]
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    power, inverse = powers(len(data))
+    # sums of (byte + 1) * base**position over each token, shifted back to position 0
+    weighted = np.where(word, data + np.uint64(1), np.uint64(0)) * power
+    return np.add.reduceat(weighted, starts) * inverse[starts]
+
+
+def minhash(content: bytes) -> Optional[np.ndarray]:
+    """One permutation MinHash signature (NUM_PERM uint32 values) of the token shingles of content."""
+    tokens = token_hashes(content)
+    if len(tokens) < SHINGLE_SIZE:
+        return None
+    count = len(tokens) - SHINGLE_SIZE + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for i in range(SHINGLE_SIZE):
+        shingles = shingles * SHINGLE_BASE + tokens[i : i + count]
+    shingles ^= shingles >> np.uint64(30)
+    shingles *= MIX[0]
+    shingles ^= shingles >> np.uint64(27)
+    shingles *= MIX[1]
+    shingles ^= shingles >> np.uint64(31)
+    bins = (shingles >> BIN_SHIFT).astype(np.intp)
+    signature = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    np.minimum.at(signature, bins, shingles.astype(np.uint32))
+    full = np.zeros(NUM_PERM, dtype=bool)
+    full[bins] = True
+    empty_bins = np.flatnonzero(~full)
+    filled = signature.copy()
+    for attempt in range(DENSIFY_ATTEMPTS):
+        if len(empty_bins) == 0:
+            return filled
+        sources = DENSIFY_BINS[empty_bins, attempt]
+        found = full[sources]
+        filled[empty_bins[found]] = signature[sources[found]]
+        empty_bins = empty_bins[~found]
+    if len(empty_bins):
+        # rotation: the next full bin's value, offset by the distance
+        full_bins = np.flatnonzero(full)
+        sources = full_bins[np.searchsorted(full_bins, empty_bins) % len(full_bins)]
+        distances = ((sources - empty_bins) % NUM_PERM).astype(np.uint32)
+        filled[empty_bins] = signature[sources] + distances * DENSIFY_OFFSET
+    return filled
+
+
+def digest_repo(args: tuple[str, str]) -> List[FileDigest]:
+    """Digest every file of a repo, in a stable order."""
+    repo_dir, destination_dir = args
+    digests = []
+    for root, dirs, files in os.walk(repo_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                content = f.read()
+            signature = minhash(content)
+            digests.append(
+                FileDigest(
+                    os.path.relpath(path, destination_dir),
+                    len(content),
+                    hashlib.blake2b(content, digest_size=16).digest(),
+                    None if signature is None else signature.tobytes(),
+                )
+            )
+    return digests
+
+
+def band_keys(signature: bytes) -> List[int]:
+    """One key per band, the band number being hashed in so keys of different bands never collide."""
+    rows = len(signature) // BANDS
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[i : i + rows], digest_size=8, salt=band.to_bytes(16, "little")).digest(),
+            "little",
+            signed=True,
+        )
+        for band, i in enumerate(range(0, len(signature), rows))
+    ]
+
+
+class DedupIndex:
+    def __init__(self, path: Path | str, threshold: float = DEFAULT_THRESHOLD):
+        self.connection = sqlite3.connect(str(path))
+        # commits of every repo are not synced to disk one by one
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.threshold = threshold
+        self.check_version(path)
+
+    def __enter__(self) -> DedupIndex:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def check_version(self, path: Path | str) -> None:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'signature_version'").fetchone()
+        if row is None and self.connection.execute("SELECT 1 FROM repos LIMIT 1").fetchone() is None:
+            with self.connection:
+                self.connection.execute("INSERT INTO meta VALUES ('signature_version', ?)", (SIGNATURE_VERSION,))
+        elif row is None or row[0] != SIGNATURE_VERSION:
+            raise ValueError(f"{path} holds signatures of another version of dedup, pass a new --index.")
+
+    def is_indexed(self, repo: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM repos WHERE name = ?", (repo,)).fetchone() is not None
+
+    def select_in(self, sql: str, values: Iterable[Any]) -> Iterator[tuple]:
+        """Run sql, whose {} is replaced by placeholders, for batches of values."""
+        values = list(values)
+        for start in range(0, len(values), SQL_BATCH):
+            batch = values[start : start + SQL_BATCH]
+            yield from self.connection.execute(sql.format(", ".join("?" * len(batch))), batch)
+
+    def add_repo(self, repo: str, files: Sequence[FileDigest]) -> List[tuple[FileDigest, Decision]]:
+        """
+        Decide whether each file of repo is kept, indexing the kept ones.
+
+        The index is read with a few batched lookups for the whole repo, then
+        files are decided in memory, so files of the repo can be duplicates of
+        each other, and the kept ones are inserted at once.
+        """
+        keys = [band_keys(file.signature) if file.signature is not None else [] for file in files]
+        exact = {
+            digest: (file_id, path)
+            for digest, file_id, path in self.select_in(
+                "SELECT digest, file_id, path FROM exact JOIN files ON files.id = file_id WHERE digest IN ({})",
+                {file.digest for file in files},
+            )
+        }
+        buckets: defaultdict[int, List[int]] = defaultdict(list)
+        for key, file_id in self.select_in("SELECT key, file_id FROM lsh WHERE key IN ({})", {k for ks in keys for k in ks}):
+            buckets[key].append(file_id)
+        kept = {
+            file_id: (path, np.frombuffer(signature, dtype=np.uint32))
+            for file_id, path, signature in self.select_in(
+                "SELECT id, path, signature FROM files WHERE id IN ({})",
+                {file_id for ids in buckets.values() for file_id in ids},
+            )
+        }
+        next_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM files").fetchone()[0]
+        decisions, file_rows, exact_rows, lsh_rows = [], [], [], []
+        for file_id, (file, file_keys) in enumerate(zip(files, keys), next_id):
+            decision = self.find_duplicate(file, file_keys, exact, buckets, kept)
+            file_rows.append((file_id, file.path, file.size, file.signature, decision.duplicate_of, decision.reason))
+            if decision.duplicate_of is None:
+                exact[file.digest] = (file_id, file.path)
+                exact_rows.append((file.digest, file_id))
+                if file.signature is not None:
+                    kept[file_id] = (file.path, np.frombuffer(file.signature, dtype=np.uint32))
+                    for key in file_keys:
+                        buckets[key].append(file_id)
+                    lsh_rows += [(key, file_id) for key in file_keys]
+            decisions.append((file, decision))
+        with self.connection:
+            self.connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)", file_rows)
+            self.connection.executemany("INSERT INTO exact VALUES (?, ?)", exact_rows)
+            self.connection.executemany("INSERT INTO lsh VALUES (?, ?)", lsh_rows)
+            self.connection.execute("INSERT INTO repos VALUES (?)", (repo,))
+        return decisions
+
+    def find_duplicate(
+        self,
+        file: FileDigest,
+        keys: List[int],
+        exact: dict[bytes, tuple[int, str]],
+        buckets: dict[int, List[int]],
+        kept: dict[int, tuple[str, np.ndarray]],
+    ) -> Decision:
+        if file.digest in exact:
+            file_id, path = exact[file.digest]
+            return Decision(file_id, "exact", 1.0, path)
+        if file.signature is None:
+            return Decision(None, "", 0.0)
+        candidates = {file_id for key in keys for file_id in buckets.get(key, ())}
+        signature = np.frombuffer(file.signature, dtype=np.uint32)
+        best = Decision(None, "", 0.0)
+        for file_id in sorted(candidates):
+            path, other = kept[file_id]
+            similarity = float(np.mean(signature == other))
+            if similarity >= self.threshold and similarity > best.similarity:
+                best = Decision(file_id, "near", similarity, path)
+        return best
+
+    def stats(self) -> dict[str, Any]:
+        """Counts and bytes of kept and dropped files, and the sizes of duplicate clusters."""
+        stats: dict[str, Any] = {}
+        rows = self.connection.execute("SELECT reason, COUNT(*), SUM(size) FROM files GROUP BY reason")
+        for reason, count, size in rows:
+            status = "kept" if reason == "" else f"{reason}_duplicates"
+            stats[f"{status}_files"] = count
+            stats[f"{status}_bytes"] = size
+        # a cluster is a kept file and its duplicates
+        rows = self.connection.execute(
+            "SELECT COUNT(*) FROM files WHERE duplicate_of IS NOT NULL GROUP BY duplicate_of"
+        )
+        sizes = [count + 1 for count, in rows]
+        stats["clusters"] = len(sizes)
+        stats["largest_clusters"] = sorted(sizes, reverse=True)[:10]
+        stats["cluster_sizes"] = {str(size): count for size, count in sorted(Counter(sizes).items())}
+        return stats
+
+
+def iter_digests(repos: List[str], destination_dir: Path, workers: int | None, window: int) -> Iterator[List[FileDigest]]:
+    """Digest each repo in a pool of processes, in order, keeping at most window repos in flight."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future[List[FileDigest]]] = deque()
+        for repo in repos:
+            pending.append(executor.submit(digest_repo, (repo, str(destination_dir))))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def dedup(
+    destination_dir: Path,
+    index_path: Path,
+    manifest_path: Path,
+    threshold: float = DEFAULT_THRESHOLD,
+    workers: int | None = None,
+    window: int = 64,
+) -> dict[str, Any]:
+    """Dedup the repos of destination_dir not indexed yet, appending decisions to manifest_path."""
+    with DedupIndex(index_path, threshold) as index:
+        repos = [
+            repo_dir
+            for repo_dir in sorted(repo_dirs(destination_dir))
+            if not index.is_indexed(os.path.relpath(repo_dir, destination_dir))
+        ]
+        print(f"Deduplicating {len(repos)} new repos.")
+        files = kept = 0
+        with utils.CsvWriter(manifest_path, MANIFEST_FIELDS) as manifest:
+            digests = iter_digests(repos, destination_dir, workers, window)
+            for repo_dir, repo_files in zip(repos, digests):
+                for file, decision in index.add_repo(os.path.relpath(repo_dir, destination_dir), repo_files):
+                    files += 1
+                    kept += decision.duplicate_of is None
+                    manifest.write({
+                        "path": file.path,
+                        "size": file.size,
+                        "digest": file.digest.hex(),
+                        "status": "keep" if decision.duplicate_of is None else "drop",
+                        "reason": decision.reason,
+                        "duplicate_of": decision.duplicate_path,
+                        "similarity": f"{decision.similarity:.3f}" if decision.reason else "",
+                    })
+        print(f"Kept {kept} of {files} new files.")
+        return index.stats()
+
+
+class DedupArgs(TypedArgumentParser):
+    destination_dir: Path  # Directory of cloned repos (org/repo)
+    index: Path = Path("dedup.db")  # SQLite index of kept files, reused by later runs
+    manifest: Path = Path("dedup_manifest.csv")  # Where keep/drop decisions are appended
+    stats: Optional[Path] = None  # Save cluster statistics to this .json file
+    threshold: float = DEFAULT_THRESHOLD  # Estimated Jaccard similarity of near duplicates
+    workers: int = os.cpu_count() or 1  # Number of processes hashing files
+    window: int = 64  # Repos hashed ahead of the index, bounds memory when the index falls behind
+
+
+def main():
+    args = DedupArgs(underscores_to_dashes=True).parse_args()
+    stats = dedup(args.destination_dir, args.index, args.manifest, args.threshold, args.workers, args.window)
+    for name, value in stats.items():
+        print(f"{name}: {value}")
+    if args.stats is not None:
+        utils.save_json(stats, args.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Fill in repo metadata (disk usage, license, fork/archived flags, default
+branch and language breakdown) of a catalog with batched GraphQL queries.
+
+Each request asks for up to 100 repos and batches run concurrently under the
+rate limit of the shared client, so the catalog can be filtered before
+cloning. Set GITHUB_API_URL to point the client at a local GraphQL stand-in
+such as github_dataset_maker.mock_api.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, cast
+
+import pyarrow.compute as pc
+from tap import Tap as TypedArgumentParser
+
+from .catalog import Catalog, CatalogRecord
+from .client import get_client
+
+MAX_BATCH_SIZE = 100
+REPO_FIELDS = """
+    diskUsage
+    isFork
+    isArchived
+    defaultBranchRef { name }
+    licenseInfo { spdxId }
+    languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
+        edges { size node { name } }
+    }
+"""
+
+
+def build_query(full_names: List[str]) -> tuple[str, dict[str, str]]:
+    """Alias one repository() field per repo, passing owners and names as variables."""
+    params, fields, variables = [], [], {}
+    for i, full_name in enumerate(full_names):
+        owner, name = full_name.split("/", 1)
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{{REPO_FIELDS}}}")
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+    return f"query({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}", variables
+
+
+def fetch_metadata(full_names: List[str]) -> List[Optional[dict[str, Any]]]:
+    """Return the metadata of each repo, None for repos that no longer exist."""
+    query, variables = build_query(full_names)
+    data = get_client().graphql(query, variables)
+    return [data.get(f"r{i}") for i in range(len(full_names))]
+
+
+def enrich_record(record: CatalogRecord, metadata: dict[str, Any]) -> None:
+    record["size"] = metadata["diskUsage"]
+    record["fork"] = metadata["isFork"]
+    record["archived"] = metadata["isArchived"]
+    record["default_branch"] = (metadata["defaultBranchRef"] or {}).get("name")
+    record["license"] = (metadata["licenseInfo"] or {}).get("spdxId")
+    record["languages"] = [
+        {"name": edge["node"]["name"], "bytes": edge["size"]}
+        for edge in metadata["languages"]["edges"]
+    ]
+    record["enriched"] = True
+
+
+def iter_batches(repo_catalog: Catalog, batch_size: int, only_missing: bool) -> Iterator[List[CatalogRecord]]:
+    table = repo_catalog.load()
+    if only_missing:
+        table = table.filter(pc.invert(pc.fill_null(table["enriched"], False)))
+    for record_batch in table.to_batches(max_chunksize=batch_size):
+        yield cast(List[CatalogRecord], record_batch.to_pylist())
+
+
+def enrich_catalog(
+    repo_catalog: Catalog,
+    concurrency: int = 4,
+    batch_size: int = MAX_BATCH_SIZE,
+    only_missing: bool = True,
+) -> int:
+    """Enrich the records of repo_catalog in place, return how many were updated."""
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}, got {batch_size}.")
+    batches = iter_batches(repo_catalog, batch_size, only_missing)
+    enriched = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                # keep a bounded number of batches in memory
+                window = [batch for _, batch in zip(range(concurrency * 4), batches)]
+                if not window:
+                    break
+                names = [[record["full_name"] for record in batch] for batch in window]
+                for batch, metadata in zip(window, executor.map(fetch_metadata, names)):
+                    for record, repo_metadata in zip(batch, metadata):
+                        if repo_metadata is not None:
+                            enrich_record(record, repo_metadata)
+                            enriched += 1
+                    repo_catalog.upsert(batch)
+                # write each window out, so a failure or interrupt only loses the batches in flight
+                repo_catalog.flush()
+                print(f"Enriched {enriched} repos.")
+    finally:
+        repo_catalog.flush()
+    return enriched
+
+
+class EnrichArgs(TypedArgumentParser):
+    catalog: Path  # Path to the repo catalog to enrich
+    concurrency: int = 4  # number of parallel GraphQL requests
+    batch_size: int = MAX_BATCH_SIZE  # repos per GraphQL request (at most 100)
+    all: bool = False  # refresh repos that were already enriched too
+
+
+def main():
+    args = EnrichArgs(underscores_to_dashes=True).parse_args()
+    enrich_catalog(Catalog(args.catalog), args.concurrency, args.batch_size, not args.all)
+
+
+if __name__ == "__main__":
+    main()
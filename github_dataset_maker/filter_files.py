@@ -0,0 +1,240 @@
+"""
+Drop the files of cloned repos that do not belong in the dataset.
+
+Walks destination_dir/org/repo trees with os.scandir in a pool of processes
+and removes files of other languages, symlinks, binary files and files larger
+than --max-file-size, then reports the bytes kept and removed. Languages are
+recognized by extension, filename (e.g. Makefile) or, for files without an
+extension, shebang, using the generated tables of language_index. Files at
+the top of destination_dir (such as the clone log) are left alone.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import re
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from tap import Tap as TypedArgumentParser
+
+from .language_index import EXTENSIONS, FILENAMES, INTERPRETERS
+from .supported_languages import programming_languages
+
+DEFAULT_MAX_FILE_SIZE = 1_000_000  # bytes
+BINARY_SNIFF_SIZE = 8192
+SHEBANG = re.compile(rb"#![ \t]*(\S+)[ \t]*([^\r\n]*)")
+GLOB_SPECIAL_CHARS = "\\*?["  # escaped in sparse-checkout patterns
+
+
+@lru_cache(maxsize=None)
+def language_extensions() -> dict[str, list[str]]:
+    """Invert language_index.EXTENSIONS."""
+    extensions: dict[str, list[str]] = {}
+    for ext, candidates in EXTENSIONS.items():
+        for language in candidates:
+            extensions.setdefault(language, []).append(ext)
+    return extensions
+
+
+class SupportedExtensions:
+    # languages cloned together with their close relatives, the others use language_index
+    mapping: dict[str, list[str]] = {
+        "python": ["py"],
+        "javascript": ["es", "es6", "js", "jsx", "ts", "tsx"],
+        "java": ["java", "class", "apex", "cls", "kt", "kts", "ktm", "scala", "sc"],
+    }
+    @classmethod
+    def get(cls, *languages: str) -> Iterable[str]:
+        return itertools.chain(*[cls.mapping.get(lang) or language_extensions().get(lang, []) for lang in languages])
+
+
+def extension_suffixes(supported_files: Iterable[str]) -> tuple[str, ...]:
+    return tuple(ext if ext.startswith(".") else f".{ext}" for ext in supported_files)
+
+
+def file_suffixes(name: str) -> List[str]:
+    """Lowercase suffixes to look up, a double one such as ".sh.in" first."""
+    parts = name.lower().split(".")[1:]
+    return [f".{'.'.join(parts[-n:])}" for n in (2, 1) if len(parts) >= n]
+
+
+def shebang_interpreter(head: bytes) -> Optional[str]:
+    """Interpreter named by a #! line, e.g. python3 for "#!/usr/bin/env -S python3 -u"."""
+    match = SHEBANG.match(head)
+    if match is None:
+        return None
+    interpreter = os.path.basename(match[1]).decode("utf-8", errors="replace")
+    if interpreter == "env":
+        args = [arg for arg in match[2].split() if not arg.startswith(b"-") and b"=" not in arg]
+        if not args:
+            return None
+        interpreter = os.path.basename(args[0]).decode("utf-8", errors="replace")
+    # python3.11 -> python3 when only the major version is known
+    if interpreter not in INTERPRETERS:
+        interpreter = re.sub(r"\.[\d.]*$", "", interpreter)
+    return interpreter
+
+
+def detect_language(name: str, head: bytes = b"") -> Optional[str]:
+    """Most likely language of a file from its name, or the shebang at the start of its content."""
+    for suffix in file_suffixes(name):
+        if suffix in EXTENSIONS:
+            return EXTENSIONS[suffix][0]
+    if name in FILENAMES:
+        return FILENAMES[name][0]
+    interpreter = shebang_interpreter(head)
+    if interpreter in INTERPRETERS:
+        return INTERPRETERS[interpreter][0]
+    return None
+
+
+class LanguageMatcher(NamedTuple):
+    extensions: frozenset[str]  # lowercase, such as ".py"
+    filenames: frozenset[str]
+    interpreters: frozenset[str]
+
+    @classmethod
+    def for_languages(cls, languages: Iterable[str]) -> LanguageMatcher:
+        languages = set(languages)
+        return cls(
+            frozenset(ext.lower() for ext in extension_suffixes(SupportedExtensions.get(*languages))),
+            # a filename is kept for its most likely language only (Dockerfile is not a shell script)
+            frozenset(name for name, candidates in FILENAMES.items() if candidates[0] in languages),
+            frozenset(name for name, candidates in INTERPRETERS.items() if languages.intersection(candidates)),
+        )
+
+    def matches_name(self, name: str) -> bool:
+        return name in self.filenames or any(suffix in self.extensions for suffix in file_suffixes(name))
+
+    def may_be_script(self, name: str) -> bool:
+        """Whether the shebang of a file has to be read to know if it matches."""
+        return bool(self.interpreters) and "." not in name
+
+    def sparse_patterns(self) -> List[str]:
+        """Sparse-checkout patterns of the matching files, extensions matched in any case like matches_name."""
+        return [f"*{case_insensitive_glob(ext)}" for ext in sorted(self.extensions)] + [
+            glob_escape(name) for name in sorted(self.filenames)
+        ]
+
+
+def glob_escape(text: str) -> str:
+    return "".join(f"\\{char}" if char in GLOB_SPECIAL_CHARS else char for char in text)
+
+
+def case_insensitive_glob(text: str) -> str:
+    """Glob matching text in any case, such as .[pP][yY] for .py (sparse-checkout is case-sensitive)."""
+    return "".join(
+        f"[{char.lower()}{char.upper()}]" if char.lower() != char.upper() else glob_escape(char) for char in text
+    )
+
+
+def check_languages(languages: Iterable[str]) -> None:
+    for language in languages:
+        if language not in programming_languages:
+            raise ValueError(f"{language} is not a supported programming language")
+        if not any(LanguageMatcher.for_languages([language])):
+            raise ValueError(f"No extension, filename or interpreter is known for {language}")
+
+
+class FilterStats(NamedTuple):
+    kept_files: int = 0
+    kept_bytes: int = 0
+    removed_files: int = 0
+    removed_bytes: int = 0
+
+
+def add_stats(stats: Iterable[FilterStats]) -> FilterStats:
+    return FilterStats(*map(sum, zip(*stats, FilterStats())))
+
+
+def read_head(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(BINARY_SNIFF_SIZE)
+
+
+def filter_tree(path: Path | str, matcher: LanguageMatcher, max_file_size: int = DEFAULT_MAX_FILE_SIZE) -> FilterStats:
+    """Remove unwanted files under path and the directories left empty."""
+    kept_files = kept_bytes = removed_files = removed_bytes = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stats = filter_tree(entry.path, matcher, max_file_size)
+                kept_files += stats.kept_files
+                kept_bytes += stats.kept_bytes
+                removed_files += stats.removed_files
+                removed_bytes += stats.removed_bytes
+                if not os.listdir(entry.path):
+                    os.rmdir(entry.path)
+                continue
+            size = entry.stat(follow_symlinks=False).st_size
+            name_matches = matcher.matches_name(entry.name)
+            keep = False
+            if entry.is_file(follow_symlinks=False) and size <= max_file_size:
+                # only files that may be kept are read, to sniff binary content or a shebang
+                if name_matches or matcher.may_be_script(entry.name):
+                    head = read_head(entry.path)
+                    keep = b"\0" not in head and (
+                        name_matches or shebang_interpreter(head) in matcher.interpreters
+                    )
+            if keep:
+                kept_files += 1
+                kept_bytes += size
+            else:
+                os.remove(entry.path)
+                removed_files += 1
+                removed_bytes += size
+    return FilterStats(kept_files, kept_bytes, removed_files, removed_bytes)
+
+
+def repo_dirs(destination_dir: Path) -> List[str]:
+    """List the org/repo directories of destination_dir."""
+    dirs = []
+    with os.scandir(destination_dir) as orgs:
+        for org in orgs:
+            if org.is_dir(follow_symlinks=False):
+                with os.scandir(org.path) as repos:
+                    dirs.extend(repo.path for repo in repos if repo.is_dir(follow_symlinks=False))
+    return dirs
+
+
+def filter_dataset(
+    destination_dir: Path,
+    languages: List[str],
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    workers: int | None = None,
+) -> FilterStats:
+    """Filter every repo of destination_dir in a pool of processes."""
+    from concurrent.futures import ProcessPoolExecutor  # not needed by clone_repos, which imports this module
+
+    dirs = repo_dirs(destination_dir)
+    filter_repo = partial(filter_tree, matcher=LanguageMatcher.for_languages(languages), max_file_size=max_file_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        stats = add_stats(executor.map(filter_repo, dirs, chunksize=16))
+    total_bytes = stats.kept_bytes + stats.removed_bytes
+    print(
+        f"Filtered {len(dirs)} repos: kept {stats.kept_files} files ({stats.kept_bytes / 1e6:.1f} MB),",
+        f"removed {stats.removed_files} files ({stats.removed_bytes / 1e6:.1f} MB,",
+        f"{stats.removed_bytes / max(total_bytes, 1):.0%} of the bytes).",
+    )
+    return stats
+
+
+class FilterArgs(TypedArgumentParser):
+    destination_dir: Path  # Directory of cloned repos (org/repo)
+    languages: List[str]  # Languages of the files to keep (see supported_languages)
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE  # Files larger than this (in bytes) are removed
+    workers: int = os.cpu_count() or 1  # Number of processes walking repos in parallel
+
+    def process_args(self) -> None:
+        check_languages(self.languages)
+
+
+def main():
+    args = FilterArgs(underscores_to_dashes=True).parse_args()
+    filter_dataset(args.destination_dir, args.languages, args.max_file_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
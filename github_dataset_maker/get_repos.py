@@ -1,135 +1,301 @@
 from __future__ import annotations
 
-import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, Literal, Tuple, TypedDict
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Literal, Optional, Tuple, TypedDict
 
-from dotenv import load_dotenv
-from github import Github
-from github.Repository import Repository
 from tap import Tap as TypedArgumentParser
 
-from . import utils
-from .rate_limit import check_rate_limit, wait_on_rate_limits
-from .supported_languages import programming_languages
+from . import client, harvest, utils
+from .filter_files import LanguageMatcher
+from .http_cache import DEFAULT_MAX_SIZE, ResponseCache
+from .journal import Journal
+from .metrics import METRICS, progress, save_outputs
+from .planner import DateField, QueryPlanner, probe_total_count
+from .supported_languages import popular_languages, programming_languages
 
-load_dotenv()
-API_TOKEN = os.environ["GITHUB_API_TOKEN"]
+if TYPE_CHECKING:
+    from .catalog import Catalog
 
 
 class ArgParser(TypedArgumentParser):
     stars: Tuple[int, int]  # range of stars of repositories to be included in the dataset
-    lang: str  # programming language
-    output: str = "" # filename to be used on the .json and .txt files
-    step: int  # size of step in range of stars
-    mode: Literal["exact", "greater-than", "ranged"]  # Search operator for the stars parameter of the query
+    lang: List[str] = []  # programming languages, all their queries share one queue and rate limit budget
+    all_popular: bool = False  # harvest every language of supported_languages.popular_languages
+    output: str = "" # filename to be used on the .json and .txt files (prefixed with the language when several are harvested)
+    step: int = 0  # size of step in range of stars (ignored by the auto mode)
+    mode: Literal["auto", "exact", "greater-than", "ranged"] = "auto"  # Search operator for the stars parameter ("auto" plans queries under the 1000-result cap)
+    date_field: DateField = "created"  # Date qualifier the auto mode uses to slice overly dense star values
+    concurrency: int = 1  # number of parallel search requests
+    pool_size: Optional[int] = None  # number of kept-alive HTTP connections (defaults to --concurrency)
+    http2: bool = False  # use HTTP/2 if httpx and h2 are installed
+    tokens_file: Optional[Path] = None  # file with one API token per line, requests are spread over all of them
+    journal: Optional[Path] = None  # SQLite file recording progress, rerun with the same file to resume
+    catalog: Optional[Path] = None  # upsert repos into this Parquet catalog instead of writing .csv/.txt files
+    http_cache: Optional[Path] = None  # SQLite file of responses revalidated with ETags, reuse it across harvests
+    http_cache_size: int = DEFAULT_MAX_SIZE  # bytes of cached responses kept, least recently used are evicted
+    metrics: Optional[Path] = None  # save counters and latency histograms here (.prom for Prometheus, else JSON)
+    trace: Optional[Path] = None  # save per-stage spans here in Chrome trace format (chrome://tracing, Perfetto)
 
     def process_args(self):
-        if self.lang not in programming_languages:
-            msg = f"{self.lang} is not a supported programming language"
-            raise ValueError(msg)
-        if self.output == "":
-            if len(self.stars) == 2:
-                self.output = f"{self.lang}_{self.stars[0]}-{self.stars[1]}"
-            elif len(self.stars) == 1:
-                self.output = f"{self.lang}_{self.stars[0]}"
+        if self.all_popular:
+            self.lang = [*self.lang, *sorted(popular_languages)]
+        self.lang = list(dict.fromkeys(self.lang))
+        if not self.lang:
+            raise ValueError("Pass --lang or --all-popular.")
+        for lang in self.lang:
+            if lang not in programming_languages:
+                msg = f"{lang} is not a supported programming language"
+                raise ValueError(msg)
+            if not any(LanguageMatcher.for_languages([lang])):
+                print(f"Warning: no extension, filename or interpreter is known for {lang},",
+                      "its files cannot be told apart after cloning.")
+
+    def outputs(self) -> dict[str, str]:
+        """Filename of the .csv and .txt files of each language."""
+        if self.output and len(self.lang) == 1:
+            return {self.lang[0]: self.output}
+        suffix = self.output or "-".join(map(str, self.stars))
+        return {lang: f"{lang}_{suffix}" for lang in self.lang}
 
 
 class RepoInfo(TypedDict):
     url: str
     stars: int
+    size: Optional[int]  # in KB, lets clone_repos skip and order repos by size
 
 
-def get_repo_info(repo: Repository) -> RepoInfo:
-    print(f"{repo.name:<35}", f"{repo.stargazers_count:>15}", end="\r", flush=True)
-    return {"url": repo.html_url, "stars": repo.stargazers_count}
+def stars_query(stars: int, lang: str, bigger_than: bool = False) -> str:
+    if bigger_than:
+        return f"stars:>{stars} language:{lang}"
+    return f"stars:{stars} language:{lang}"
 
 
-@wait_on_rate_limits
-def grab_repos_by_stars(stars: int, lang: str, bigger_than: bool = False) -> Iterable[Repository]:
-    print(f"Getting repos with {stars} stars.")
-    pygithub = Github(API_TOKEN)
-    query = f"stars:{stars} language:{lang}"
-    if bigger_than:
-        query = f"stars:>{stars} language:{lang}"
-    results = pygithub.search_repositories(
-        query=query,
-        sort="stars",
-        order="desc",
-    )
-    return results
-
-
-@wait_on_rate_limits
-def grab_repos_by_stars_range(stars: tuple[int, int], lang: str) -> Iterable[Repository]:
-    print(f"Getting repos within {stars} stars.")
-    pygithub = Github(API_TOKEN)
-    query = f"stars:{stars[0]}..{stars[1]} language:{lang}"
-    results = pygithub.search_repositories(
-        query=query,
-        sort="stars",
-        order="desc",
-    )
-    return results
+def stars_range_query(stars: tuple[int, int], lang: str) -> str:
+    return f"stars:{stars[0]}..{stars[1]} language:{lang}"
 
 
-def save(repos: list[RepoInfo], filename: str):
-    """Save objects on a CSV file and save URLs on a TXT file."""
-    print(f"Saving {len(repos)} repos to '{filename}'.")
-    utils.export_to_csv(repos, Path(f"{filename}.csv"))
-    utils.save_multiline_txt(
-        f"{filename}.txt",
-        [repo["url"] for repo in repos],
-        append=True,
-    )
+def output_paths(filename: str) -> tuple[Path, Path]:
+    return Path(f"{filename}.csv"), Path(f"{filename}.txt")
 
 
-def assemble_repo_info_and_save(repos: Iterable[Repository], filename: str):
-    repo_info = []
-    for i, repo in enumerate(repos):
-        repo_info.append(get_repo_info(repo))
-        if i % 30 == 0:
-            check_rate_limit()
-            # time.sleep(1)
-    save(repo_info, filename)
+def save(repos: Iterable[RepoInfo], filename: str) -> int:
+    """Stream objects to a CSV file and URLs to a TXT file, return how many were saved."""
+    count = 0
+    csv_path, txt_path = output_paths(filename)
+    with utils.CsvWriter(csv_path, list(RepoInfo.__annotations__)) as csv_writer:
+        with utils.LineWriter(txt_path) as txt_writer:
+            for repo in repos:
+                csv_writer.write(repo)
+                txt_writer.write(repo["url"])
+                count += 1
+    print(f"Saved {count} repos to '{filename}'.")
+    return count
 
 
-def extract_and_save(
+def plan_queries(
     stars: tuple[int, int],
     language: str,
     filename: str,
     step: int,
-    mode: Literal["exact", "greater-than", "ranged"],
-):
+    mode: Literal["auto", "exact", "greater-than", "ranged"],
+    date_field: DateField = "created",
+    probe: Callable[[str], int] = probe_total_count,
+) -> list[tuple[str, str]]:
+    """List (search query, output filename) pairs for a choice of step and mode."""
+    # as few queries as possible covering every repo within the range of stars
+    if mode == "auto":
+        planner = QueryPlanner(language, date_field=date_field, probe=probe)
+        buckets = planner.plan(stars)
+        print(f"Planned {len(buckets)} {language} queries with {planner.probes} probes.")
+        return [(bucket.query(language), bucket.filename(language)) for bucket in buckets]
     # repos with exact number of stars
     if step == 0 and mode == "exact":
-        results = grab_repos_by_stars(stars[0], language)
-        assemble_repo_info_and_save(results, filename)
+        return [(stars_query(stars[0], language), filename)]
     # iterate over range of stars, repos with exact number of stars
     elif step == 1 and mode == "exact":
-        for star_num in range(stars[0], stars[1]):
-            results = grab_repos_by_stars(star_num, language)
-            assemble_repo_info_and_save(results, f"{language}_{star_num}")
+        return [
+            (stars_query(star_num, language), f"{language}_{star_num}")
+            for star_num in range(stars[0], stars[1])
+        ]
     # iterate over range of stars, repos within a range of stars
     elif step > 1 and mode == "ranged":
-        for star_num in range(stars[0], stars[1], step):
-            results = grab_repos_by_stars_range((star_num, star_num + step), language)
-            assemble_repo_info_and_save(results, f"{language}_{star_num}-{star_num + step}")
+        return [
+            (
+                stars_range_query((star_num, star_num + step - 1), language),
+                f"{language}_{star_num}-{star_num + step - 1}",
+            )
+            for star_num in range(stars[0], stars[1], step)
+        ]
     # bigger than a number of stars "step == 0 mode=greater-than"
     elif step == 0 and mode == "greater-than":
-        results = grab_repos_by_stars(stars[0], language, bigger_than=True)
-        assemble_repo_info_and_save(results, filename)
+        return [(stars_query(stars[0], language, bigger_than=True), filename)]
     # repos within a range of stars "step == 0 mode=ranged"
     elif step == 0 and mode == "ranged":
-        results = grab_repos_by_stars_range(stars, language)
-        assemble_repo_info_and_save(results, f"{language}_{stars[0]}-{stars[1]}")
+        return [(stars_range_query(stars, language), f"{language}_{stars[0]}-{stars[1]}")]
     else:
         raise ValueError(f"Bad choice of step={step!r} and mode={mode!r}.")
 
 
+def repo_info_from_item(item: dict[str, Any]) -> RepoInfo:
+    return {"url": item["html_url"], "stars": item["stargazers_count"], "size": item.get("size")}
+
+
+def count_repos(items: Iterable[dict[str, Any]], language: str) -> Iterator[dict[str, Any]]:
+    for item in items:
+        METRICS.inc("repos_total", language=language)
+        yield item
+
+
+def harvest_and_save(
+    queries: list[tuple[str, str, str]],
+    concurrency: int = 1,
+    journal: Optional[Journal] = None,
+    repo_catalog: Optional[Catalog] = None,
+):
+    """Save the results of each (query, filename, language) to its file, or to repo_catalog if given."""
+    pending = [
+        (query, output, language)
+        for query, output, language in queries
+        if journal is None or not journal.is_saved(query)
+    ]
+    if len(pending) < len(queries):
+        print(f"Resuming: {len(queries) - len(pending)} of {len(queries)} queries already saved.")
+    filenames = {query: output for query, output, _ in pending}
+    languages = {query: language for query, _, language in pending}
+    for query, items in harvest.harvest(filenames, concurrency, journal):
+        print(f"Getting repos for {query!r}.")
+        items = count_repos(items, languages[query])
+        with METRICS.stage("query", query=query):
+            if repo_catalog is None:
+                if journal is not None:
+                    # rows of an earlier attempt that failed midway would be appended twice
+                    offsets = journal.file_offsets(query, output_paths(filenames[query]))
+                    for path, size in offsets.items():
+                        utils.truncate(path, size)
+                save(map(repo_info_from_item, items), filenames[query])
+            else:
+                from .catalog import record_from_item
+
+                repo_catalog.upsert(record_from_item(item, languages[query]) for item in items)
+                repo_catalog.flush()  # before the journal records the query as saved
+        if journal is not None:
+            journal.mark_saved(query, filenames[query])
+
+
+def interleave(plans: Iterable[list[tuple[str, str, str]]]) -> list[tuple[str, str, str]]:
+    """Take one query of each plan in turn, so every language keeps the harvest's workers busy."""
+    return [query for queries in itertools.zip_longest(*plans) for query in queries if query is not None]
+
+
+def extract_and_save_languages(
+    stars: tuple[int, int],
+    filenames: dict[str, str],
+    step: int,
+    mode: Literal["auto", "exact", "greater-than", "ranged"],
+    concurrency: int = 1,
+    date_field: DateField = "created",
+    journal_path: Optional[Path] = None,
+    catalog_path: Optional[Path] = None,
+):
+    """
+    Harvest several languages, each saved to its own filename, through one queue of queries.
+
+    Languages are planned in parallel and their queries interleaved, so the
+    concurrent requests and the rate limit budget of the shared client are
+    spread over all of them instead of running one harvest per language.
+    """
+    repo_catalog = None
+    if catalog_path is not None:
+        from .catalog import Catalog  # pyarrow is only loaded for --catalog
+
+        repo_catalog = Catalog(catalog_path)
+    journal = Journal(journal_path) if journal_path is not None else None
+
+    def plan(language: str) -> list[tuple[str, str, str]]:
+        filename = filenames[language]
+        with METRICS.stage("plan", language=language):
+            if journal is None:
+                queries = plan_queries(stars, language, filename, step, mode, date_field)
+            else:
+                # the plan is stored too: probes cost API calls and date slices depend on the day
+                key = (
+                    f"{language} stars={stars[0]}-{stars[1]} step={step} mode={mode}"
+                    f" date_field={date_field} output={filename}"
+                )
+                queries = journal.plan(
+                    key,
+                    lambda: plan_queries(
+                        stars,
+                        language,
+                        filename,
+                        step,
+                        mode,
+                        date_field,
+                        journal.cached_probe(probe_total_count),
+                    ),
+                )
+        return [(query, output, language) for query, output in queries]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(filenames)))) as executor:
+            plans = list(executor.map(plan, filenames))
+        harvest_and_save(interleave(plans), concurrency, journal, repo_catalog)
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def extract_and_save(
+    stars: tuple[int, int],
+    language: str,
+    filename: str,
+    step: int,
+    mode: Literal["auto", "exact", "greater-than", "ranged"],
+    concurrency: int = 1,
+    date_field: DateField = "created",
+    journal_path: Optional[Path] = None,
+    catalog_path: Optional[Path] = None,
+):
+    extract_and_save_languages(
+        stars, {language: filename}, step, mode, concurrency, date_field, journal_path, catalog_path
+    )
+
+
+def harvest_progress() -> str:
+    return (
+        f"{METRICS.value('repos_total'):.0f} repos from {METRICS.value('pages_total'):.0f} pages,"
+        f" {METRICS.value('requests_total'):.0f} requests,"
+        f" {METRICS.value('rate_limit_sleep_seconds_total'):.0f}s waiting on rate limits"
+    )
+
+
 def main():
     args = ArgParser(underscores_to_dashes=True).parse_args()
-    extract_and_save(args.stars, args.lang, args.output, args.step, args.mode)
+    if args.trace is not None:
+        METRICS.enable_tracing()
+    client.configure(
+        tokens_file=args.tokens_file,  # read on the first request, a journaled rerun may need none
+        pool_size=args.pool_size or args.concurrency,
+        http2=args.http2,
+        cache=ResponseCache(args.http_cache, args.http_cache_size) if args.http_cache else None,
+    )
+    with progress(harvest_progress):
+        extract_and_save_languages(
+            args.stars,
+            args.outputs(),
+            args.step,
+            args.mode,
+            args.concurrency,
+            args.date_field,
+            args.journal,
+            args.catalog,
+        )
+    cache = client.get_client().cache
+    if cache is not None:
+        print(f"{cache.hits} of {cache.hits + cache.misses} responses were unchanged since the cached harvest (304).")
+    save_outputs(args.metrics, args.trace)
 
 
 if __name__ == "__main__":
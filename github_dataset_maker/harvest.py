@@ -0,0 +1,88 @@
+"""
+Fetch search results for many queries concurrently.
+
+Every query is requested with per_page=100 and all of its pages, as well as
+the first pages of the following queries, are fetched from a bounded thread
+pool instead of walking a PaginatedList one 30-item page at a time.
+
+All requests go through the shared client, so GITHUB_API_URL can point the
+harvester at a local mock of the search API.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Iterable, Iterator, Optional, Tuple
+
+from .client import MAX_PER_PAGE, get_client
+from .journal import Journal
+from .metrics import METRICS
+
+MAX_SEARCH_RESULTS = 1000  # the search API never returns more than this per query
+
+
+def search_repositories_page(query: str, page: int, per_page: int = MAX_PER_PAGE) -> dict[str, Any]:
+    return get_client().search_repositories(query, page, per_page)
+
+
+def fetch_page(query: str, page: int, journal: Optional[Journal] = None) -> dict[str, Any]:
+    """Return a page from the journal, or fetch it and record it there."""
+    if journal is not None:
+        data = journal.get_page(query, page)
+        if data is not None:
+            METRICS.inc("pages_total", source="journal")
+            return data
+    data = search_repositories_page(query, page)
+    METRICS.inc("pages_total", source="api")
+    if journal is not None:
+        journal.put_page(query, page, data)
+    return data
+
+
+def count_pages(total_count: int, per_page: int = MAX_PER_PAGE) -> int:
+    return math.ceil(min(total_count, MAX_SEARCH_RESULTS) / per_page)
+
+
+def harvest(
+    queries: Iterable[str],
+    concurrency: int,
+    journal: Optional[Journal] = None,
+) -> Iterator[Tuple[str, Iterator[dict[str, Any]]]]:
+    """
+    Yield (query, items) for each query, in order.
+
+    Items are streamed page by page and must be consumed before moving on.
+
+    At most `concurrency` requests are in flight; first pages of upcoming
+    queries are prefetched while the remaining pages of earlier ones load.
+    Pages found in the journal are not requested again.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be positive, got {concurrency}.")
+    queries = iter(queries)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: Deque[Tuple[str, Future]] = deque()
+
+        def submit_next_query():
+            query = next(queries, None)
+            if query is not None:
+                pending.append((query, executor.submit(fetch_page, query, 1, journal)))
+
+        for _ in range(concurrency):
+            submit_next_query()
+        while pending:
+            query, first_page = pending.popleft()
+            data = first_page.result()
+            other_pages = [
+                executor.submit(fetch_page, query, page, journal)
+                for page in range(2, count_pages(data["total_count"]) + 1)
+            ]
+            submit_next_query()
+            yield query, iter_items(data, other_pages)
+
+
+def iter_items(first_page: dict[str, Any], other_pages: list[Future]) -> Iterator[dict[str, Any]]:
+    yield from first_page["items"]
+    for future in other_pages:
+        yield from future.result()["items"]
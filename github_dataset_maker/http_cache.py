@@ -0,0 +1,96 @@
+"""
+On-disk cache of API responses, revalidated with ETags across harvests.
+
+Responses carrying an ETag are kept in a SQLite file keyed by request URL.
+The next GET of the same URL sends If-None-Match, and an unchanged resource
+comes back as an empty 304 that GitHub does not count against the rate
+limit, so a weekly re-harvest only pays for the pages that changed. Bodies
+are stored zlib-compressed and the least recently used ones are evicted once
+the cache grows past max_size bytes.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+from urllib.parse import urlencode
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024  # bytes of compressed bodies
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY, etag TEXT, body BLOB, size INTEGER, used REAL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+"""
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def cache_key(url: str, params: Optional[dict[str, Any]] = None) -> str:
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+class ResponseCache:
+    def __init__(self, path: Path | str, max_size: int = DEFAULT_MAX_SIZE):
+        # shared by the harvester's worker threads
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.max_size = max_size
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = self.misses = 0  # responses revalidated (304) and fetched in full
+
+    def __enter__(self) -> ResponseCache:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self.connection.execute("SELECT etag, body FROM responses WHERE url = ?", (key,)).fetchone()
+        return None if row is None else CachedResponse(row[0], zlib.decompress(row[1]))
+
+    def touch(self, key: str) -> None:
+        """Record that the cached response of key was still valid (a 304)."""
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE responses SET used = ? WHERE url = ?", (time.time(), key))
+            self.hits += 1
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        compressed = zlib.compress(body)
+        with self._lock, self.connection:
+            self.misses += 1
+            row = self.connection.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, etag, compressed, len(compressed), time.time()),
+            )
+            self.size += len(compressed) - (row[0] if row else 0)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the least recently used responses until the cache fits in max_size."""
+        if self.size <= self.max_size:
+            return
+        rows = self.connection.execute("SELECT url, size FROM responses ORDER BY used")
+        evicted = []
+        for url, size in rows:
+            if self.size <= self.max_size:
+                break
+            evicted.append((url,))
+            self.size -= size
+        self.connection.executemany("DELETE FROM responses WHERE url = ?", evicted)
@@ -0,0 +1,125 @@
+"""
+Durable record of a harvest, so an interrupted run resumes where it stopped.
+
+A SQLite file keeps the planned queries, the result counts probed while
+planning, every fetched page and which queries were saved to disk. Nothing
+found in the journal is requested from the API again. The size of each output
+file is recorded before a query starts writing to it, so rows left behind by
+a query that did not finish are truncated away when it is saved again.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+# fields of search results kept in the journal, the rest of each item is dropped
+ITEM_FIELDS = (
+    "id",
+    "name",
+    "full_name",
+    "html_url",
+    "stargazers_count",
+    "size",
+    "language",
+    "fork",
+    "archived",
+    "default_branch",
+    "created_at",
+    "pushed_at",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    key TEXT, position INTEGER, query TEXT, filename TEXT, PRIMARY KEY (key, position)
+);
+CREATE TABLE IF NOT EXISTS probes (query TEXT PRIMARY KEY, total_count INTEGER);
+CREATE TABLE IF NOT EXISTS pages (query TEXT, page INTEGER, data TEXT, PRIMARY KEY (query, page));
+CREATE TABLE IF NOT EXISTS saved (query TEXT PRIMARY KEY, filename TEXT);
+CREATE TABLE IF NOT EXISTS offsets (query TEXT, path TEXT, size INTEGER, PRIMARY KEY (query, path));
+"""
+
+
+class Journal:
+    def __init__(self, path: Path | str):
+        # pages are read and written from the harvester's worker threads
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    def _fetchone(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self.connection.execute(sql, params).fetchone()
+
+    def _write(self, sql: str, params: tuple) -> None:
+        with self._lock, self.connection:
+            self.connection.execute(sql, params)
+
+    def plan(self, key: str, make_plan: Callable[[], list[tuple[str, str]]]) -> list[tuple[str, str]]:
+        """Return the (query, filename) plan stored under key, making and storing it if missing."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT query, filename FROM plans WHERE key = ? ORDER BY position", (key,)
+            ).fetchall()
+        if rows:
+            return [(query, filename) for query, filename in rows]
+        queries = make_plan()
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO plans VALUES (?, ?, ?, ?)",
+                [(key, i, query, filename) for i, (query, filename) in enumerate(queries)],
+            )
+        return queries
+
+    def cached_probe(self, probe: Callable[[str], int]) -> Callable[[str], int]:
+        def journaled_probe(query: str) -> int:
+            row = self._fetchone("SELECT total_count FROM probes WHERE query = ?", (query,))
+            if row is not None:
+                return row[0]
+            total_count = probe(query)
+            self._write("INSERT OR REPLACE INTO probes VALUES (?, ?)", (query, total_count))
+            return total_count
+        return journaled_probe
+
+    def get_page(self, query: str, page: int) -> Optional[dict[str, Any]]:
+        row = self._fetchone("SELECT data FROM pages WHERE query = ? AND page = ?", (query, page))
+        return None if row is None else json.loads(row[0])
+
+    def put_page(self, query: str, page: int, data: dict[str, Any]) -> None:
+        slim = {
+            "total_count": data["total_count"],
+            "items": [{k: item.get(k) for k in ITEM_FIELDS} for item in data["items"]],
+        }
+        self._write("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", (query, page, json.dumps(slim)))
+
+    def is_saved(self, query: str) -> bool:
+        return self._fetchone("SELECT 1 FROM saved WHERE query = ?", (query,)) is not None
+
+    def mark_saved(self, query: str, filename: str) -> None:
+        self._write("INSERT OR REPLACE INTO saved VALUES (?, ?)", (query, filename))
+
+    def file_offsets(self, query: str, paths: Sequence[Path]) -> dict[Path, int]:
+        """Return the sizes paths had when query first started saving, recording them on the first call."""
+        with self._lock, self.connection:
+            rows = self.connection.execute("SELECT path, size FROM offsets WHERE query = ?", (query,)).fetchall()
+            if rows:
+                return {Path(path): size for path, size in rows}
+            offsets = {path: os.path.getsize(path) if path.exists() else 0 for path in paths}
+            self.connection.executemany(
+                "INSERT INTO offsets VALUES (?, ?, ?)",
+                [(query, str(path), size) for path, size in offsets.items()],
+            )
+        return offsets
@@ -0,0 +1,1134 @@
+# Generated by python -m github_dataset_maker.build_language_index from:
+#   programming-languages/programming_languages/programming-languages.json
+#   identify 2.6.20
+#   linguist-0.1.1/linguist/libs/languages.yml
+# Do not edit by hand.
+"""
+Languages of supported_languages by file extension, filename and shebang interpreter.
+
+Values list every candidate language, the most likely first.
+"""
+
+EXTENSIONS: dict[str, tuple[str, ...]] = {
+    '.4dm': ('4d',),
+    '.4th': ('forth',),
+    '.6pl': ('raku',),
+    '.6pm': ('raku',),
+    '.8xp': ('ti program',),
+    '.8xp.txt': ('ti program',),
+    '._coffee': ('coffeescript',),
+    '._js': ('javascript',),
+    '._ls': ('livescript',),
+    '.a51': ('assembly',),
+    '.abap': ('abap',),
+    '.ada': ('ada',),
+    '.adb': ('ada',),
+    '.ado': ('stata',),
+    '.adoc': ('asciidoc',),
+    '.adp': ('tcl',),
+    '.ads': ('ada',),
+    '.agc': ('apollo guidance computer',),
+    '.agda': ('agda',),
+    '.ahk': ('autohotkey',),
+    '.ahkl': ('autohotkey',),
+    '.aidl': ('aidl',),
+    '.aj': ('aspectj',),
+    '.al': ('perl', 'al',),
+    '.als': ('alloy',),
+    '.ampl': ('ampl',),
+    '.angelscript': ('angelscript',),
+    '.apacheconf': ('apacheconf',),
+    '.apex': ('apex',),
+    '.apl': ('apl',),
+    '.app': ('erlang',),
+    '.app.src': ('erlang',),
+    '.applescript': ('applescript',),
+    '.arc': ('arc',),
+    '.as': ('actionscript', 'angelscript',),
+    '.asax': ('asp.net',),
+    '.asc': ('ags script',),
+    '.asciidoc': ('asciidoc',),
+    '.ascx': ('asp.net',),
+    '.asd': ('common lisp',),
+    '.asddls': ('abap cds',),
+    '.ash': ('ags script',),
+    '.ashx': ('asp.net',),
+    '.asl': ('asl',),
+    '.asm': ('assembly', 'motorola 68k assembly',),
+    '.asmx': ('asp.net',),
+    '.asp': ('classic asp',),
+    '.aspx': ('asp.net',),
+    '.astro': ('astro',),
+    '.asy': ('asymptote',),
+    '.au3': ('autoit',),
+    '.aug': ('augeas',),
+    '.auk': ('awk',),
+    '.aux': ('tex',),
+    '.aw': ('php',),
+    '.awk': ('awk',),
+    '.axd': ('asp.net',),
+    '.axi': ('netlinx',),
+    '.axi.erb': ('netlinx+erb',),
+    '.axml': ('xml',),
+    '.axs': ('netlinx',),
+    '.axs.erb': ('netlinx+erb',),
+    '.b': ('brainfuck', 'limbo',),
+    '.bal': ('ballerina',),
+    '.bas': ('basic', 'freebasic', 'vba',),
+    '.bash': ('shell',),
+    '.bat': ('batchfile',),
+    '.bats': ('shell',),
+    '.bb': ('bitbake', 'blitzbasic', 'clojure',),
+    '.bbappend': ('bitbake',),
+    '.bbclass': ('bitbake',),
+    '.bdy': ('plsql',),
+    '.befunge': ('befunge',),
+    '.bf': ('brainfuck', 'beef', 'befunge', 'hyphy',),
+    '.bi': ('freebasic',),
+    '.bib': ('tex',),
+    '.bicep': ('bicep',),
+    '.bicepparam': ('bicep',),
+    '.bison': ('bison',),
+    '.bmx': ('blitzmax',),
+    '.bones': ('javascript',),
+    '.boo': ('boo',),
+    '.boot': ('clojure',),
+    '.bpl': ('boogie',),
+    '.bro': ('zeek',),
+    '.brs': ('brightscript',),
+    '.bsl': ('1c enterprise',),
+    '.bsv': ('bluespec',),
+    '.builder': ('ruby',),
+    '.bzl': ('starlark',),
+    '.c': ('c', 'c++',),
+    '.c++': ('c++',),
+    '.c++m': ('c++',),
+    '.c++objdump': ('cpp-objdump',),
+    '.c-objdump': ('c-objdump',),
+    '.cake': ('c#', 'coffeescript',),
+    '.capnp': ("cap'n proto",),
+    '.cats': ('c',),
+    '.cbl': ('cobol',),
+    '.cc': ('c++',),
+    '.ccm': ('c++',),
+    '.ccp': ('cobol',),
+    '.ccxml': ('xml',),
+    '.ceylon': ('ceylon',),
+    '.cfc': ('coldfusion cfc', 'coldfusion',),
+    '.cfm': ('coldfusion',),
+    '.cfml': ('coldfusion',),
+    '.cgi': ('perl', 'python', 'shell',),
+    '.cginc': ('hlsl',),
+    '.ch': ('charity', 'xbase',),
+    '.chpl': ('chapel',),
+    '.chs': ('c2hs haskell',),
+    '.cirru': ('cirru',),
+    '.cjs': ('javascript',),
+    '.cjsx': ('coffeescript',),
+    '.ck': ('chuck',),
+    '.cl': ('common lisp', 'opencl', 'cool',),
+    '.cl2': ('clojure',),
+    '.click': ('click',),
+    '.clixml': ('xml',),
+    '.clj': ('clojure',),
+    '.cljc': ('clojure',),
+    '.cljs': ('clojure',),
+    '.cljs.hl': ('clojure',),
+    '.cljscm': ('clojure',),
+    '.cljx': ('clojure',),
+    '.clp': ('clips',),
+    '.cls': ('apex', 'objectscript', 'openedge abl', 'vba',),
+    '.clw': ('clarion',),
+    '.cmake': ('cmake',),
+    '.cmake.in': ('cmake',),
+    '.cmd': ('batchfile',),
+    '.cnc': ('g-code',),
+    '.cob': ('cobol',),
+    '.cobol': ('cobol',),
+    '.cocci': ('smpl',),
+    '.coffee': ('coffeescript',),
+    '.coffee.md': ('literate coffeescript',),
+    '.com': ('digital command language',),
+    '.command': ('shell',),
+    '.containerfile': ('dockerfile',),
+    '.coq': ('coq',),
+    '.cp': ('c++', 'component pascal',),
+    '.cpp': ('c++',),
+    '.cppm': ('c++',),
+    '.cppobjdump': ('cpp-objdump',),
+    '.cproject': ('xml',),
+    '.cps': ('component pascal',),
+    '.cpy': ('cobol',),
+    '.cr': ('crystal',),
+    '.cs': ('c#', 'smalltalk',),
+    '.cs.pp': ('c#',),
+    '.csd': ('csound document',),
+    '.csh': ('shell', 'tcsh',),
+    '.cson': ('coffeescript', 'cson',),
+    '.csproj': ('xml',),
+    '.css': ('css',),
+    '.csv': ('csv',),
+    '.csx': ('c#',),
+    '.ctp': ('php',),
+    '.cts': ('typescript',),
+    '.cu': ('cuda',),
+    '.cue': ('cue',),
+    '.cuh': ('cuda',),
+    '.cw': ('redcode',),
+    '.cwl': ('common workflow language',),
+    '.cxx': ('c++',),
+    '.cxx-objdump': ('cpp-objdump',),
+    '.cxxm': ('c++',),
+    '.cy': ('cycript',),
+    '.d': ('d', 'dtrace', 'makefile',),
+    '.d-objdump': ('d-objdump',),
+    '.darcspatch': ('darcs patch',),
+    '.dart': ('dart',),
+    '.dats': ('ats',),
+    '.db2': ('sqlpl',),
+    '.dcl': ('clean',),
+    '.ddl': ('plsql',),
+    '.decls': ('blitzbasic',),
+    '.dfm': ('pascal',),
+    '.dfy': ('dafny',),
+    '.dhall': ('dhall',),
+    '.di': ('d',),
+    '.diff': ('diff',),
+    '.dita': ('xml',),
+    '.ditamap': ('xml',),
+    '.ditaval': ('xml',),
+    '.djs': ('dogescript',),
+    '.dlm': ('idl',),
+    '.dm': ('dm',),
+    '.do': ('stata',),
+    '.dockerfile': ('dockerfile',),
+    '.doh': ('stata',),
+    '.dpatch': ('darcs patch',),
+    '.dpr': ('pascal',),
+    '.druby': ('mirah',),
+    '.dsl': ('asl',),
+    '.dsp': ('faust',),
+    '.dtx': ('tex',),
+    '.duby': ('mirah',),
+    '.dwl': ('dataweave',),
+    '.dyalog': ('apl',),
+    '.dyl': ('dylan',),
+    '.dylan': ('dylan',),
+    '.e': ('eiffel', 'e',),
+    '.ebuild': ('gentoo ebuild',),
+    '.ec': ('ec',),
+    '.ecl': ('ecl', 'eclipse',),
+    '.eclass': ('gentoo eclass',),
+    '.eclxml': ('ecl',),
+    '.edn': ('edn', 'clojure',),
+    '.eh': ('ec',),
+    '.ejs': ('ejs',),
+    '.ejson': ('json',),
+    '.el': ('emacs lisp',),
+    '.eliom': ('ocaml',),
+    '.eliomi': ('ocaml',),
+    '.elm': ('elm',),
+    '.em': ('emberscript',),
+    '.emacs': ('emacs lisp',),
+    '.emacs.desktop': ('emacs lisp',),
+    '.emberscript': ('emberscript',),
+    '.epj': ('ecere projects',),
+    '.eq': ('eq',),
+    '.erb': ('html+erb',),
+    '.erb.deface': ('html+erb',),
+    '.erl': ('erlang',),
+    '.es': ('javascript', 'erlang',),
+    '.es6': ('javascript',),
+    '.escript': ('erlang',),
+    '.ex': ('elixir',),
+    '.exs': ('elixir',),
+    '.eyaml': ('yaml',),
+    '.eye': ('ruby',),
+    '.f': ('fortran', 'filebench wml', 'forth',),
+    '.f03': ('fortran', 'fortran free form',),
+    '.f08': ('fortran', 'fortran free form',),
+    '.f77': ('fortran',),
+    '.f90': ('fortran', 'fortran free form',),
+    '.f95': ('fortran', 'fortran free form',),
+    '.factor': ('factor',),
+    '.fan': ('fantom',),
+    '.fancypack': ('fancy',),
+    '.fcgi': ('perl', 'php', 'python', 'ruby', 'shell', 'lua',),
+    '.feature': ('gherkin',),
+    '.fish': ('fish',),
+    '.flex': ('jflex',),
+    '.flux': ('flux',),
+    '.fnc': ('plsql',),
+    '.fnl': ('fennel',),
+    '.for': ('fortran', 'forth',),
+    '.forth': ('forth',),
+    '.fp': ('glsl',),
+    '.fpp': ('fortran',),
+    '.fr': ('forth', 'frege',),
+    '.frag': ('javascript', 'glsl',),
+    '.frg': ('glsl',),
+    '.frm': ('vba',),
+    '.frt': ('forth',),
+    '.fs': ('f#', 'filterscript', 'forth', 'glsl',),
+    '.fsh': ('glsl',),
+    '.fshader': ('glsl',),
+    '.fsi': ('f#',),
+    '.fsproj': ('xml',),
+    '.fst': ('f*',),
+    '.fsti': ('f*',),
+    '.fsx': ('f#',),
+    '.fth': ('forth',),
+    '.ftl': ('fluent', 'freemarker',),
+    '.ftlh': ('freemarker',),
+    '.fun': ('standard ml',),
+    '.fut': ('futhark',),
+    '.fx': ('flux', 'hlsl',),
+    '.fxh': ('hlsl',),
+    '.fy': ('fancy',),
+    '.g': ('g-code', 'gap',),
+    '.g4': ('antlr',),
+    '.gaml': ('gaml',),
+    '.gap': ('gap',),
+    '.gawk': ('awk',),
+    '.gco': ('g-code',),
+    '.gcode': ('g-code',),
+    '.gd': ('gdscript', 'gap',),
+    '.gdb': ('gdb',),
+    '.gdbinit': ('gdb',),
+    '.gemspec': ('ruby',),
+    '.geo': ('glsl',),
+    '.geojson': ('json',),
+    '.geom': ('glsl',),
+    '.gf': ('grammatical framework',),
+    '.gi': ('gap',),
+    '.glade': ('xml',),
+    '.glf': ('glyph',),
+    '.glsl': ('glsl',),
+    '.glslf': ('glsl',),
+    '.glslv': ('glsl',),
+    '.gml': ('game maker language',),
+    '.gms': ('gams',),
+    '.gnu': ('gnuplot',),
+    '.gnuplot': ('gnuplot',),
+    '.go': ('go',),
+    '.god': ('ruby',),
+    '.golo': ('golo',),
+    '.gp': ('gnuplot',),
+    '.gpx': ('xml',),
+    '.grace': ('grace',),
+    '.gradle': ('groovy',),
+    '.graphql': ('graphql',),
+    '.groovy': ('groovy',),
+    '.grt': ('groovy',),
+    '.grxml': ('xml',),
+    '.gs': ('javascript', 'gosu', 'genie', 'glsl',),
+    '.gshader': ('glsl',),
+    '.gst': ('gosu',),
+    '.gsx': ('gosu',),
+    '.gtpl': ('groovy',),
+    '.gvy': ('groovy',),
+    '.gyp': ('python',),
+    '.gypi': ('python',),
+    '.h': ('c', 'c++', 'objective-c',),
+    '.h++': ('c++',),
+    '.h.in': ('c',),
+    '.hack': ('hack',),
+    '.haml': ('haml',),
+    '.haml.deface': ('haml',),
+    '.handlebars': ('handlebars',),
+    '.hats': ('ats',),
+    '.hb': ('harbour',),
+    '.hbs': ('handlebars',),
+    '.hc': ('holyc',),
+    '.hcl': ('hcl',),
+    '.hh': ('c++', 'hack',),
+    '.hhi': ('hack',),
+    '.hic': ('clojure',),
+    '.hlean': ('lean',),
+    '.hlsl': ('hlsl',),
+    '.hlsli': ('hlsl',),
+    '.hpp': ('c++',),
+    '.hqf': ('sqf',),
+    '.hql': ('hiveql',),
+    '.hrl': ('erlang',),
+    '.hs': ('haskell',),
+    '.hs-boot': ('haskell',),
+    '.hsc': ('haskell',),
+    '.htm': ('html',),
+    '.html': ('html',),
+    '.html.erb': ('html+erb',),
+    '.html.erb.deface': ('html+erb',),
+    '.html.haml.deface': ('haml',),
+    '.html.handlebars': ('handlebars',),
+    '.html.hbs': ('handlebars',),
+    '.http': ('http',),
+    '.hx': ('haxe',),
+    '.hxsl': ('haxe',),
+    '.hxx': ('c++',),
+    '.hy': ('hy',),
+    '.i': ('assembly', 'motorola 68k assembly', 'swig',),
+    '.i3': ('modula-3',),
+    '.i7x': ('inform 7',),
+    '.ice': ('slice',),
+    '.iced': ('coffeescript',),
+    '.icl': ('clean',),
+    '.idc': ('c',),
+    '.idl': ('idl',),
+    '.idr': ('idris',),
+    '.ig': ('modula-3',),
+    '.ihlp': ('stata',),
+    '.ijm': ('imagej macro',),
+    '.ijs': ('j',),
+    '.ik': ('ioke',),
+    '.ily': ('lilypond',),
+    '.inc': ('c++', 'php', 'assembly', 'bitbake', 'motorola 68k assembly', 'nasl', 'pascal', 'pawn', 'pov-ray sdl', 'sourcepawn',),
+    '.ini': ('ini',),
+    '.inl': ('c++',),
+    '.ino': ('c++',),
+    '.ins': ('tex',),
+    '.intr': ('dylan',),
+    '.inx': ('xml',),
+    '.io': ('io',),
+    '.iol': ('jolie',),
+    '.ipf': ('igor pro',),
+    '.ipp': ('c++',),
+    '.ipynb': ('json',),
+    '.irbrc': ('ruby',),
+    '.irclog': ('irc log',),
+    '.isl': ('inno setup',),
+    '.iss': ('inno setup',),
+    '.ixx': ('c++',),
+    '.j': ('jasmin',),
+    '.j2': ('jinja',),
+    '.jake': ('javascript',),
+    '.jav': ('java',),
+    '.java': ('java',),
+    '.javascript': ('javascript',),
+    '.jbuilder': ('ruby',),
+    '.jelly': ('xml',),
+    '.jenkins': ('groovy',),
+    '.jenkinsfile': ('groovy',),
+    '.jflex': ('jflex',),
+    '.jinja': ('jinja',),
+    '.jinja2': ('jinja',),
+    '.jison': ('jison',),
+    '.jisonlex': ('jison lex',),
+    '.jl': ('julia',),
+    '.jq': ('jq', 'jsoniq',),
+    '.js': ('javascript',),
+    '.js.erb': ('javascript+erb',),
+    '.jsb': ('javascript',),
+    '.jscad': ('javascript',),
+    '.jsfl': ('javascript',),
+    '.jsh': ('java',),
+    '.jslib': ('javascript',),
+    '.jsm': ('javascript',),
+    '.json': ('json',),
+    '.json5': ('json5',),
+    '.jsonld': ('json', 'jsonld',),
+    '.jsonnet': ('jsonnet',),
+    '.jsp': ('java server pages',),
+    '.jspre': ('javascript',),
+    '.jss': ('javascript',),
+    '.jsx': ('javascript',),
+    '.kak': ('kakounescript',),
+    '.kid': ('genshi',),
+    '.kml': ('xml',),
+    '.kojo': ('scala',),
+    '.krl': ('krl',),
+    '.ksh': ('shell',),
+    '.ksy': ('kaitai struct',),
+    '.kt': ('kotlin',),
+    '.ktm': ('kotlin',),
+    '.kts': ('kotlin',),
+    '.l': ('common lisp', 'lex', 'picolisp',),
+    '.lagda': ('literate agda',),
+    '.las': ('lasso',),
+    '.lasso': ('lasso',),
+    '.lasso8': ('lasso',),
+    '.lasso9': ('lasso',),
+    '.ld': ('linker script',),
+    '.lds': ('linker script',),
+    '.lean': ('lean',),
+    '.lektorproject': ('ini',),
+    '.less': ('less',),
+    '.lex': ('lex',),
+    '.lfe': ('lfe',),
+    '.lgt': ('logtalk',),
+    '.lhs': ('literate haskell',),
+    '.libsonnet': ('jsonnet',),
+    '.lid': ('dylan',),
+    '.lidr': ('idris',),
+    '.linq': ('c#',),
+    '.liquid': ('liquid',),
+    '.lisp': ('common lisp', 'newlisp',),
+    '.litcoffee': ('literate coffeescript',),
+    '.lkml': ('lookml',),
+    '.ll': ('llvm',),
+    '.lmi': ('python',),
+    '.logtalk': ('logtalk',),
+    '.lol': ('lolcode',),
+    '.lookml': ('lookml',),
+    '.lpi': ('xml',),
+    '.lpr': ('pascal',),
+    '.ls': ('livescript', 'loomscript',),
+    '.lsl': ('lsl',),
+    '.lslp': ('lsl',),
+    '.lsp': ('common lisp', 'newlisp',),
+    '.ltx': ('tex',),
+    '.lua': ('lua',),
+    '.lvclass': ('labview',),
+    '.lvlib': ('labview',),
+    '.lvproj': ('labview',),
+    '.ly': ('lilypond',),
+    '.m': ('objective-c', 'm', 'limbo', 'matlab', 'mercury', 'muf',),
+    '.m2': ('macaulay2',),
+    '.m3': ('modula-3',),
+    '.m4': ('m4', 'm4sugar',),
+    '.mak': ('makefile',),
+    '.make': ('makefile',),
+    '.makefile': ('makefile',),
+    '.mako': ('mako',),
+    '.mao': ('mako',),
+    '.markdown': ('markdown',),
+    '.mata': ('stata',),
+    '.matah': ('stata',),
+    '.matlab': ('matlab',),
+    '.mawk': ('awk',),
+    '.maxhelp': ('max',),
+    '.maxpat': ('max',),
+    '.maxproj': ('max',),
+    '.mc': ('m4',),
+    '.mcfunction': ('mcfunction',),
+    '.mcr': ('maxscript',),
+    '.md': ('markdown', 'gcc machine description',),
+    '.meson': ('meson',),
+    '.metal': ('metal',),
+    '.mg': ('modula-3',),
+    '.minid': ('minid',),
+    '.mir': ('mirah',),
+    '.mirah': ('mirah',),
+    '.mjs': ('javascript',),
+    '.mk': ('makefile',),
+    '.mkd': ('markdown',),
+    '.mkdown': ('markdown',),
+    '.mkfile': ('makefile',),
+    '.mkii': ('tex',),
+    '.mkiv': ('tex',),
+    '.mkvi': ('tex',),
+    '.ml': ('ocaml', 'standard ml',),
+    '.ml4': ('ocaml',),
+    '.mli': ('ocaml',),
+    '.mlir': ('mlir',),
+    '.mll': ('ocaml',),
+    '.mly': ('ocaml',),
+    '.mm': ('objective-c++', 'c++', 'objective-c',),
+    '.mmk': ('module management system',),
+    '.mms': ('module management system',),
+    '.mo': ('modelica',),
+    '.mod': ('ampl', 'modula-2',),
+    '.monkey': ('monkey',),
+    '.monkey2': ('monkey',),
+    '.moo': ('moocode', 'mercury',),
+    '.moon': ('moonscript',),
+    '.mq4': ('mql4',),
+    '.mq5': ('mql5',),
+    '.mqh': ('mql4', 'mql5',),
+    '.mrc': ('mirc script',),
+    '.ms': ('maxscript', 'unix assembly',),
+    '.mscx': ('xml',),
+    '.mspec': ('ruby',),
+    '.mss': ('cartocss',),
+    '.mts': ('typescript',),
+    '.mu': ('mupad',),
+    '.mud': ('zil',),
+    '.muf': ('muf',),
+    '.mumps': ('m',),
+    '.mustache': ('mustache',),
+    '.mxml': ('xml',),
+    '.mxt': ('max',),
+    '.myt': ('myghty',),
+    '.n': ('nemerle',),
+    '.nas': ('assembly',),
+    '.nasl': ('nasl',),
+    '.nasm': ('assembly',),
+    '.nawk': ('awk',),
+    '.nc': ('nesc',),
+    '.ncl': ('ncl',),
+    '.ne': ('nearley',),
+    '.nearley': ('nearley',),
+    '.nf': ('nextflow',),
+    '.nginxconf': ('nginx',),
+    '.ni': ('inform 7',),
+    '.nim': ('nim',),
+    '.nim.cfg': ('nim',),
+    '.nimble': ('nim',),
+    '.nimrod': ('nim',),
+    '.nims': ('nim',),
+    '.nit': ('nit',),
+    '.nix': ('nix',),
+    '.njk': ('nunjucks',),
+    '.njs': ('javascript',),
+    '.nl': ('newlisp',),
+    '.nlogo': ('netlogo',),
+    '.nomad': ('hcl',),
+    '.nqp': ('perl', 'raku',),
+    '.nse': ('lua',),
+    '.nsh': ('nsis',),
+    '.nsi': ('nsis',),
+    '.nss': ('nwscript',),
+    '.nu': ('nu',),
+    '.numpy': ('numpy',),
+    '.numpyw': ('numpy',),
+    '.numsc': ('numpy',),
+    '.nut': ('squirrel',),
+    '.ny': ('common lisp',),
+    '.objdump': ('objdump',),
+    '.odin': ('odin',),
+    '.ol': ('jolie',),
+    '.omgrofl': ('omgrofl',),
+    '.ooc': ('ooc',),
+    '.opa': ('opa',),
+    '.opal': ('opal',),
+    '.opencl': ('opencl',),
+    '.orc': ('csound',),
+    '.os': ('1c enterprise',),
+    '.ox': ('ox',),
+    '.oxh': ('ox',),
+    '.oxo': ('ox',),
+    '.oxygene': ('oxygene',),
+    '.oz': ('oz',),
+    '.p': ('openedge abl', 'gnuplot',),
+    '.p4': ('p4',),
+    '.p6': ('raku',),
+    '.p6l': ('raku',),
+    '.p6m': ('raku',),
+    '.p8': ('lua',),
+    '.pac': ('javascript',),
+    '.pan': ('pan',),
+    '.parrot': ('parrot',),
+    '.pas': ('pascal',),
+    '.pascal': ('pascal',),
+    '.pasm': ('parrot assembly',),
+    '.pat': ('max',),
+    '.patch': ('diff',),
+    '.pb': ('purebasic',),
+    '.pbi': ('purebasic',),
+    '.pbt': ('powerbuilder',),
+    '.pck': ('plsql',),
+    '.pd': ('pure data',),
+    '.pd_lua': ('lua',),
+    '.pde': ('processing',),
+    '.peggy': ('peg.js',),
+    '.pegjs': ('peg.js',),
+    '.pep': ('pep8',),
+    '.perl': ('perl',),
+    '.pgsql': ('plpgsql',),
+    '.ph': ('perl',),
+    '.php': ('php', 'hack',),
+    '.php3': ('php',),
+    '.php4': ('php',),
+    '.php5': ('php',),
+    '.phps': ('php',),
+    '.phpt': ('php',),
+    '.phtml': ('php', 'html+php',),
+    '.pig': ('piglatin',),
+    '.pike': ('pike',),
+    '.pir': ('parrot internal representation',),
+    '.piskel': ('json',),
+    '.pkb': ('plsql',),
+    '.pks': ('plsql',),
+    '.pl': ('perl', 'prolog', 'raku',),
+    '.pl6': ('raku',),
+    '.plantuml': ('plantuml',),
+    '.plb': ('plsql',),
+    '.plist': ('xml',),
+    '.plot': ('gnuplot',),
+    '.pls': ('plsql',),
+    '.plsql': ('plsql',),
+    '.plt': ('gnuplot', 'prolog',),
+    '.pluginspec': ('ruby', 'xml',),
+    '.plx': ('perl',),
+    '.pm': ('perl', 'raku',),
+    '.pm6': ('perl', 'raku',),
+    '.pmod': ('pike',),
+    '.po': ('gettext catalog',),
+    '.pod': ('perl',),
+    '.podsl': ('common lisp',),
+    '.podspec': ('ruby',),
+    '.pogo': ('pogoscript',),
+    '.pom': ('xml',),
+    '.pony': ('pony',),
+    '.pot': ('gettext catalog',),
+    '.pov': ('pov-ray sdl',),
+    '.pp': ('puppet', 'pascal',),
+    '.pprx': ('rexx',),
+    '.prawn': ('ruby',),
+    '.prc': ('plsql',),
+    '.prefs': ('ini',),
+    '.prg': ('xbase',),
+    '.pri': ('qmake',),
+    '.prisma': ('prisma',),
+    '.pro': ('prolog', 'idl', 'qmake',),
+    '.prolog': ('prolog',),
+    '.properties': ('ini',),
+    '.props': ('xml',),
+    '.proto': ('protocol buffer',),
+    '.prw': ('xbase',),
+    '.ps1': ('powershell',),
+    '.ps1xml': ('xml',),
+    '.psc': ('papyrus',),
+    '.psc1': ('xml',),
+    '.psd1': ('powershell',),
+    '.psgi': ('perl',),
+    '.psm1': ('powershell',),
+    '.pt': ('xml',),
+    '.pug': ('pug',),
+    '.puml': ('plantuml',),
+    '.purs': ('purescript',),
+    '.pwn': ('pawn',),
+    '.pxd': ('cython',),
+    '.pxi': ('cython',),
+    '.py': ('python',),
+    '.py3': ('python',),
+    '.pyde': ('python',),
+    '.pyi': ('python',),
+    '.pyp': ('python',),
+    '.pyproj': ('xml',),
+    '.pyt': ('python',),
+    '.pytb': ('python traceback',),
+    '.pyw': ('python',),
+    '.pyx': ('cython',),
+    '.q': ('hiveql', 'q',),
+    '.qasm': ('openqasm',),
+    '.qbs': ('qml',),
+    '.ql': ('codeql',),
+    '.qll': ('codeql',),
+    '.qml': ('qml',),
+    '.qs': ('q#', 'qt script',),
+    '.r': ('r', 'rebol',),
+    '.r2': ('rebol',),
+    '.r3': ('rebol',),
+    '.rabl': ('ruby',),
+    '.rake': ('ruby',),
+    '.raku': ('raku',),
+    '.rakumod': ('raku',),
+    '.raw': ('raw token data',),
+    '.rb': ('ruby',),
+    '.rbbas': ('realbasic',),
+    '.rbfrm': ('realbasic',),
+    '.rbi': ('ruby',),
+    '.rbmnu': ('realbasic',),
+    '.rbres': ('realbasic',),
+    '.rbtbar': ('realbasic',),
+    '.rbuild': ('ruby',),
+    '.rbuistate': ('realbasic',),
+    '.rbw': ('ruby',),
+    '.rbx': ('ruby',),
+    '.rbxs': ('lua',),
+    '.rchit': ('glsl',),
+    '.rd': ('r',),
+    '.rdf': ('xml',),
+    '.re': ('c++', 'reason',),
+    '.reb': ('rebol',),
+    '.rebol': ('rebol',),
+    '.red': ('red',),
+    '.reds': ('red',),
+    '.reek': ('yaml',),
+    '.rego': ('open policy agent',),
+    '.rei': ('reason',),
+    '.res': ('rescript',),
+    '.resi': ('rescript',),
+    '.resource': ('robotframework',),
+    '.rest': ('restructuredtext',),
+    '.resx': ('xml',),
+    '.rex': ('rexx',),
+    '.rexx': ('rexx',),
+    '.rg': ('rouge',),
+    '.ring': ('ring',),
+    '.rkt': ('racket',),
+    '.rktd': ('racket',),
+    '.rktl': ('racket',),
+    '.rl': ('ragel',),
+    '.rmiss': ('glsl',),
+    '.rng': ('xml',),
+    '.robot': ('robotframework',),
+    '.rockspec': ('lua',),
+    '.ron': ('markdown',),
+    '.rpy': ('python', "ren'py",),
+    '.rs': ('rust', 'renderscript',),
+    '.rs.in': ('rust',),
+    '.rsc': ('rascal',),
+    '.rsh': ('renderscript',),
+    '.rss': ('xml',),
+    '.rst': ('restructuredtext',),
+    '.rsx': ('r',),
+    '.ru': ('ruby',),
+    '.ruby': ('ruby',),
+    '.s': ('assembly', 'motorola 68k assembly', 'unix assembly',),
+    '.sage': ('sage',),
+    '.sagews': ('sage',),
+    '.sas': ('sas',),
+    '.sass': ('sass',),
+    '.sats': ('ats',),
+    '.sbatch': ('shell',),
+    '.sbt': ('scala',),
+    '.sc': ('scala', 'supercollider',),
+    '.scad': ('openscad',),
+    '.scala': ('scala',),
+    '.scaml': ('scaml',),
+    '.scd': ('supercollider',),
+    '.sce': ('scilab',),
+    '.sch': ('scheme',),
+    '.sci': ('scilab',),
+    '.scm': ('scheme',),
+    '.sco': ('csound score',),
+    '.scpt': ('applescript',),
+    '.scrbl': ('racket',),
+    '.scss': ('scss',),
+    '.scxml': ('xml',),
+    '.sdc': ('tcl',),
+    '.sed': ('sed',),
+    '.self': ('self',),
+    '.sexp': ('common lisp',),
+    '.sh': ('shell',),
+    '.sh-session': ('shellsession',),
+    '.sh.in': ('shell',),
+    '.shader': ('glsl', 'shaderlab',),
+    '.shen': ('shen',),
+    '.sieve': ('sieve',),
+    '.sig': ('standard ml',),
+    '.sjs': ('javascript',),
+    '.sl': ('slash',),
+    '.sld': ('scheme',),
+    '.slnx': ('xml',),
+    '.sls': ('scheme', 'saltstack',),
+    '.slurm': ('shell',),
+    '.sma': ('pawn',),
+    '.smali': ('smali',),
+    '.sml': ('standard ml',),
+    '.smt': ('smt',),
+    '.smt2': ('smt',),
+    '.sol': ('solidity',),
+    '.sp': ('sourcepawn',),
+    '.spc': ('plsql',),
+    '.spec': ('python', 'ruby',),
+    '.spin': ('propeller spin',),
+    '.sps': ('scheme',),
+    '.sqf': ('sqf',),
+    '.sql': ('sql', 'plpgsql', 'plsql', 'sqlpl', 'tsql',),
+    '.sra': ('powerbuilder',),
+    '.sru': ('powerbuilder',),
+    '.srw': ('powerbuilder',),
+    '.ss': ('scheme',),
+    '.ssjs': ('javascript',),
+    '.st': ('smalltalk',),
+    '.stan': ('stan',),
+    '.star': ('starlark',),
+    '.sthlp': ('stata',),
+    '.story': ('gherkin',),
+    '.sty': ('tex',),
+    '.styl': ('stylus',),
+    '.sublime-keymap': ('json',),
+    '.sublime-mousemap': ('json',),
+    '.sublime-project': ('json',),
+    '.sublime-settings': ('json',),
+    '.sublime-workspace': ('json',),
+    '.sublime_metrics': ('json',),
+    '.sublime_session': ('json',),
+    '.sv': ('systemverilog',),
+    '.svelte': ('svelte',),
+    '.svg': ('xml', 'svg',),
+    '.svh': ('systemverilog',),
+    '.swg': ('swig',),
+    '.swift': ('swift',),
+    '.swig': ('swig',),
+    '.t': ('perl', 'turing', 'raku', 'terra',),
+    '.tac': ('python',),
+    '.tag': ('java server pages',),
+    '.targets': ('xml',),
+    '.tcc': ('c++',),
+    '.tcl': ('tcl',),
+    '.tcl.in': ('tcl',),
+    '.tcsh': ('tcsh',),
+    '.tea': ('tea',),
+    '.tesc': ('glsl',),
+    '.tese': ('glsl',),
+    '.tex': ('tex',),
+    '.textile': ('textile',),
+    '.tf': ('hcl',),
+    '.tfvars': ('hcl',),
+    '.thor': ('ruby',),
+    '.thrift': ('thrift',),
+    '.thy': ('isabelle',),
+    '.tla': ('tla',),
+    '.tm': ('tcl',),
+    '.tmcommand': ('xml',),
+    '.tml': ('xml',),
+    '.tmlanguage': ('xml',),
+    '.tmpreferences': ('xml',),
+    '.tmsnippet': ('xml',),
+    '.tmtheme': ('xml',),
+    '.tmux': ('shell',),
+    '.toc': ('tex',),
+    '.tofu': ('hcl',),
+    '.toml': ('toml',),
+    '.tool': ('shell',),
+    '.tpb': ('plsql',),
+    '.tpl': ('smarty',),
+    '.tpp': ('c++',),
+    '.tps': ('plsql',),
+    '.trg': ('plsql',),
+    '.trigger': ('shell', 'apex',),
+    '.ts': ('typescript',),
+    '.tst': ('gap', 'scilab',),
+    '.tsv': ('tsv',),
+    '.tsx': ('tsx',),
+    '.tu': ('turing',),
+    '.twig': ('twig',),
+    '.txl': ('txl',),
+    '.txsprofile': ('ini',),
+    '.txx': ('c++',),
+    '.uc': ('unrealscript',),
+    '.udo': ('csound',),
+    '.ui': ('xml',),
+    '.uno': ('uno',),
+    '.upc': ('unified parallel c',),
+    '.ur': ('urweb',),
+    '.urdf': ('xml',),
+    '.urs': ('urweb',),
+    '.v': ('verilog', 'v',),
+    '.vala': ('vala',),
+    '.vapi': ('vala',),
+    '.vark': ('gosu',),
+    '.vb': ('visual basic .net',),
+    '.vba': ('vba', 'vim script',),
+    '.vbhtml': ('visual basic .net',),
+    '.vbproj': ('xml',),
+    '.vbs': ('vbscript',),
+    '.vcl': ('vcl',),
+    '.vcxproj': ('xml',),
+    '.veo': ('verilog',),
+    '.vert': ('glsl',),
+    '.vh': ('systemverilog', 'verilog',),
+    '.vhd': ('vhdl',),
+    '.vhdl': ('vhdl',),
+    '.vhf': ('vhdl',),
+    '.vhi': ('vhdl',),
+    '.vho': ('vhdl',),
+    '.vhs': ('vhdl',),
+    '.vht': ('vhdl',),
+    '.vhw': ('vhdl',),
+    '.vim': ('vim script',),
+    '.vimrc': ('vim script',),
+    '.vmb': ('vim script',),
+    '.vrx': ('glsl',),
+    '.vs': ('glsl',),
+    '.vsh': ('glsl',),
+    '.vshader': ('glsl',),
+    '.vue': ('vue',),
+    '.vw': ('plsql',),
+    '.vxml': ('xml',),
+    '.w': ('c', 'cweb', 'openedge abl',),
+    '.wast': ('webassembly',),
+    '.wat': ('webassembly',),
+    '.watchr': ('ruby',),
+    '.wdl': ('wdl',),
+    '.webidl': ('webidl',),
+    '.weechatlog': ('irc log',),
+    '.wisp': ('wisp',),
+    '.wixproj': ('xml',),
+    '.wlk': ('wollok',),
+    '.wlua': ('lua',),
+    '.workflow': ('hcl',),
+    '.wsdl': ('xml',),
+    '.wsgi': ('python',),
+    '.wxi': ('xml',),
+    '.wxl': ('xml',),
+    '.wxs': ('xml',),
+    '.x': ('logos', 'linker script', 'rpc',),
+    '.x10': ('x10',),
+    '.x3d': ('xml',),
+    '.x68': ('motorola 68k assembly',),
+    '.xacro': ('xml',),
+    '.xaml': ('xml',),
+    '.xc': ('xc',),
+    '.xcscheme': ('xml',),
+    '.xctestplan': ('json',),
+    '.xcworkspacedata': ('xml',),
+    '.xdc': ('tcl',),
+    '.xhtml': ('html', 'xml',),
+    '.xi': ('logos',),
+    '.xlf': ('xml',),
+    '.xliff': ('xml',),
+    '.xm': ('logos',),
+    '.xmi': ('logos', 'xml',),
+    '.xml': ('xml',),
+    '.xojo_code': ('xojo',),
+    '.xojo_menu': ('xojo',),
+    '.xojo_report': ('xojo',),
+    '.xojo_script': ('xojo',),
+    '.xojo_toolbar': ('xojo',),
+    '.xojo_window': ('xojo',),
+    '.xpl': ('xproc',),
+    '.xproc': ('xproc',),
+    '.xpy': ('python',),
+    '.xq': ('xquery',),
+    '.xql': ('xquery',),
+    '.xqm': ('xquery',),
+    '.xqu': ('xquery',),
+    '.xquery': ('xquery',),
+    '.xqy': ('xquery',),
+    '.xrl': ('erlang',),
+    '.xs': ('xs',),
+    '.xsd': ('xml',),
+    '.xsh': ('xonsh',),
+    '.xsjs': ('javascript',),
+    '.xsjslib': ('javascript',),
+    '.xsl': ('xslt', 'xml',),
+    '.xslt': ('xslt', 'xml',),
+    '.xtend': ('xtend',),
+    '.xul': ('xml',),
+    '.xzap': ('zap',),
+    '.y': ('yacc',),
+    '.yacc': ('yacc',),
+    '.yaml': ('yaml',),
+    '.yamlld': ('yaml',),
+    '.yang': ('yang',),
+    '.yap': ('prolog',),
+    '.yar': ('yara',),
+    '.yara': ('yara',),
+    '.yin': ('xml',),
+    '.yml': ('yaml',),
+    '.yrl': ('erlang',),
+    '.yy': ('yacc',),
+    '.z3': ('smt',),
+    '.zap': ('zap',),
+    '.zcml': ('xml',),
+    '.zeek': ('zeek',),
+    '.zep': ('zephir',),
+    '.zig': ('zig',),
+    '.zig.zon': ('zig',),
+    '.zil': ('zil',),
+    '.zimpl': ('zimpl',),
+    '.zmpl': ('zimpl',),
+    '.zpl': ('zimpl',),
+    '.zs': ('zenscript',),
+    '.zsh': ('shell',),
+    '.zsh-theme': ('shell',),
+}
+
+FILENAMES: dict[str, tuple[str, ...]] = {
+    '.Rprofile': ('r',),
+    '.ansible-lint': ('yaml',),
+    '.babelrc': ('json',),
+    '.bash_aliases': ('shell',),
+    '.bash_profile': ('shell',),
+    '.bashrc': ('shell',),
+    '.bowerrc': ('json',),
+    '.clang-format': ('yaml',),
+    '.clang-tidy': ('yaml',),
+    '.classpath': ('xml',),
+    '.codespellrc': ('ini',),
+    '.coveragerc': ('ini',),
+    '.cshrc': ('shell',),
+    '.csslintrc': ('json',),
+    '.editorconfig': ('editorconfig',),
+    '.emacs': ('emacs lisp',),
+    '.envrc': ('shell',),
+    '.factor-boot-rc': ('factor',),
+    '.factor-rc': ('factor',),
+    '.flake8': ('ini',),
+    '.gitconfig': ('ini',),
+    '.gitlint': ('ini',),
+    '.hgrc': ('ini',),
+    '.isort.cfg': ('ini',),
+    '.jshintrc': ('json',),
+    '.mention-bot': ('json',),
+    '.pdbrc': ('python',),
+    '.profile': ('shell',),
+    '.project': ('xml',),
+    '.pypirc': ('ini',),
+    '.rstcheck.cfg': ('ini',),
+    '.salt-lint': ('yaml',),
+    '.sqlfluff': ('ini',),
+    '.yamllint': ('yaml',),
+    '.zlogin': ('shell',),
+    '.zlogout': ('shell',),
+    '.zprofile': ('shell',),
+    '.zshenv': ('shell',),
+    '.zshrc': ('shell',),
+    'Appraisals': ('ruby',),
+    'Berksfile': ('ruby',),
+    'Brewfile': ('ruby',),
+    'CMakeLists.txt': ('cmake',),
+    'Cakefile': ('coffeescript',),
+    'Cargo.lock': ('toml',),
+    'Cargo.toml': ('toml',),
+    'Containerfile': ('dockerfile',),
+    'Dockerfile': ('dockerfile', 'shell',),
+    'Fakefile': ('fancy',),
+    'Fastfile': ('ruby',),
+    'GNUmakefile': ('makefile',),
+    'Gemfile': ('ruby',),
+    'Guardfile': ('ruby',),
+    'Jakefile': ('javascript',),
+    'Jenkinsfile': ('groovy',),
+    'Makefile': ('makefile',),
+    'Modulefile': ('puppet',),
+    'Nukefile': ('nu',),
+    'PKGBUILD': ('shell',),
+    'Phakefile': ('php',),
+    'Pipfile': ('toml',),
+    'Pipfile.lock': ('json',),
+    'Podfile': ('ruby',),
+    'Rakefile': ('ruby',),
+    'Slakefile': ('livescript',),
+    'Thorfile': ('ruby',),
+    'Vagrantfile': ('ruby',),
+    'bblayers.conf': ('bitbake',),
+    'bitbake.conf': ('bitbake',),
+    'config.ru': ('ruby',),
+    'direnvrc': ('shell',),
+    'makefile': ('makefile',),
+    'meson.build': ('meson',),
+    'meson.options': ('meson',),
+    'meson_options.txt': ('meson',),
+    'phpunit.xml.dist': ('xml',),
+    'poetry.lock': ('toml',),
+    'pom.xml': ('xml',),
+    'pylintrc': ('ini',),
+    'pyproject.toml': ('toml',),
+    'rebar.config': ('erlang',),
+    'riemann.config': ('clojure',),
+    'setup.cfg': ('ini',),
+    'sys.config': ('erlang',),
+    'sys.config.src': ('erlang',),
+    'uv.lock': ('toml',),
+    'wscript': ('python',),
+}
+
+INTERPRETERS: dict[str, tuple[str, ...]] = {
+    'ash': ('shell',),
+    'awk': ('awk',),
+    'bash': ('shell',),
+    'bats': ('shell',),
+    'cbsd': ('shell',),
+    'csh': ('shell',),
+    'dash': ('shell',),
+    'escript': ('erlang',),
+    'ksh': ('shell',),
+    'node': ('javascript',),
+    'nodejs': ('javascript',),
+    'perl': ('perl',),
+    'php': ('php',),
+    'php7': ('php',),
+    'php8': ('php',),
+    'python': ('python',),
+    'python2': ('python',),
+    'python3': ('python',),
+    'ruby': ('ruby',),
+    'sh': ('shell',),
+    'tcsh': ('shell', 'tcsh',),
+    'zsh': ('shell',),
+}
@@ -0,0 +1,174 @@
+"""
+Extract per-file and per-repo metadata of cloned repos into Parquet files.
+
+For every file of destination_dir/org/repo: its size, number of lines,
+longest and average line length, fraction of alphanumeric bytes, language
+and whether a license header appears near the top. Files are read once, by a
+pool of processes, and rows are streamed to OUTPUT_DIR/files.parquet and
+OUTPUT_DIR/repos.parquet a batch of repos at a time, so memory stays bounded
+whatever the size of the corpus.
+"""
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, TypedDict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tap import Tap as TypedArgumentParser
+
+from .filter_files import BINARY_SNIFF_SIZE, detect_language, repo_dirs
+
+LICENSE_HEADER_SIZE = 2048  # bytes searched for a license header
+LICENSE_HEADER = re.compile(rb"(?i)SPDX-License-Identifier|\bcopyright\b|\blicen[cs]ed?\b")
+ALPHANUMERIC = np.zeros(256, dtype=bool)
+ALPHANUMERIC[[ord(c) for c in "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"]] = True
+
+FILE_SCHEMA = pa.schema([
+    ("repo", pa.string()),
+    ("path", pa.string()),  # relative to the repo
+    ("language", pa.string()),
+    ("size", pa.int64()),  # in bytes
+    ("lines", pa.int64()),
+    ("max_line_length", pa.int64()),
+    ("avg_line_length", pa.float64()),
+    ("alphanum_fraction", pa.float64()),
+    ("license_header", pa.bool_()),
+])
+REPO_SCHEMA = pa.schema([
+    ("repo", pa.string()),
+    ("files", pa.int64()),
+    ("size", pa.int64()),
+    ("lines", pa.int64()),
+    ("language", pa.string()),  # language with the most bytes
+    ("license_header_files", pa.int64()),
+])
+
+
+class FileMetadata(TypedDict):
+    repo: str
+    path: str
+    language: Optional[str]
+    size: int
+    lines: int
+    max_line_length: int
+    avg_line_length: float
+    alphanum_fraction: float
+    license_header: bool
+
+
+class RepoMetadata(TypedDict):
+    repo: str
+    files: int
+    size: int
+    lines: int
+    language: Optional[str]
+    license_header_files: int
+
+
+def file_metadata(repo: str, path: str, language: Optional[str], content: bytes) -> FileMetadata:
+    data = np.frombuffer(content, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord("\n"))
+    # a last line without a trailing newline still counts
+    ends = newlines if content.endswith(b"\n") or not content else np.append(newlines, len(data))
+    lengths = np.diff(ends, prepend=-1) - 1
+    return {
+        "repo": repo,
+        "path": path,
+        "language": language,
+        "size": len(content),
+        "lines": len(ends),
+        "max_line_length": int(lengths.max()) if len(lengths) else 0,
+        "avg_line_length": float(lengths.mean()) if len(lengths) else 0.0,
+        "alphanum_fraction": float(ALPHANUMERIC[data].mean()) if len(data) else 0.0,
+        "license_header": LICENSE_HEADER.search(content, 0, LICENSE_HEADER_SIZE) is not None,
+    }
+
+
+def repo_metadata(args: tuple[str, str]) -> tuple[List[FileMetadata], RepoMetadata]:
+    repo_dir, destination_dir = args
+    repo = os.path.relpath(repo_dir, destination_dir)
+    files: List[FileMetadata] = []
+    for root, dirs, names in os.walk(repo_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                content = f.read()
+            language = detect_language(name, content[:BINARY_SNIFF_SIZE])
+            files.append(file_metadata(repo, os.path.relpath(path, repo_dir), language, content))
+    language_bytes: dict[str, int] = {}
+    for file in files:
+        if file["language"] is not None:
+            language_bytes[file["language"]] = language_bytes.get(file["language"], 0) + file["size"]
+    return files, {
+        "repo": repo,
+        "files": len(files),
+        "size": sum(file["size"] for file in files),
+        "lines": sum(file["lines"] for file in files),
+        "language": max(language_bytes, key=language_bytes.__getitem__) if language_bytes else None,
+        "license_header_files": sum(file["license_header"] for file in files),
+    }
+
+
+def iter_metadata(
+    destination_dir: Path, workers: int | None = None, window: int = 64
+) -> Iterator[tuple[List[FileMetadata], RepoMetadata]]:
+    """Yield the metadata of each repo, in order, keeping at most window repos in flight."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future[tuple[List[FileMetadata], RepoMetadata]]] = deque()
+        for repo_dir in sorted(repo_dirs(destination_dir)):
+            pending.append(executor.submit(repo_metadata, (repo_dir, str(destination_dir))))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def extract_metadata(destination_dir: Path, output_dir: Path, workers: int | None = None, batch_size: int = 64) -> int:
+    """Write files.parquet and repos.parquet of destination_dir to output_dir, return the number of files."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    file_count = repo_count = 0
+    file_writer = pq.ParquetWriter(output_dir / "files.parquet", FILE_SCHEMA, compression="zstd")
+    repo_writer = pq.ParquetWriter(output_dir / "repos.parquet", REPO_SCHEMA, compression="zstd")
+    with file_writer, repo_writer:
+        file_rows: List[FileMetadata] = []
+        repo_rows: List[RepoMetadata] = []
+        for files, repo in iter_metadata(destination_dir, workers, batch_size):
+            file_rows += files
+            repo_rows.append(repo)
+            if len(repo_rows) >= batch_size:
+                file_writer.write_table(pa.Table.from_pylist(file_rows, schema=FILE_SCHEMA))
+                repo_writer.write_table(pa.Table.from_pylist(repo_rows, schema=REPO_SCHEMA))
+                file_count += len(file_rows)
+                repo_count += len(repo_rows)
+                file_rows.clear()
+                repo_rows.clear()
+                print(f"Extracted metadata of {file_count} files from {repo_count} repos.", end="\r")
+        file_writer.write_table(pa.Table.from_pylist(file_rows, schema=FILE_SCHEMA))
+        repo_writer.write_table(pa.Table.from_pylist(repo_rows, schema=REPO_SCHEMA))
+        file_count += len(file_rows)
+        repo_count += len(repo_rows)
+    print(f"Extracted metadata of {file_count} files from {repo_count} repos to {output_dir}.")
+    return file_count
+
+
+class MetadataArgs(TypedArgumentParser):
+    destination_dir: Path  # Directory of cloned repos (org/repo)
+    output_dir: Path  # Where to write files.parquet and repos.parquet
+    workers: int = os.cpu_count() or 1  # Number of processes reading files
+    batch_size: int = 64  # Repos written at once, bounds memory use
+
+
+def main():
+    args = MetadataArgs(underscores_to_dashes=True).parse_args()
+    extract_metadata(args.destination_dir, args.output_dir, args.workers, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
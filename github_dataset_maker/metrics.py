@@ -0,0 +1,191 @@
+"""
+Counters, latency histograms and trace spans of a pipeline run.
+
+Every stage reports to the process-wide METRICS registry: requests, pages,
+repos, bytes cloned, rate limit sleeps, and how long each stage took. At the
+end of a run the registry is saved as a Prometheus text file (for the
+node_exporter textfile collector) or a JSON snapshot, and, when tracing is
+enabled, stages are saved as spans in Chrome trace format (chrome://tracing
+or https://ui.perfetto.dev). Progress lines are printed by a background
+thread every few seconds from the counters, not once per item.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PREFIX = "github_dataset_maker_"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)  # seconds
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def label_pairs(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value).lower() if isinstance(value, bool) else str(value))
+                        for key, value in labels.items()))
+
+
+def series(name: str, labels: Labels, extra: Labels = ()) -> str:
+    """Prometheus series name, e.g. requests_total{resource="search"}."""
+    pairs = ",".join(f'{key}="{value}"' for key, value in (*labels, *extra))
+    return f"{PREFIX}{name}{{{pairs}}}" if pairs else f"{PREFIX}{name}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Dict[str, int]:
+        buckets, total = {}, 0
+        for bound, count in zip([*map(str, BUCKETS), "+Inf"], self.counts):
+            total += count
+            buckets[bound] = total
+        return buckets
+
+
+class Metrics:
+    def __init__(self):
+        # updated from the worker threads of the harvester and the cloner
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.events: Optional[List[dict[str, Any]]] = None  # Chrome trace events, once tracing is enabled
+        self.start = time.perf_counter()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, label_pairs(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, label_pairs(labels))
+        with self._lock:
+            self.histograms.setdefault(key, Histogram()).observe(value)
+
+    def value(self, name: str, **labels: Any) -> float:
+        """Sum of the counters of name whose labels include labels."""
+        wanted = set(label_pairs(labels))
+        with self._lock:
+            return sum(value for (key, key_labels), value in self.counters.items()
+                       if key == name and wanted.issubset(key_labels))
+
+    def enable_tracing(self) -> None:
+        with self._lock:
+            if self.events is None:
+                self.events = []
+
+    @contextmanager
+    def stage(self, name: str, **args: Any) -> Iterator[None]:
+        """Time a stage into the stage_seconds histogram and, when tracing, a span with args."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.observe("stage_seconds", end - start, stage=name)
+            if self.events is not None:
+                event = {
+                    "name": name,
+                    "cat": "stage",
+                    "ph": "X",  # a complete event, with its duration
+                    "ts": (start - self.start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+                with self._lock:
+                    self.events.append(event)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {PREFIX}{name} counter")
+                    typed.add(name)
+                lines.append(f"{series(name, labels)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {PREFIX}{name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.cumulative().items():
+                    lines.append(f"{series(name + '_bucket', labels, (('le', bound),))} {count}")
+                lines.append(f"{series(name + '_sum', labels)} {histogram.sum:g}")
+                lines.append(f"{series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_seconds": time.perf_counter() - self.start,
+                "counters": {series(name, labels): value for (name, labels), value in sorted(self.counters.items())},
+                "histograms": {
+                    series(name, labels): {"count": h.count, "sum": h.sum, "buckets": h.cumulative()}
+                    for (name, labels), h in sorted(self.histograms.items())
+                },
+            }
+
+    def save(self, path: Path) -> None:
+        """Save the Prometheus text format to a .prom or .txt path, a JSON snapshot otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.suffix in (".prom", ".txt"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+    def save_trace(self, path: Path) -> None:
+        with self._lock:
+            events = list(self.events or [])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def progress(render: Callable[[], str], interval: float = PROGRESS_INTERVAL) -> Iterator[None]:
+    """Print render() every interval seconds while the block runs, and once at its end."""
+    done = threading.Event()
+    # a terminal gets one line rewritten in place, a log one line per interval
+    end = "\r" if sys.stdout.isatty() else "\n"
+
+    def report() -> None:
+        while not done.wait(interval):
+            print(render(), end=end, flush=True)
+
+    thread = threading.Thread(target=report, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+        print(render())
+
+
+def save_outputs(metrics_path: Optional[Path], trace_path: Optional[Path]) -> None:
+    """Save METRICS and its trace where the --metrics and --trace options of a CLI asked."""
+    if metrics_path is not None:
+        METRICS.save(metrics_path)
+        print("Saved metrics to", metrics_path)
+    if trace_path is not None:
+        METRICS.save_trace(trace_path)
+        print("Saved trace to", trace_path)
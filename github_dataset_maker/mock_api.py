@@ -0,0 +1,283 @@
+"""
+Local stand-in for the search, rate limit and GraphQL endpoints of the GitHub API.
+
+Serves /search/repositories, /rate_limit and /graphql over a seeded synthetic
+universe of repos, so harvests and enrichment can be measured without spending
+API quota:
+
+- stars follow a long-tailed (Pareto) distribution and creation dates are
+  spread over GitHub's lifetime, so the planner has dense values to split
+- the stars, created, pushed and language qualifiers are honoured, results
+  are sorted by stars, paginated (per_page <= 100) and capped at 1000
+- every response waits --latency seconds and carries X-RateLimit-* headers
+  for a budget of --rate-limit search requests per --rate-limit-window
+  seconds, 403s are sent once it is spent
+- responses have ETags and If-None-Match is answered with 304
+- POST /graphql answers the `alias: repository(owner: $o, name: $n)` fields
+  of a query with the fields read by github_dataset_maker.enrich, and null
+  for repos that are not in the universe (like deleted ones)
+
+Point the harvester at it with GITHUB_API_URL=http://127.0.0.1:PORT (any
+token is accepted). GET /_stats returns the number of responses per status.
+
+python -m github_dataset_maker.mock_api --repos 20000 --port 8000
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from tap import Tap as TypedArgumentParser
+
+from .harvest import MAX_SEARCH_RESULTS
+from .planner import FIRST_DAY
+
+LAST_DAY = datetime.date(2023, 12, 31)
+QUALIFIER = re.compile(r"(\w+):(\S+)")
+REPOSITORY_FIELD = re.compile(r"(\w+)\s*:\s*repository\(\s*owner:\s*\$(\w+)\s*,\s*name:\s*\$(\w+)\s*\)")
+LICENSES = ["MIT", "Apache-2.0", "GPL-3.0", None]
+
+
+def make_universe(
+    size: int,
+    languages: List[str],
+    seed: int = 0,
+    max_stars: int = 200_000,
+    url_template: str = "https://github.com/{full_name}",
+) -> List[dict[str, Any]]:
+    """Synthetic search result items, most starred first."""
+    rng = random.Random(seed)
+    days = (LAST_DAY - FIRST_DAY).days
+    items = []
+    for i in range(size):
+        # Pareto with alpha = 1: about half the repos have 0 or 1 star
+        stars = min(int(1 / (1 - rng.random())) - 1, max_stars)
+        created = FIRST_DAY + datetime.timedelta(days=rng.randrange(days))
+        pushed = created + datetime.timedelta(days=rng.randrange((LAST_DAY - created).days + 1))
+        full_name = f"org{i % 97}/repo{i}"
+        items.append({
+            "id": i + 1,
+            "name": f"repo{i}",
+            "full_name": full_name,
+            "html_url": url_template.format(full_name=full_name),
+            "stargazers_count": stars,
+            "size": rng.randrange(1, 50_000),
+            "language": languages[i % len(languages)],
+            "fork": False,
+            "archived": rng.random() < 0.05,
+            "default_branch": "main",
+            "created_at": f"{created}T00:00:00Z",
+            "pushed_at": f"{pushed}T00:00:00Z",
+        })
+    items.sort(key=lambda item: (-item["stargazers_count"], item["id"]))
+    return items
+
+
+def range_predicate(value: str, parse: Callable[[str], Any]) -> Callable[[Any], bool]:
+    """Predicate of a search qualifier value: N, A..B (either side may be *), >N, >=N, <N or <=N."""
+    if ".." in value:
+        low, high = value.split("..", 1)
+        low_value = None if low == "*" else parse(low)
+        high_value = None if high == "*" else parse(high)
+        return lambda x: (low_value is None or x >= low_value) and (high_value is None or x <= high_value)
+    for operator, compare in ((">=", lambda x, y: x >= y), ("<=", lambda x, y: x <= y),
+                              (">", lambda x, y: x > y), ("<", lambda x, y: x < y)):
+        if value.startswith(operator):
+            bound = parse(value[len(operator):])
+            return lambda x: compare(x, bound)
+    exact = parse(value)
+    return lambda x: x == exact
+
+
+def search(universe: List[dict[str, Any]], query: str) -> List[dict[str, Any]]:
+    predicates: List[Callable[[dict[str, Any]], bool]] = []
+    for qualifier, value in QUALIFIER.findall(query):
+        if qualifier == "stars":
+            matches = range_predicate(value, int)
+            predicates.append(lambda item, matches=matches: matches(item["stargazers_count"]))
+        elif qualifier in ("created", "pushed"):
+            matches = range_predicate(value, str)  # ISO dates compare as strings
+            field = f"{qualifier}_at"
+            predicates.append(lambda item, matches=matches, field=field: matches(item[field][:10]))
+        elif qualifier == "language":
+            language = value.lower()
+            predicates.append(lambda item, language=language: item["language"].lower() == language)
+    return [item for item in universe if all(predicate(item) for predicate in predicates)]
+
+
+def repository_node(item: dict[str, Any]) -> dict[str, Any]:
+    """GraphQL Repository fields of a synthetic search result item."""
+    license = LICENSES[item["id"] % len(LICENSES)]
+    return {
+        "diskUsage": item["size"],
+        "isFork": item["fork"],
+        "isArchived": item["archived"],
+        "defaultBranchRef": {"name": item["default_branch"]},
+        "licenseInfo": None if license is None else {"spdxId": license},
+        "languages": {"edges": [{"size": item["size"] * 1024, "node": {"name": item["language"]}}]},
+    }
+
+
+class RateLimit:
+    def __init__(self, limit: int, window: float):
+        self._lock = threading.Lock()
+        self.limit = limit  # 0 for unlimited
+        self.window = window
+        self.window_start = time.time()
+        self.used = 0
+
+    def spend(self) -> tuple[bool, Dict[str, str]]:
+        """Count a request, return whether it is allowed and its X-RateLimit-* headers."""
+        with self._lock:
+            now = time.time()
+            if now >= self.window_start + self.window:
+                self.window_start, self.used = now, 0
+            allowed = self.limit == 0 or self.used < self.limit
+            if allowed:
+                self.used += 1
+            limit = self.limit or 1_000_000
+            return allowed, {
+                "X-RateLimit-Resource": "search",
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(max(limit - self.used, 0)),
+                "X-RateLimit-Reset": str(math.ceil(self.window_start + self.window)),
+            }
+
+
+class MockGitHub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        universe: List[dict[str, Any]],
+        latency: float = 0.0,
+        rate_limit: int = 30,
+        rate_limit_window: float = 60.0,
+    ):
+        super().__init__(address, MockHandler)
+        self.universe = universe
+        self.by_name = {item["full_name"]: item for item in universe}
+        self.latency = latency
+        self.rate_limit = RateLimit(rate_limit, rate_limit_window)
+        self._lock = threading.Lock()
+        self.results: Dict[str, List[dict[str, Any]]] = {}  # by query, pages of a query search once
+        self.statuses: Dict[int, int] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search(self, query: str) -> List[dict[str, Any]]:
+        with self._lock:
+            if query not in self.results:
+                self.results[query] = search(self.universe, query)
+            return self.results[query]
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server: MockGitHub
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.github.com
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.server.count(status)
+        self.send_response(status)
+        for name, value in {**(headers or {}), "ETag": etag}.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        time.sleep(self.server.latency)
+        if url.path == "/_stats":
+            self.send_json(200, {"statuses": self.server.statuses})
+        elif url.path == "/rate_limit":
+            limit = self.server.rate_limit
+            search = {"limit": limit.limit, "remaining": max(limit.limit - limit.used, 0)}
+            self.send_json(200, {"resources": {"core": {"limit": 5000, "remaining": 5000}, "search": search}})
+        elif url.path == "/search/repositories":
+            self.search_repositories(params)
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        if urlparse(self.path).path == "/graphql":
+            self.graphql(json.loads(body or b"{}"))
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def graphql(self, payload: Dict[str, Any]) -> None:
+        variables = payload.get("variables") or {}
+        data = {}
+        for alias, owner, name in REPOSITORY_FIELD.findall(payload.get("query", "")):
+            item = self.server.by_name.get(f"{variables.get(owner)}/{variables.get(name)}")
+            data[alias] = None if item is None else repository_node(item)
+        if not data:
+            self.send_json(200, {"data": None, "errors": [{"message": "No repository fields in the query"}]})
+            return
+        self.send_json(200, {"data": data})
+
+    def search_repositories(self, params: Dict[str, str]) -> None:
+        allowed, headers = self.server.rate_limit.spend()
+        if not allowed:
+            self.send_json(403, {"message": "API rate limit exceeded"}, headers)
+            return
+        per_page = min(int(params.get("per_page", 30)), 100)
+        page = int(params.get("page", 1))
+        if page * per_page > MAX_SEARCH_RESULTS:
+            message = f"Only the first {MAX_SEARCH_RESULTS} search results are available"
+            self.send_json(422, {"message": message}, headers)
+            return
+        results = self.server.search(params.get("q", ""))
+        items = results[(page - 1) * per_page : page * per_page]
+        self.send_json(200, {"total_count": len(results), "incomplete_results": False, "items": items}, headers)
+
+
+class MockApiArgs(TypedArgumentParser):
+    repos: int = 20_000  # Number of repos in the synthetic universe
+    languages: List[str] = ["Python"]  # Languages given to the repos, in turn
+    seed: int = 0  # Seed of the synthetic universe
+    latency: float = 0.05  # Seconds waited before each response
+    rate_limit: int = 30  # Search requests allowed per window, 0 for unlimited
+    rate_limit_window: float = 60.0  # Seconds after which the search budget is refilled
+    host: str = "127.0.0.1"
+    port: int = 8000
+
+
+def main():
+    args = MockApiArgs(underscores_to_dashes=True).parse_args()
+    universe = make_universe(args.repos, args.languages, args.seed)
+    server = MockGitHub((args.host, args.port), universe, args.latency, args.rate_limit, args.rate_limit_window)
+    print(f"Serving {len(universe)} repos on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
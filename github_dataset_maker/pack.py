@@ -0,0 +1,235 @@
+"""
+Pack the files of cloned repos into compressed shards.
+
+Reads destination_dir/org/repo trees (after filter_files and, optionally,
+dedup) and streams every kept file into shards of about --shard-size bytes of
+source code: zstd-compressed JSON lines, zstd-compressed Parquet, or
+uncompressed binary shards for random access (see binary_shards).
+Each record holds the repo, the path inside it, the language, the BLAKE2b
+hash of the content (as in dedup) and the content itself. Groups of repos are
+packed in parallel by a pool of processes, each writing its own shards.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, List, Literal, Optional, TypedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tap import Tap as TypedArgumentParser
+
+from .binary_shards import BinaryShardWriter, save_languages
+from .filter_files import BINARY_SNIFF_SIZE, detect_language, repo_dirs
+from .supported_languages import programming_languages
+
+ShardFormat = Literal["jsonl", "parquet", "bin"]
+DEFAULT_SHARD_SIZE = 256 * 1024 * 1024  # bytes of content per shard
+GROUPS_PER_WORKER = 4  # more groups balance the load, fewer leave fewer partial shards
+SCHEMA = pa.schema([
+    ("repo", pa.string()),  # org/repo
+    ("path", pa.string()),  # relative to the repo
+    ("language", pa.string()),
+    ("size", pa.int64()),  # in bytes
+    ("hash", pa.string()),  # hex BLAKE2b digest (16 bytes)
+    ("content", pa.string()),
+])
+
+
+class SourceFile(TypedDict):
+    repo: str
+    path: str
+    language: Optional[str]
+    size: int
+    hash: str
+    content: str
+
+
+class ShardWriter:
+    """Write records to numbered shards, starting a new one every shard_size bytes of content."""
+
+    def __init__(
+        self,
+        output_dir: Path,
+        prefix: str,
+        shard_format: ShardFormat,
+        shard_size: int,
+        languages: Optional[List[str]] = None,
+    ):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.shard_format = shard_format
+        self.shard_size = shard_size
+        self.languages = languages or []  # language table of binary shards
+        self.paths: List[Path] = []
+        self.buffer: List[SourceFile] = []
+        self.shard_bytes = 0
+        self.writer: Any = None
+
+    def __enter__(self) -> ShardWriter:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self) -> None:
+        suffix = {"jsonl": ".jsonl.zst", "parquet": ".parquet", "bin": ".bin"}[self.shard_format]
+        path = self.output_dir / f"{self.prefix}-{len(self.paths):05d}{suffix}"
+        self.paths.append(path)
+        if self.shard_format == "jsonl":
+            self.writer = pa.CompressedOutputStream(str(path), "zstd")
+        elif self.shard_format == "parquet":
+            self.writer = pq.ParquetWriter(path, SCHEMA, compression="zstd")
+        else:
+            self.writer = BinaryShardWriter(path.with_suffix(""), self.languages)
+
+    def write(self, record: SourceFile) -> None:
+        if self.writer is None:
+            self.open()
+        self.buffer.append(record)
+        self.shard_bytes += record["size"]
+        if self.shard_bytes >= self.shard_size:
+            self.close()
+        elif len(self.buffer) >= 1000:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        if self.shard_format == "jsonl":
+            lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self.buffer)
+            self.writer.write(lines.encode("utf-8"))
+        elif self.shard_format == "bin":
+            self.writer.write(self.buffer)
+        else:
+            self.writer.write_table(pa.Table.from_pylist(self.buffer, schema=SCHEMA))
+        self.buffer.clear()
+
+    def close(self) -> None:
+        if self.writer is None:
+            return
+        self.flush()
+        self.writer.close()
+        self.writer = None
+        self.shard_bytes = 0
+
+
+def read_dropped(manifest_path: Path) -> dict[str, set[str]]:
+    """Map each org/repo to the paths of its files marked as duplicates in a dedup manifest."""
+    dropped: dict[str, set[str]] = {}
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["status"] == "drop":
+                org, repo, path = row["path"].split(os.sep, 2)
+                dropped.setdefault(f"{org}{os.sep}{repo}", set()).add(path)
+    return dropped
+
+
+def pack_repos(
+    group: int,
+    repos: List[str],
+    destination_dir: str,
+    output_dir: Path,
+    shard_format: ShardFormat,
+    shard_size: int,
+    dropped: dict[str, set[str]],
+    language_table: Optional[List[str]] = None,
+) -> tuple[List[Path], int, int]:
+    """Pack a group of repos, return the shards written, the number of files and their bytes."""
+    files = size = 0
+    with ShardWriter(output_dir, f"shard-{group:05d}", shard_format, shard_size, language_table) as writer:
+        for repo_dir in repos:
+            repo = os.path.relpath(repo_dir, destination_dir)
+            repo_dropped = dropped.get(repo, set())
+            for root, dirs, names in os.walk(repo_dir):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    relative_path = os.path.relpath(path, repo_dir)
+                    if relative_path in repo_dropped:
+                        continue
+                    with open(path, "rb") as f:
+                        content = f.read()
+                    writer.write({
+                        "repo": repo,
+                        "path": relative_path,
+                        "language": detect_language(name, content[:BINARY_SNIFF_SIZE]),
+                        "size": len(content),
+                        "hash": hashlib.blake2b(content, digest_size=16).hexdigest(),
+                        "content": content.decode("utf-8", errors="replace"),
+                    })
+                    files += 1
+                    size += len(content)
+    return writer.paths, files, size
+
+
+def pack_dataset(
+    destination_dir: Path,
+    output_dir: Path,
+    shard_format: ShardFormat = "jsonl",
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    manifest_path: Optional[Path] = None,
+    workers: int | None = None,
+) -> List[Path]:
+    """Pack every repo of destination_dir into shards under output_dir."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    repos = sorted(repo_dirs(destination_dir))
+    dropped = read_dropped(manifest_path) if manifest_path is not None else {}
+    workers = workers or os.cpu_count() or 1
+    groups = [repos[i :: workers * GROUPS_PER_WORKER] for i in range(workers * GROUPS_PER_WORKER)]
+    groups = [group for group in groups if group]
+    language_table = save_languages(output_dir, programming_languages) if shard_format == "bin" else None
+    paths: List[Path] = []
+    files = size = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for i, group in enumerate(groups):
+            # only send each process the duplicates of its own repos
+            names = [os.path.relpath(repo_dir, destination_dir) for repo_dir in group]
+            group_dropped = {name: dropped[name] for name in names if name in dropped}
+            futures.append(
+                executor.submit(
+                    pack_repos,
+                    i,
+                    group,
+                    str(destination_dir),
+                    output_dir,
+                    shard_format,
+                    shard_size,
+                    group_dropped,
+                    language_table,
+                )
+            )
+        for future in futures:
+            group_paths, group_files, group_size = future.result()
+            paths += group_paths
+            files += group_files
+            size += group_size
+    packed = sum(path.stat().st_size for path in paths)  # contents only for binary shards
+    print(
+        f"Packed {files} files ({size / 1e6:.1f} MB) of {len(repos)} repos",
+        f"into {len(paths)} shards ({packed / 1e6:.1f} MB) in {output_dir}.",
+    )
+    return paths
+
+
+class PackArgs(TypedArgumentParser):
+    destination_dir: Path  # Directory of cloned repos (org/repo)
+    output_dir: Path  # Where to write the shards
+    format: ShardFormat = "jsonl"  # jsonl (.jsonl.zst), parquet or bin (memory-mappable)
+    shard_size: int = DEFAULT_SHARD_SIZE  # Bytes of source code per shard
+    manifest: Optional[Path] = None  # Skip files marked as duplicates in this dedup manifest
+    workers: int = os.cpu_count() or 1  # Number of processes writing shards
+
+
+def main():
+    args = PackArgs(underscores_to_dashes=True).parse_args()
+    pack_dataset(args.destination_dir, args.output_dir, args.format, args.shard_size, args.manifest, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Split a star range into search queries that each stay under the 1000-result cap.
+
+Ranges are probed with per_page=1 requests. Ranges holding too many repos are
+bisected, the right half's count is derived from its parent instead of being
+probed again, and adjacent sparse buckets are merged back together. A single
+star value that is still too dense is sliced by creation (or push) date.
+"""
+from __future__ import annotations
+
+import datetime
+from typing import Callable, List, Literal, NamedTuple, Optional, Tuple
+
+from . import harvest
+
+DateField = Literal["created", "pushed"]
+FIRST_DAY = datetime.date(2007, 10, 1)  # predates every repository on GitHub
+
+
+class Bucket(NamedTuple):
+    stars: Tuple[int, int]
+    total_count: int
+    dates: Optional[Tuple[datetime.date, datetime.date]] = None
+    date_field: DateField = "created"
+
+    def query(self, lang: str) -> str:
+        query = f"stars:{self.stars[0]}..{self.stars[1]} language:{lang}"
+        if self.dates is not None:
+            query += f" {self.date_field}:{self.dates[0]}..{self.dates[1]}"
+        return query
+
+    def filename(self, lang: str) -> str:
+        if self.dates is None:
+            return f"{lang}_{self.stars[0]}-{self.stars[1]}"
+        return f"{lang}_{self.dates[0]}_{self.dates[1]}_{self.stars[0]}-{self.stars[1]}"
+
+
+def probe_total_count(query: str) -> int:
+    return harvest.search_repositories_page(query, 1, per_page=1)["total_count"]
+
+
+class QueryPlanner:
+    def __init__(
+        self,
+        lang: str,
+        date_field: DateField = "created",
+        probe: Callable[[str], int] = probe_total_count,
+        max_results: int = harvest.MAX_SEARCH_RESULTS,
+    ):
+        self.lang = lang
+        self.date_field: DateField = date_field
+        self.probe = probe
+        self.max_results = max_results
+        self.probes = 0
+
+    def count(self, bucket: Bucket) -> int:
+        self.probes += 1
+        return self.probe(bucket.query(self.lang))
+
+    def plan(self, stars: Tuple[int, int]) -> List[Bucket]:
+        """Cover every repo with stars[0] <= stars <= stars[1] using the fewest queries."""
+        if stars[0] > stars[1]:
+            return []
+        root = Bucket(stars, 0, date_field=self.date_field)
+        root = root._replace(total_count=self.count(root))
+        return self.merge(self.split_stars(root))
+
+    def split_stars(self, bucket: Bucket) -> List[Bucket]:
+        if bucket.total_count <= self.max_results:
+            return [bucket] if bucket.total_count > 0 else []
+        low, high = bucket.stars
+        if low == high:
+            today = datetime.date.today()
+            return self.split_dates(bucket._replace(dates=(FIRST_DAY, today)))
+        mid = (low + high) // 2
+        left = Bucket((low, mid), 0, date_field=self.date_field)
+        left = left._replace(total_count=self.count(left))
+        right = Bucket(
+            (mid + 1, high),
+            max(bucket.total_count - left.total_count, 0),
+            date_field=self.date_field,
+        )
+        return self.split_stars(left) + self.split_stars(right)
+
+    def split_dates(self, bucket: Bucket) -> List[Bucket]:
+        if bucket.total_count <= self.max_results:
+            return [bucket] if bucket.total_count > 0 else []
+        assert bucket.dates is not None
+        first, last = bucket.dates
+        if first == last:
+            print(
+                f"Warning: {bucket.query(self.lang)!r} has {bucket.total_count} repos,",
+                f"only {self.max_results} are reachable.",
+            )
+            return [bucket]
+        mid = first + (last - first) // 2
+        left = bucket._replace(dates=(first, mid))
+        left = left._replace(total_count=self.count(left))
+        right = bucket._replace(
+            dates=(mid + datetime.timedelta(days=1), last),
+            total_count=max(bucket.total_count - left.total_count, 0),
+        )
+        return self.split_dates(left) + self.split_dates(right)
+
+    def merge(self, buckets: List[Bucket]) -> List[Bucket]:
+        """
+        Join consecutive star buckets (without date slices) while they fit in one query.
+
+        Gaps between buckets are ranges that were probed empty, so merging
+        across them keeps the coverage exact.
+        """
+        merged: List[Bucket] = []
+        for bucket in buckets:
+            previous = merged[-1] if merged else None
+            if (
+                previous is not None
+                and previous.dates is None
+                and bucket.dates is None
+                and previous.stars[1] < bucket.stars[0]
+                and previous.total_count + bucket.total_count <= self.max_results
+            ):
+                merged[-1] = previous._replace(
+                    stars=(previous.stars[0], bucket.stars[1]),
+                    total_count=previous.total_count + bucket.total_count,
+                )
+            else:
+                merged.append(bucket)
+        return merged
@@ -0,0 +1,177 @@
+"""
+Flag low-quality files of binary shards (see binary_shards) with vectorized heuristics.
+
+Files are dropped when they have very long lines (minified code, data blobs),
+a high average line length, few alphanumeric characters, a marker of
+generated code near the top, or mostly repeated lines. Every rule is
+evaluated with NumPy over a batch of files at a time, straight from the
+memory-mapped shard, never looping over files in Python.
+
+The verdict of each shard is saved as NAME.keep.npy, a boolean per record
+used by BinaryCorpus.select(keep_only=True), and a per-rule report of the
+files and bytes dropped is printed and saved as JSON.
+"""
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, NamedTuple
+
+import numpy as np
+from tap import Tap as TypedArgumentParser
+
+from . import utils
+from .binary_shards import BinaryShard
+
+BATCH_SIZE = 64 * 1024 * 1024  # bytes of content processed at once
+HEADER_SIZE = 1024  # bytes searched for a generated code marker
+MIN_REPEATED_LINE_LENGTH = 10  # shorter lines (blank, braces, ...) may repeat freely
+GENERATED = re.compile(
+    rb"(?i)auto-?generated|generated by|do not edit|@generated|code generated|this file was generated"
+)
+ALPHANUMERIC = np.zeros(256, dtype=bool)
+ALPHANUMERIC[[ord(c) for c in "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"]] = True
+RULES = ("max_line_length", "avg_line_length", "alphanum_fraction", "generated", "repeated_lines")
+
+
+class Thresholds(NamedTuple):
+    max_line_length: int = 1000
+    avg_line_length: float = 100.0
+    alphanum_fraction: float = 0.25
+    repeated_lines: float = 0.5  # fraction of lines of at least MIN_REPEATED_LINE_LENGTH bytes
+
+
+DEFAULT_THRESHOLDS = Thresholds()
+
+
+def gather_u64(data: np.ndarray, positions: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Pack the bytes at positions, positions + 1, ... (8 of them, clipped to [lower, upper]) into integers."""
+    packed = np.zeros(len(positions), dtype=np.uint64)
+    for k in range(8):
+        index = np.clip(positions + k, lower, upper)
+        packed = (packed << np.uint64(8)) | data[index].astype(np.uint64)
+    return packed
+
+
+def evaluate_batch(data: np.ndarray, starts: np.ndarray, sizes: np.ndarray, thresholds: Thresholds) -> np.ndarray:
+    """
+    Return a (len(RULES), len(starts)) boolean matrix of the rules each file breaks.
+
+    data holds the contents of consecutive files, starting at starts (relative to data).
+    """
+    n = len(starts)
+    failed = np.zeros((len(RULES), n), dtype=bool)
+    nonempty = np.flatnonzero(sizes > 0)
+    if len(nonempty) == 0:
+        return failed
+    ends = starts + sizes
+    # every line ends at a newline or at the last byte of its file
+    line_ends = np.union1d(np.flatnonzero(data == ord("\n")), ends[nonempty] - 1)
+    line_starts = np.concatenate([[0], line_ends[:-1] + 1])
+    line_lengths = line_ends - line_starts + 1 - (data[line_ends] == ord("\n"))
+    line_files = np.searchsorted(starts, line_ends, side="right") - 1
+    # lines are sorted by file, each group starts where the file changes
+    firsts = np.flatnonzero(np.diff(line_files, prepend=-1))
+    files_with_lines = line_files[firsts]
+    lines = np.bincount(line_files, minlength=n)
+    max_line_length = np.zeros(n, dtype=np.int64)
+    max_line_length[files_with_lines] = np.maximum.reduceat(line_lengths, firsts)
+    avg_line_length = np.zeros(n)
+    avg_line_length[files_with_lines] = np.add.reduceat(line_lengths, firsts) / lines[files_with_lines]
+
+    alphanumeric = np.zeros(n, dtype=np.int64)
+    alphanumeric[nonempty] = np.add.reduceat(ALPHANUMERIC[data], starts[nonempty], dtype=np.int64)
+    alphanum_fraction = np.ones(n)
+    alphanum_fraction[nonempty] = alphanumeric[nonempty] / sizes[nonempty]
+
+    generated = np.zeros(n, dtype=bool)
+    positions = np.fromiter((match.start() for match in GENERATED.finditer(memoryview(data))), dtype=np.int64)
+    if len(positions):
+        files = np.searchsorted(starts, positions, side="right") - 1
+        generated[files[positions - starts[files] < HEADER_SIZE]] = True
+
+    # lines are fingerprinted by their length and first and last 8 bytes
+    long_lines = np.flatnonzero(line_lengths >= MIN_REPEATED_LINE_LENGTH)
+    line_first, line_last = line_starts[long_lines], line_starts[long_lines] + line_lengths[long_lines] - 1
+    fingerprints = (
+        gather_u64(data, line_first, line_first, line_last)
+        ^ (gather_u64(data, line_last - 7, line_first, line_last) * np.uint64(0x9E3779B97F4A7C15))
+        ^ line_lengths[long_lines].astype(np.uint64)
+    )
+    order = np.lexsort((fingerprints, line_files[long_lines]))
+    sorted_files, sorted_fingerprints = line_files[long_lines][order], fingerprints[order]
+    repeated = np.zeros(len(order), dtype=bool)
+    repeated[1:] = (sorted_files[1:] == sorted_files[:-1]) & (sorted_fingerprints[1:] == sorted_fingerprints[:-1])
+    repeated_lines = np.bincount(sorted_files[repeated], minlength=n)
+    counted_lines = np.bincount(line_files[long_lines], minlength=n)
+
+    failed[0] = max_line_length > thresholds.max_line_length
+    failed[1] = avg_line_length > thresholds.avg_line_length
+    failed[2] = alphanum_fraction < thresholds.alphanum_fraction
+    failed[3] = generated
+    failed[4] = repeated_lines > thresholds.repeated_lines * np.maximum(counted_lines, 1)
+    return failed
+
+
+def filter_shard(path: Path, thresholds: Thresholds = DEFAULT_THRESHOLDS, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Evaluate every file of the shard at path (without suffix), save NAME.keep.npy and return its report."""
+    shard = BinaryShard(path)
+    offsets = shard.index["offset"].astype(np.int64)
+    sizes = shard.index["size"].astype(np.int64)
+    failed = np.zeros((len(RULES), len(offsets)), dtype=bool)
+    first = 0
+    while first < len(offsets):
+        # a batch is a run of files of about batch_size bytes, at least one file
+        last = max(int(np.searchsorted(offsets, offsets[first] + batch_size, side="left")), first + 1)
+        begin, end = offsets[first], offsets[last - 1] + sizes[last - 1]
+        failed[:, first:last] = evaluate_batch(
+            np.asarray(shard.data[begin:end]), offsets[first:last] - begin, sizes[first:last], thresholds
+        )
+        first = last
+    keep = ~failed.any(axis=0)
+    np.save(path.with_suffix(".keep.npy"), keep)
+    report: Dict[str, Any] = {
+        rule: {"files": int(failed[i].sum()), "bytes": int(sizes[failed[i]].sum())} for i, rule in enumerate(RULES)
+    }
+    report["kept"] = {"files": int(keep.sum()), "bytes": int(sizes[keep].sum())}
+    report["dropped"] = {"files": int((~keep).sum()), "bytes": int(sizes[~keep].sum())}
+    return report
+
+
+def filter_shards(
+    shards_dir: Path, thresholds: Thresholds = DEFAULT_THRESHOLDS, workers: int | None = None
+) -> Dict[str, Dict[str, int]]:
+    """Filter every binary shard of shards_dir in a pool of processes, return the summed report."""
+    paths = [shards_dir / path.name[: -len(".idx.npy")] for path in sorted(shards_dir.glob("*.idx.npy"))]
+    total: Dict[str, Dict[str, int]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for report in executor.map(filter_shard, paths, [thresholds] * len(paths)):
+            for rule, counts in report.items():
+                for key, value in counts.items():
+                    total.setdefault(rule, {"files": 0, "bytes": 0})[key] += value
+    return total
+
+
+class QualityArgs(TypedArgumentParser):
+    shards_dir: Path  # Directory of binary shards written by pack --format bin
+    report: Path = Path("quality_report.json")  # Where to save the files and bytes dropped by each rule
+    max_line_length: int = DEFAULT_THRESHOLDS.max_line_length  # Drop files with a longer line
+    avg_line_length: float = DEFAULT_THRESHOLDS.avg_line_length  # Drop files with a higher average line length
+    alphanum_fraction: float = DEFAULT_THRESHOLDS.alphanum_fraction  # Drop files with fewer alphanumeric characters
+    repeated_lines: float = DEFAULT_THRESHOLDS.repeated_lines  # Drop files with a higher fraction of repeated lines
+    workers: int = os.cpu_count() or 1  # Number of shards filtered in parallel
+
+
+def main():
+    args = QualityArgs(underscores_to_dashes=True).parse_args()
+    thresholds = Thresholds(args.max_line_length, args.avg_line_length, args.alphanum_fraction, args.repeated_lines)
+    report = filter_shards(args.shards_dir, thresholds, args.workers)
+    for rule, counts in report.items():
+        print(f"{rule}: {counts['files']} files, {counts['bytes'] / 1e6:.1f} MB")
+    utils.save_json(report, args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,199 @@
 from __future__ import annotations
 
 import datetime
-import functools
-import os
+import email.utils
+import threading
 import time
-from typing import Any, Callable, TypeVar, cast
+from collections import defaultdict
+from typing import Mapping, Optional, Sequence
 
-from dotenv import load_dotenv
-from github import Github
+from .metrics import METRICS
 
-load_dotenv()
-API_TOKEN = os.environ["GITHUB_API_TOKEN"]
-TCallable = TypeVar("TCallable", bound=Callable[..., Any])
+MIN_BACKOFF_INTERVAL = 1.0  # spacing between requests after the first secondary rate limit
+MAX_BACKOFF_INTERVAL = 60.0
+BACKOFF_RELIEF = 0.05  # spacing removed after every request that went through
+SECONDARY_LIMIT_WAIT = 60.0  # GitHub asks for at least a minute when no Retry-After is sent
+SECONDARY_LIMIT_MESSAGES = ("secondary rate limit", "abuse")  # in the body of 403s without a Retry-After
 
 
-def get_rate_limit() -> tuple[int, int]:
-    pygithub = Github(API_TOKEN)
-    rate_limit = pygithub.get_rate_limit()
-    core_rate_limit = rate_limit.core.remaining
-    search_rate_limit = rate_limit.search.remaining
-    return core_rate_limit, search_rate_limit
+class Budget:
+    def __init__(self):
+        self.remaining: Optional[int] = None  # unknown until a response tells us
+        self.reset = 0.0  # local epoch time at which remaining is refilled
+
+
+class RateLimitScheduler:
+    """
+    Share the rate limit budgets of one token between threads.
+
+    Budgets of each resource (core, search, graphql, ...) are read from the
+    X-RateLimit-* headers of every response and spent as tokens before each
+    request, so no extra /rate_limit calls are needed. An empty bucket sleeps
+    exactly until its reset. Secondary rate limits double the spacing between
+    requests, which then shrinks additively on every success (AIMD).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.budgets: defaultdict[str, Budget] = defaultdict(Budget)
+        self.interval = 0.0
+        self.next_request = 0.0
+        self.blocked_until = 0.0
+
+    def wait_time(self, resource: str, now: float) -> float:
+        budget = self.budgets[resource]
+        wait = max(self.blocked_until - now, self.next_request - now, 0.0)
+        if budget.remaining is not None and budget.remaining <= 0:
+            if budget.reset <= now:
+                budget.remaining = None  # the window was refilled
+            else:
+                wait = max(wait, budget.reset - now)
+        return wait
+
+    def headroom(self, resource: str) -> float:
+        remaining = self.budgets[resource].remaining
+        return float("inf") if remaining is None else remaining
+
+    def try_acquire(self, resource: str = "core") -> float:
+        """Spend a token of resource and return 0, or return how long to wait for one."""
+        with self._lock:
+            now = time.time()
+            wait = self.wait_time(resource, now)
+            if wait <= 0:
+                budget = self.budgets[resource]
+                if budget.remaining is not None:
+                    budget.remaining -= 1
+                self.next_request = now + self.interval
+            return wait
+
+    def acquire(self, resource: str = "core") -> None:
+        """Block until a request to resource may be sent and spend a token on it."""
+        while True:
+            wait = self.try_acquire(resource)
+            if wait <= 0:
+                return
+            sleep(wait, resource)
+
+    def refund(self, resource: str, headers: Mapping[str, str]) -> None:
+        """Give back the token spent on a 304, which GitHub does not count, unless headers tell the budget."""
+        if headers.get("X-RateLimit-Remaining") is not None:
+            return
+        with self._lock:
+            budget = self.budgets[resource]
+            if budget.remaining is not None:
+                budget.remaining += 1
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Read the budget of the resource a response was counted against."""
+        resource = headers.get("X-RateLimit-Resource")
+        remaining = headers.get("X-RateLimit-Remaining")
+        if resource is None or remaining is None:
+            return
+        now = time.time()
+        with self._lock:
+            budget = self.budgets[resource]
+            budget.remaining = int(float(remaining))
+            reset = headers.get("X-RateLimit-Reset")
+            if reset is not None:
+                budget.reset = now + float(reset) - server_time(headers, now)
+
+    def observe(self, status: int, headers: Mapping[str, str], body: str = "") -> bool:
+        """
+        Record a response and return True if it was rate limited.
+
+        Headers must be looked up case-insensitively (as requests does). The
+        body of a 403 tells secondary rate limits sent without a Retry-After
+        apart from other forbidden requests.
+        """
+        self.update(headers)
+        retry_after = headers.get("Retry-After")
+        primary = headers.get("X-RateLimit-Remaining") == "0"
+        secondary = retry_after is not None or is_secondary_limit_message(body)
+        if status not in (403, 429) or (status == 403 and not primary and not secondary):
+            with self._lock:
+                self.interval = max(self.interval - BACKOFF_RELIEF, 0.0)
+            return False
+        if primary and not secondary:
+            return True  # acquire() will sleep until the reset read above
+        with self._lock:
+            self.interval = min(max(self.interval * 2, MIN_BACKOFF_INTERVAL), MAX_BACKOFF_INTERVAL)
+            wait = float(retry_after) if retry_after is not None else SECONDARY_LIMIT_WAIT
+            self.blocked_until = max(self.blocked_until, time.time() + wait)
+        return True
 
 
-def check_rate_limit():
-    core_rate_limit, search_rate_limit = get_rate_limit()
-    print("Core limit remaining:", core_rate_limit)
-    print("Search limit remaining:", search_rate_limit)
-    if search_rate_limit < 3 or core_rate_limit < 1000:
+def is_secondary_limit_message(body: str) -> bool:
+    body = body.lower()
+    return any(message in body for message in SECONDARY_LIMIT_MESSAGES)
+
+
+def server_time(headers: Mapping[str, str], default: float) -> float:
+    date = headers.get("Date")
+    if date is None:
+        return default
+    try:
+        return email.utils.parsedate_to_datetime(date).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenPool:
+    """
+    Dispatch requests between several tokens, each with its own budgets.
+
+    Every request goes to the token with the most remaining budget for its
+    resource. Exhausted tokens are parked until their reset, and the pool only
+    sleeps when no token can send the request.
+    """
+
+    def __init__(self, tokens: Sequence[str]):
+        if not tokens:
+            raise ValueError("At least one token is required.")
+        self._lock = threading.Lock()
+        self.schedulers = {token: RateLimitScheduler() for token in dict.fromkeys(tokens)}
+
+    def pick(self, resource: str = "core") -> tuple[str, RateLimitScheduler]:
+        """Return the token with the most headroom for resource without spending it."""
+        return max(self.schedulers.items(), key=lambda item: item[1].headroom(resource))
+
+    def acquire(self, resource: str = "core") -> tuple[str, RateLimitScheduler]:
+        """Block until some token may send a request to resource and spend it."""
+        while True:
+            with self._lock:
+                by_headroom = sorted(
+                    self.schedulers.items(),
+                    key=lambda item: item[1].headroom(resource),
+                    reverse=True,
+                )
+                waits = []
+                for token, scheduler in by_headroom:
+                    wait = scheduler.try_acquire(resource)
+                    if wait <= 0:
+                        return token, scheduler
+                    waits.append(wait)
+            wait = min(waits)
+            sleep(wait, resource)
+
+
+def sleep(seconds: float, resource: str) -> None:
+    if seconds >= 1:
         print(
-            "Sleeping a bit...",
+            f"Sleeping {seconds:.1f}s on the {resource} rate limit...",
             datetime.datetime.now().isoformat().split(".")[0].split("T")[1],
         )
-        time.sleep(30)
+    METRICS.inc("rate_limit_sleep_seconds_total", seconds, resource=resource)
+    with METRICS.stage("rate_limit_sleep", resource=resource):
+        time.sleep(seconds)
 
 
-def wait_on_rate_limits(func: TCallable) -> TCallable:
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        check_rate_limit()
-        return func(*args, **kwargs)
-    return cast(TCallable, wrapper)
+def get_rate_limit() -> tuple[int, int]:
+    from .client import get_client  # the client module depends on this one
+
+    # /rate_limit itself does not count against any budget
+    rate_limit = get_client().get_json("/rate_limit", resource=None)["resources"]
+    core_rate_limit = rate_limit["core"]["remaining"]
+    search_rate_limit = rate_limit["search"]["remaining"]
+    return core_rate_limit, search_rate_limit
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""
+Choose the order in which repos are cloned and when to stop.
+
+Stars and sizes (in KB, as reported by the search API) come from the catalog
+or from the .csv that get_repos writes next to each .txt repo list. Repos
+above a size cap or under a star count are skipped, the others are ordered
+(most stars first, or smallest first), and DiskBudget adds up the bytes that
+cloned repos keep on disk so that clone_repos --run stops starting clones
+once a budget is spent. Repos of unknown size or stars are never skipped and
+come last.
+"""
+from __future__ import annotations
+
+import csv
+import os
+from pathlib import Path
+from typing import Iterable, List, Literal, NamedTuple, Optional
+
+CloneOrder = Literal["file", "stars", "size"]
+
+
+class CloneCandidate(NamedTuple):
+    url: str
+    stars: Optional[int] = None
+    size: Optional[int] = None  # in KB
+
+
+def parse_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+def with_repo_info(urls: Iterable[str], csv_path: Path) -> List[CloneCandidate]:
+    """Look up the stars and size of urls in a .csv written by get_repos, if there is one."""
+    info: dict[str, CloneCandidate] = {}
+    if csv_path.is_file():
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                info[row["url"]] = CloneCandidate(row["url"], parse_int(row.get("stars")), parse_int(row.get("size")))
+    return [info.get(url, CloneCandidate(url)) for url in urls]
+
+
+def schedule(
+    candidates: Iterable[CloneCandidate],
+    order: CloneOrder = "file",
+    max_size: Optional[int] = None,
+    min_stars: Optional[int] = None,
+) -> List[CloneCandidate]:
+    """Drop the candidates larger than max_size KB or with fewer than min_stars, sort the others by order."""
+    candidates = list(candidates)
+    kept = [
+        candidate
+        for candidate in candidates
+        if (max_size is None or candidate.size is None or candidate.size <= max_size)
+        and (min_stars is None or candidate.stars is None or candidate.stars >= min_stars)
+    ]
+    if len(kept) < len(candidates):
+        print(f"Skipping {len(candidates) - len(kept)} of {len(candidates)} repos over the size or stars limits.")
+    if order == "stars":
+        kept.sort(key=lambda candidate: (candidate.stars is None, -(candidate.stars or 0)))
+    elif order == "size":
+        kept.sort(key=lambda candidate: (candidate.size is None, candidate.size or 0))
+    return kept
+
+
+def disk_usage(path: Path | str) -> int:
+    """Bytes taken by the files under path."""
+    total = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += disk_usage(entry.path)
+            else:
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+class DiskBudget:
+    """Bytes kept by cloned repos, updated as clones land, against a limit."""
+
+    def __init__(self, limit: int, used: int = 0):
+        self.limit = limit
+        self.used = used
+
+    def add(self, size: int) -> None:
+        self.used += size
+
+    def spent(self) -> bool:
+        return self.used >= self.limit
@@ -1,23 +1,92 @@
 from __future__ import annotations
 
+import csv
 import json
+import os
 from pathlib import Path
-from typing import Any, Iterable, Mapping
+from typing import IO, Any, Mapping, Sequence
 
-import pandas as pd
 
+def open_for_append(file_path: Path | str) -> IO[str]:
+    """Open a text file for appending, ending a last line left unterminated."""
+    with open(file_path, "ab+") as f:
+        unterminated = f.tell() > 0 and f.seek(-1, os.SEEK_END) >= 0 and f.read(1) != b"\n"
+    f = open(file_path, "a", encoding="utf-8", newline="")
+    if unterminated:
+        f.write("\n")
+    return f
 
-def export_to_csv(list_of_objs: Iterable[Mapping[str, Any]], csv_path: Path):
+
+def truncate(file_path: Path | str, size: int) -> None:
+    """Drop whatever was written to a file past size, if anything."""
+    if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+        os.truncate(file_path, size)
+
+
+class LineWriter:
+    """Append lines to a text file as they arrive, flushing every batch_size lines."""
+
+    def __init__(self, file_path: Path | str, append: bool = True, batch_size: int = 1000):
+        self.file = open_for_append(file_path) if append else open(file_path, "w", encoding="utf-8")
+        self.batch_size = batch_size
+        self.buffer: list[str] = []
+
+    def __enter__(self) -> LineWriter:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, line: str) -> None:
+        self.buffer.append(line + "\n")
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write("".join(self.buffer))
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+class CsvWriter:
     """
-    Create .csv file out of list of objs. Append to .csv if existing.
+    Append rows to a .csv file as they arrive, flushing every batch_size rows.
 
-    Do not check if the headers match (to avoid wasting I/O).
+    The header is only written to new (or empty) files. Do not check if the
+    headers match (to avoid wasting I/O).
     """
-    df = pd.DataFrame.from_dict(list_of_objs)
-    if csv_path.is_file():
-        df.to_csv(csv_path, mode="a", header=False, index=False)
-    else:
-        df.to_csv(csv_path, index=False)
+
+    def __init__(self, csv_path: Path | str, fieldnames: Sequence[str], batch_size: int = 1000):
+        self.file = open_for_append(csv_path)
+        self.writer = csv.DictWriter(self.file, fieldnames, lineterminator="\n", extrasaction="ignore")
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+        self.batch_size = batch_size
+        self.buffer: list[Mapping[str, Any]] = []
+
+    def __enter__(self) -> CsvWriter:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, row: Mapping[str, Any]) -> None:
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.writer.writerows(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
 
 
 def read_multiline_txt_file(file_path: Path | str) -> list[str]:
@@ -29,7 +98,7 @@ def read_multiline_txt_file(file_path: Path | str) -> list[str]:
     return lines
 
 
-def save_json(repos: list, filename: Path | str) -> None:
+def save_json(repos: list | dict, filename: Path | str) -> None:
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(repos, f, indent=2)
 
@@ -37,6 +106,7 @@ def save_json(repos: list, filename: Path | str) -> None:
 def save_multiline_txt(
     file_path: Path | str, lines: list[str], append: bool = True
 ) -> None:
-    """Write a multiline text file to the file system."""
-    with open(file_path, "a" if append else "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+    """Write a multiline text file to the file system, one newline-terminated line each."""
+    with LineWriter(file_path, append=append) as writer:
+        for line in lines:
+            writer.write(line)
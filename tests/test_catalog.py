@@ -0,0 +1,56 @@
+from github_dataset_maker.catalog import Catalog, CatalogRecord
+
+
+def record(id: int, stars: int, language: str = "python", size: int | None = 10) -> CatalogRecord:
+    return {
+        "id": id,
+        "full_name": f"owner/repo{id}",
+        "url": f"https://github.com/owner/repo{id}",
+        "language": language,
+        "stars": stars,
+        "size": size,
+        "fork": False,
+        "archived": False,
+        "default_branch": "main",
+        "created_at": None,
+        "pushed_at": None,
+        "license": None,
+        "languages": None,
+        "enriched": False,
+    }
+
+
+def test_newest_upsert_wins_across_merge_levels(tmp_path):
+    catalog = Catalog(tmp_path, fanout=2, batch_size=3)
+    # each round rewrites ids 0-2 with stars = round, the last record of a batch wins within it
+    for round in range(11):
+        catalog.upsert([record(0, -1), record(0, round), record(1, round), record(2, round)])
+    # 11 flushes with fanout 2 leave one part at each of levels 0, 1 and 3
+    assert [level for level, _, _ in catalog.parts()] == [3, 1, 0]
+    table = catalog.load()
+    assert table["id"].to_pylist() == [0, 1, 2]
+    assert table["stars"].to_pylist() == [10, 10, 10]
+    catalog.upsert([record(1, 100)])
+    assert catalog.load()["stars"].to_pylist() == [10, 100, 10]
+    catalog.compact()
+    assert len(catalog.parts()) == 1
+    assert catalog.load()["stars"].to_pylist() == [10, 100, 10]
+
+
+def test_load_filters_by_language_stars_and_size(tmp_path):
+    with Catalog(tmp_path) as catalog:
+        catalog.upsert([
+            record(1, 5, "python", 10),
+            record(2, 50, "rust", 10),
+            record(3, 500, "python", 10_000),
+            record(4, 50, "python", None),
+        ])
+    catalog = Catalog(tmp_path)
+    assert catalog.load(languages=["Python"])["id"].to_pylist() == [1, 3, 4]
+    assert catalog.load(min_stars=50, max_stars=100)["id"].to_pylist() == [2, 4]
+    # repos of unknown size are kept
+    assert catalog.load(max_size=100)["id"].to_pylist() == [1, 2, 4]
+    table = catalog.load(languages=["python"], min_stars=10, max_size=100, columns=["url"])
+    assert table["id"].to_pylist() == [4]
+    assert table.column_names == ["id", "url", "language", "stars", "size"]
+    assert catalog.urls(languages=["rust"]) == ["https://github.com/owner/repo2"]
@@ -0,0 +1,90 @@
+from typing import Optional
+
+import pytest
+import requests
+
+from github_dataset_maker import client
+from github_dataset_maker.client import GitHubClient
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: Optional[dict] = None):
+        self.status_code = status_code
+        self.headers = {}
+        self.payload = payload or {}
+        self.text = ""
+
+    def json(self) -> dict:
+        return self.payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """Send back the given responses in turn, raising the exceptions among them."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.methods: list[str] = []
+
+    def request(self, method: str, url: str, **kwargs) -> FakeResponse:
+        self.methods.append(method)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps: list[float] = []
+    monkeypatch.setattr(client.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def make_client(*responses, retries: int = 3) -> GitHubClient:
+    github = GitHubClient(["token"], base_url="http://localhost", retries=retries, backoff=1.0)
+    github.session = FakeSession(*responses)
+    return github
+
+
+def test_transient_failures_of_gets_are_retried_with_backoff(sleeps):
+    github = make_client(
+        requests.ConnectionError("reset"),
+        FakeResponse(502),
+        requests.Timeout("read timed out"),
+        FakeResponse(200, {"total_count": 1}),
+    )
+    assert github.get_json("/search/repositories", "search") == {"total_count": 1}
+    assert sleeps == [1.0, 2.0, 4.0]
+
+
+def test_gets_give_up_after_the_last_retry(sleeps):
+    github = make_client(FakeResponse(503), FakeResponse(503), retries=1)
+    with pytest.raises(requests.HTTPError):
+        github.get_json("/search/repositories", "search")
+    github = make_client(requests.ConnectionError("reset"), requests.ConnectionError("reset"), retries=1)
+    with pytest.raises(requests.ConnectionError):
+        github.get_json("/search/repositories", "search")
+    assert sleeps == [1.0, 1.0]
+
+
+def test_posts_are_not_retried(sleeps):
+    github = make_client(FakeResponse(502), FakeResponse(200))
+    assert github.request("POST", "/graphql", "graphql").status_code == 502
+    assert github.session.methods == ["POST"]
+    assert sleeps == []
+
+
+def test_graphql_queries_are_retried(sleeps):
+    github = make_client(
+        requests.ConnectionError("reset"), FakeResponse(502), FakeResponse(200, {"data": {"r0": None}})
+    )
+    assert github.graphql("query { r0: repository(owner: \"a\", name: \"b\") { diskUsage } }") == {"r0": None}
+    assert github.session.methods == ["POST"] * 3
+    assert sleeps == [1.0, 2.0]
@@ -0,0 +1,81 @@
+import csv
+import hashlib
+import random
+import re
+
+import numpy as np
+import pytest
+
+from github_dataset_maker import dedup
+
+WORDS = [f"word{i}" for i in range(500)]
+
+
+def text(seed: int, length: int = 400) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def test_token_hashes_match_the_tokens_of_a_regex():
+    content = b"def f(x_1):\n    return x_1 + 42  # \xc3\xa9t\xc3\xa9 ok"
+    tokens = re.findall(rb"\w+", content)
+    expected = [
+        sum((byte + 1) * pow(dedup.TOKEN_BASE, i, 2**64) for i, byte in enumerate(token)) % 2**64
+        for token in tokens
+    ]
+    assert dedup.token_hashes(content).tolist() == expected
+    assert len(dedup.token_hashes(b"  ++ ")) == 0
+
+
+def test_signatures_estimate_jaccard_similarity():
+    assert dedup.minhash(b"too few tokens") is None
+    a = text(1).split()
+    b = [word if i % 20 else "changed" for i, word in enumerate(a)]
+    signatures = [dedup.minhash(" ".join(words).encode()) for words in (a, b)]
+    assert signatures[0].dtype == np.uint32 and len(signatures[0]) == dedup.NUM_PERM
+    shingles = [{tuple(words[i : i + 5]) for i in range(len(words) - 4)} for words in (a, b)]
+    jaccard = len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+    assert np.mean(signatures[0] == signatures[1]) == pytest.approx(jaccard, abs=0.12)
+
+
+def test_exact_and_near_duplicates_are_dropped_across_reruns(tmp_path):
+    corpus = tmp_path / "corpus"
+    near = text(1).replace("word1 ", "word2 ", 2)
+    files = {
+        "a/one/x.py": text(1),
+        "a/one/y.py": text(1),  # exact duplicate within the repo
+        "b/two/x.py": near,
+        "b/two/z.py": text(2),
+    }
+    for path, content in files.items():
+        (corpus / path).parent.mkdir(parents=True, exist_ok=True)
+        (corpus / path).write_text(content)
+    index, manifest = tmp_path / "dedup.db", tmp_path / "manifest.csv"
+    stats = dedup.dedup(corpus, index, manifest, workers=1, window=1)
+    assert stats["kept_files"] == 2
+    (corpus / "c/three").mkdir(parents=True)
+    (corpus / "c/three/w.py").write_text(text(2))
+    dedup.dedup(corpus, index, manifest, workers=1)
+    with open(manifest) as f:
+        rows = {row["path"]: row for row in csv.DictReader(f)}
+    assert len(rows) == 5
+    assert [rows[path]["status"] for path in ("a/one/x.py", "b/two/z.py")] == ["keep", "keep"]
+    assert (rows["a/one/y.py"]["reason"], rows["a/one/y.py"]["duplicate_of"]) == ("exact", "a/one/x.py")
+    assert (rows["b/two/x.py"]["reason"], rows["b/two/x.py"]["duplicate_of"]) == ("near", "a/one/x.py")
+    assert (rows["c/three/w.py"]["reason"], rows["c/three/w.py"]["duplicate_of"]) == ("exact", "b/two/z.py")
+
+
+def test_densification_table_is_pinned():
+    # signatures in existing indexes depend on it, changing it needs a SIGNATURE_VERSION bump
+    table = dedup.DENSIFY_BINS.astype("<u2").tobytes()
+    assert hashlib.sha256(table).hexdigest()[:16] == "a39bbbb33274472c"
+    assert dedup.SIGNATURE_VERSION == "3"
+
+
+def test_index_of_another_signature_version_is_refused(tmp_path):
+    with dedup.DedupIndex(tmp_path / "dedup.db") as index:
+        index.add_repo("a/one", [])
+        index.connection.execute("UPDATE meta SET value = '1'")
+        index.connection.commit()
+    with pytest.raises(ValueError, match="another version"):
+        dedup.DedupIndex(tmp_path / "dedup.db")
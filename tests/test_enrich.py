@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from github_dataset_maker import enrich
+from github_dataset_maker.catalog import Catalog, record_from_item
+from github_dataset_maker.client import GitHubClient
+from github_dataset_maker.mock_api import MockGitHub, make_universe
+
+
+@pytest.fixture
+def server():
+    server = MockGitHub(("127.0.0.1", 0), make_universe(10, ["Python"]), rate_limit=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    github = GitHubClient(["token"], base_url=server.url)
+    monkeypatch.setattr(enrich, "get_client", lambda: github)
+    yield github
+    github.close()
+
+
+def test_query_aliases_a_repository_field_per_repo():
+    query, variables = enrich.build_query(["octo/hello", "octo/hello.world"])
+    assert "query($o0: String!, $n0: String!, $o1: String!, $n1: String!) {" in query
+    assert "r1: repository(owner: $o1, name: $n1) {" in query
+    assert variables == {"o0": "octo", "n0": "hello", "o1": "octo", "n1": "hello.world"}
+
+
+def test_deleted_repos_are_left_unenriched(server, github, tmp_path):
+    items = server.universe[:5] + [{"id": 100, "full_name": "gone/deleted", "html_url": "", "stargazers_count": 0}]
+    names = [item["full_name"] for item in items]
+    with Catalog(tmp_path) as catalog:
+        catalog.upsert([record_from_item({**item, "size": None}, "python") for item in items])
+    assert enrich.fetch_metadata(["gone/deleted", names[0]])[0] is None
+    assert enrich.enrich_catalog(Catalog(tmp_path), concurrency=2, batch_size=2) == 5
+    rows = {row["full_name"]: row for row in Catalog(tmp_path).load().to_pylist()}
+    assert [rows[name]["enriched"] for name in names] == [True] * 5 + [False]
+    row, item = rows[names[0]], items[0]
+    assert (row["size"], row["default_branch"]) == (item["size"], "main")
+    assert row["languages"] == [{"name": "Python", "bytes": item["size"] * 1024}]
+    # only the deleted repo is asked for again
+    assert enrich.enrich_catalog(Catalog(tmp_path)) == 0
+    assert server.statuses[200] == 1 + 3 + 1
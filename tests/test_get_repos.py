@@ -0,0 +1,38 @@
+import pytest
+
+from github_dataset_maker import get_repos, harvest
+from github_dataset_maker.journal import Journal
+
+
+def fake_search(total_count: int, fail_on: set[tuple[str, int]]):
+    """Serve total_count repos per query, raising once for each (query, page) of fail_on."""
+
+    def search_repositories_page(query: str, page: int, per_page: int = 100) -> dict:
+        if (query, page) in fail_on:
+            fail_on.discard((query, page))
+            raise ConnectionError(f"page {page} of {query!r} failed")
+        first = (page - 1) * per_page
+        items = [
+            {"html_url": f"https://github.com/{query}/{i}", "stargazers_count": i, "size": 1, "id": i}
+            for i in range(first, min(first + per_page, total_count))
+        ]
+        return {"total_count": total_count, "items": items}
+
+    return search_repositories_page
+
+
+def test_resumed_query_does_not_duplicate_rows_of_the_failed_attempt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fail_on = {("b", 5)}
+    monkeypatch.setattr(harvest, "search_repositories_page", fake_search(1000, fail_on))
+    queries = [("a", "out", "python"), ("b", "out", "python")]
+    with Journal(tmp_path / "journal.db") as journal:
+        with pytest.raises(ConnectionError):
+            get_repos.harvest_and_save(queries, concurrency=4, journal=journal)
+    with Journal(tmp_path / "journal.db") as journal:
+        get_repos.harvest_and_save(queries, concurrency=4, journal=journal)
+    lines = (tmp_path / "out.txt").read_text().splitlines()
+    assert len(lines) == len(set(lines)) == 2000
+    rows = (tmp_path / "out.csv").read_text().splitlines()
+    assert rows[0] == "url,stars,size"
+    assert len(rows) == 2001
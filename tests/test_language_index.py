@@ -0,0 +1,70 @@
+import shutil
+import subprocess
+
+import pytest
+
+from github_dataset_maker.build_language_index import build_tables, identify_languages
+from github_dataset_maker.clone_repos import sparse_clone_commands
+from github_dataset_maker.filter_files import LanguageMatcher, detect_language
+
+
+def test_filenames_and_interpreters_keep_the_order_of_the_sources():
+    tables = build_tables([
+        {"Dockerfile": {"filenames": ["Dockerfile"]}, "Tcsh": {"interpreters": ["tcsh"]}},
+        {"Shell": {"filenames": ["Dockerfile"], "interpreters": ["tcsh", "sh"]}},
+    ])
+    assert tables["FILENAMES"]["Dockerfile"] == ["dockerfile", "shell"]
+    assert tables["INTERPRETERS"]["tcsh"] == ["tcsh", "shell"]
+
+
+def test_shared_extensions_go_to_popular_languages_then_the_most_listed():
+    tables = build_tables([
+        {"GCC Machine Description": {"extensions": [".md"]}, "RenderScript": {"extensions": [".rs"]}},
+        {"Markdown": {"extensions": [".md", ".MD"]}, "Rust": {"extensions": [".rs"]}},
+        {"Markdown": {"primary_extension": ".md"}, "C++": {"extensions": [".h"]}, "C": {"extensions": [".h"]}},
+    ])
+    assert tables["EXTENSIONS"][".md"] == ["markdown", "gcc machine description"]
+    assert tables["EXTENSIONS"][".rs"] == ["rust", "renderscript"]
+    # Linguist's default when no heuristic matches
+    assert tables["EXTENSIONS"][".h"] == ["c", "c++"]
+
+
+def test_identify_tables_are_converted_to_the_linguist_layout():
+    pytest.importorskip("identify")
+    languages = identify_languages()
+    assert "Dockerfile" in languages["dockerfile"]["filenames"]
+    assert ".py" in languages["python"]["extensions"]
+    assert "python3" in languages["python"]["interpreters"]
+    assert "text" not in languages
+
+
+def test_filenames_are_matched_for_their_most_likely_language():
+    assert detect_language("Dockerfile") == "dockerfile"
+    assert detect_language("README.md") == "markdown"
+    assert detect_language("run", b"#!/usr/bin/env -S python3 -u\n") == "python"
+    assert not LanguageMatcher.for_languages(["shell"]).matches_name("Dockerfile")
+    assert LanguageMatcher.for_languages(["dockerfile"]).matches_name("Dockerfile")
+    assert "Makefile" in LanguageMatcher.for_languages(["makefile"]).sparse_patterns()
+
+
+def test_sparse_patterns_match_extensions_in_any_case():
+    patterns = LanguageMatcher.for_languages(["r", "makefile"]).sparse_patterns()
+    assert "*.[rR]" in patterns
+    assert "Makefile" in patterns
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_sparse_clone_checks_out_matching_files_only(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    for name in ("a.R", "b.r", "Makefile", "makefile.txt", "notes.md"):
+        (source / name).write_text("x\n")
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(source)]
+    subprocess.run(git + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", "."], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "files"], check=True)
+    clone = tmp_path / "clone"
+    patterns = LanguageMatcher.for_languages(["r", "makefile"]).sparse_patterns()
+    for command in sparse_clone_commands(source.as_uri(), clone, patterns):
+        subprocess.run(command, check=True, capture_output=True)
+    assert sorted(path.name for path in clone.iterdir() if path.name != ".git") == ["Makefile", "a.R", "b.r"]
@@ -0,0 +1,106 @@
+import datetime
+import re
+
+from github_dataset_maker.planner import Bucket, QueryPlanner
+
+QUERY = re.compile(r"stars:(\d+)\.\.(\d+) language:\S+(?: (created|pushed):(\S+)\.\.(\S+))?")
+
+
+class FakeSearch:
+    """Answer probes from a dict of {(stars, day): repo count}, recording every query."""
+
+    def __init__(self, repos: dict[tuple[int, datetime.date], int]):
+        self.repos = repos
+        self.queries: list[str] = []
+
+    def __call__(self, query: str) -> int:
+        self.queries.append(query)
+        low, high, _, first, last = QUERY.fullmatch(query).groups()
+        first = datetime.date.fromisoformat(first) if first else datetime.date.min
+        last = datetime.date.fromisoformat(last) if last else datetime.date.max
+        return sum(
+            count
+            for (stars, day), count in self.repos.items()
+            if int(low) <= stars <= int(high) and first <= day <= last
+        )
+
+
+DAY = datetime.date(2020, 1, 1)
+
+
+def by_stars(counts: dict[int, int]) -> FakeSearch:
+    return FakeSearch({(stars, DAY): count for stars, count in counts.items()})
+
+
+def covered(buckets: list[Bucket], search: FakeSearch) -> int:
+    return sum(search(bucket.query("java")) for bucket in buckets)
+
+
+def test_sparse_range_is_one_query():
+    search = by_stars({0: 3, 50: 4})
+    planner = QueryPlanner("java", probe=search, max_results=10)
+    assert planner.plan((0, 100)) == [Bucket((0, 100), 7)]
+    assert planner.probes == 1
+
+
+def test_empty_or_reversed_range_plans_nothing():
+    search = by_stars({})
+    planner = QueryPlanner("java", probe=search, max_results=10)
+    assert planner.plan((0, 100)) == []
+    assert planner.plan((5, 4)) == []
+    assert search.queries == ["stars:0..100 language:java"]
+
+
+def test_bisection_probes_left_halves_only():
+    search = by_stars({0: 8, 1: 8, 2: 8, 3: 8})
+    planner = QueryPlanner("java", probe=search, max_results=10)
+    buckets = planner.plan((0, 3))
+    assert [bucket.stars for bucket in buckets] == [(0, 0), (1, 1), (2, 2), (3, 3)]
+    assert [bucket.total_count for bucket in buckets] == [8, 8, 8, 8]
+    # right halves are the parent's count minus the left one's
+    assert search.queries == [
+        "stars:0..3 language:java",
+        "stars:0..1 language:java",
+        "stars:0..0 language:java",
+        "stars:2..2 language:java",
+    ]
+
+
+def test_buckets_stay_under_the_cap_and_cover_every_repo():
+    counts = {stars: (stars * 7919) % 13 for stars in range(200)}
+    search = by_stars(counts)
+    planner = QueryPlanner("java", probe=search, max_results=50)
+    buckets = planner.plan((0, 199))
+    assert all(0 < bucket.total_count <= 50 for bucket in buckets)
+    assert all(left.stars[1] < right.stars[0] for left, right in zip(buckets, buckets[1:]))
+    assert covered(buckets, search) == sum(counts.values())
+
+
+def test_merge_joins_buckets_across_empty_gaps():
+    search = by_stars({0: 6, 1: 6, 7: 3})
+    planner = QueryPlanner("java", probe=search, max_results=10)
+    buckets = planner.plan((0, 7))
+    # stars 2..3 were found empty, so 1..1 and 4..7 are joined across them
+    assert buckets == [Bucket((0, 0), 6), Bucket((1, 7), 9)]
+
+
+def test_dense_star_value_is_sliced_by_date():
+    repos = {(5, DAY + datetime.timedelta(days=day)): 1 for day in range(0, 700, 7)}
+    search = FakeSearch(repos)
+    planner = QueryPlanner("java", date_field="pushed", probe=search, max_results=30)
+    buckets = planner.plan((5, 5))
+    assert len(buckets) > 1
+    assert all(bucket.stars == (5, 5) and bucket.dates is not None for bucket in buckets)
+    assert all(0 < bucket.total_count <= 30 for bucket in buckets)
+    assert all(left.dates[1] < right.dates[0] for left, right in zip(buckets, buckets[1:]))
+    assert " pushed:" in buckets[0].query("java")
+    assert buckets[0].filename("java") == f"java_{buckets[0].dates[0]}_{buckets[0].dates[1]}_5-5"
+    assert covered(buckets, search) == len(repos)
+
+
+def test_unsplittable_day_is_kept_with_a_warning(capsys):
+    search = FakeSearch({(5, DAY): 40})
+    planner = QueryPlanner("java", probe=search, max_results=30)
+    buckets = planner.plan((5, 5))
+    assert [(bucket.dates, bucket.total_count) for bucket in buckets] == [((DAY, DAY), 40)]
+    assert "only 30 are reachable" in capsys.readouterr().out
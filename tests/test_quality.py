@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from github_dataset_maker.quality import DEFAULT_THRESHOLDS, HEADER_SIZE, RULES, evaluate_batch
+
+distinct_lines = "".join(f"line_{i:04d} = {i}\n" for i in range(HEADER_SIZE // 15 + 1))
+
+# (name, content, rules the file breaks)
+CASES = [
+    ("clean", "def f(x):\n    return x + 1\n", set()),
+    ("empty", "", set()),
+    ("long_line", "x = '" + "a" * 1000 + "'\n" + "y = 1\n" * 20, {"max_line_length"}),
+    ("unterminated_long_line", "a" * 1001, {"max_line_length", "avg_line_length"}),
+    ("line_at_the_limit", "a" * 1000 + "\n" + "b = 1\n" * 20, set()),
+    ("long_lines_on_average", "".join(f"v{i} = '{'b' * 140}'\n" for i in range(5)), {"avg_line_length"}),
+    ("symbols", "{ } ( ) ;\n" * 5, {"alphanum_fraction"}),
+    ("generated", "// Code generated by protoc. DO NOT EDIT.\npackage foo\n", {"generated"}),
+    ("marker_past_the_header", distinct_lines + "# do not edit\n", set()),
+    ("repeated", "print('hello world')\n" * 3 + "x = 1\n", {"repeated_lines"}),
+    ("repeated_up_to_half", "print('hello world')\nprint('hello world')\nfoo_bar_baz = 2\nfoo_bar_qux = 3\n", set()),
+    # lines are fingerprinted by their length and first and last 8 bytes
+    ("first_byte_differs", "a234567890123\nb234567890123\nc234567890123\n", set()),
+    ("last_byte_differs", "1234567890123a\n1234567890123b\n1234567890123c\n", set()),
+    ("length_differs", "aaaaaaaaaa\naaaaaaaaaaa\naaaaaaaaaaaa\n", set()),
+    ("short_lines_repeat_freely", "}\n" * 10 + "return x\n" * 10, set()),
+    # the same lines in another file are not repeats
+    ("shares_lines_with_next", "print('hello world')\nfoo_bar_baz = 2\n", set()),
+    ("shares_lines_with_previous", "print('hello world')\nfoo_bar_baz = 2\n", set()),
+    ("starts_with_a_newline", "\nprint('hello world')\n", set()),
+    # an unterminated last line counts like the others
+    ("repeated_without_trailing_newline", "print('hello world')\n" * 2 + "print('hello world')", {"repeated_lines"}),
+]
+
+
+def expected(cases) -> np.ndarray:
+    return np.array([[rule in rules for _, _, rules in cases] for rule in RULES])
+
+
+def evaluate(contents: list[str]) -> np.ndarray:
+    blobs = [content.encode() for content in contents]
+    sizes = np.array([len(blob) for blob in blobs], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    data = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+    return evaluate_batch(data, starts, sizes, DEFAULT_THRESHOLDS)
+
+
+@pytest.mark.parametrize("order", [1, -1], ids=["forward", "backward"])
+def test_each_rule_is_evaluated_per_file_of_a_batch(order):
+    cases = CASES[::order]
+    failed = evaluate([content for _, content, _ in cases])
+    for i, rule in enumerate(RULES):
+        assert {name for (name, _, _), broken in zip(cases, failed[i]) if broken} == {
+            name for name, _, rules in cases if rule in rules
+        }, rule
+
+
+def test_batch_matches_files_evaluated_alone():
+    # empty files around every file, so several files start at the same offset
+    contents = [part for _, content, _ in CASES for part in ("", content)] + [""]
+    failed = evaluate(contents)
+    assert not failed[:, ::2].any()
+    assert (failed[:, 1::2] == expected(CASES)).all()
+    for j, (_, content, _) in enumerate(CASES):
+        assert (evaluate([content])[:, 0] == failed[:, 2 * j + 1]).all()
+
+
+def test_batch_of_empty_files_breaks_no_rule():
+    assert not evaluate(["", ""]).any()
@@ -0,0 +1,169 @@
+import email.utils
+import types
+
+import pytest
+
+from github_dataset_maker import rate_limit
+from github_dataset_maker.rate_limit import (
+    MAX_BACKOFF_INTERVAL,
+    MIN_BACKOFF_INTERVAL,
+    SECONDARY_LIMIT_WAIT,
+    RateLimitScheduler,
+    TokenPool,
+)
+
+NOW = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+        self.slept: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float, resource: str) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(time=clock.time))
+    monkeypatch.setattr(rate_limit, "sleep", clock.sleep)
+    return clock
+
+
+def budget_headers(remaining: int, reset_in: float, resource: str = "search") -> dict[str, str]:
+    return {
+        "X-RateLimit-Resource": resource,
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(NOW + reset_in)),
+        "Date": email.utils.formatdate(NOW, usegmt=True),
+    }
+
+
+def test_budget_is_read_from_headers_and_spent(clock):
+    scheduler = RateLimitScheduler()
+    assert not scheduler.observe(200, budget_headers(2, 60))
+    assert scheduler.try_acquire("search") == 0
+    assert scheduler.try_acquire("search") == 0
+    assert scheduler.try_acquire("search") == pytest.approx(60)
+    # other resources have their own budget
+    assert scheduler.try_acquire("core") == 0
+
+
+def test_reset_is_corrected_for_clock_skew(clock):
+    scheduler = RateLimitScheduler()
+    headers = budget_headers(0, 60)
+    clock.now = NOW + 100  # the local clock runs 100s ahead of the server
+    scheduler.observe(200, headers)
+    assert scheduler.try_acquire("search") == pytest.approx(60)
+
+
+def test_budget_is_refilled_after_reset(clock):
+    scheduler = RateLimitScheduler()
+    scheduler.observe(200, budget_headers(0, 10))
+    clock.now += 10
+    assert scheduler.try_acquire("search") == 0
+    assert scheduler.try_acquire("search") == 0
+
+
+def test_responses_without_budget_headers_are_ignored(clock):
+    scheduler = RateLimitScheduler()
+    scheduler.observe(200, {"X-RateLimit-Remaining": "0"})  # no resource to charge it to
+    scheduler.observe(200, {"X-RateLimit-Resource": "search"})
+    assert scheduler.headroom("search") == float("inf")
+    assert scheduler.headroom("core") == float("inf")
+
+
+def test_primary_limit_waits_until_reset_without_backoff(clock):
+    scheduler = RateLimitScheduler()
+    assert scheduler.observe(403, budget_headers(0, 30))
+    assert scheduler.interval == 0
+    assert scheduler.blocked_until == 0
+    scheduler.acquire("search")
+    assert clock.slept == [pytest.approx(30)]
+
+
+def test_retry_after_wins_over_an_exhausted_budget(clock):
+    scheduler = RateLimitScheduler()
+    assert scheduler.observe(403, {**budget_headers(0, 300), "Retry-After": "5"})
+    assert scheduler.blocked_until == NOW + 5
+    assert scheduler.interval == MIN_BACKOFF_INTERVAL
+
+
+def test_secondary_limit_honours_retry_after_and_doubles_spacing(clock):
+    scheduler = RateLimitScheduler()
+    assert scheduler.observe(403, {"Retry-After": "20"})
+    assert scheduler.blocked_until == NOW + 20
+    assert scheduler.interval == MIN_BACKOFF_INTERVAL
+    assert scheduler.observe(429, {})
+    assert scheduler.blocked_until == NOW + SECONDARY_LIMIT_WAIT
+    assert scheduler.interval == 2 * MIN_BACKOFF_INTERVAL
+
+
+def test_spacing_is_capped_and_shrinks_on_success(clock):
+    scheduler = RateLimitScheduler()
+    for _ in range(20):
+        scheduler.observe(429, {"Retry-After": "1"})
+    assert scheduler.interval == MAX_BACKOFF_INTERVAL
+    scheduler.observe(200, {})
+    assert scheduler.interval == pytest.approx(MAX_BACKOFF_INTERVAL - rate_limit.BACKOFF_RELIEF)
+
+
+def test_spacing_delays_the_next_request(clock):
+    scheduler = RateLimitScheduler()
+    scheduler.interval = 2.0
+    assert scheduler.try_acquire() == 0
+    assert scheduler.try_acquire() == pytest.approx(2.0)
+
+
+def test_secondary_limit_without_retry_after_is_told_by_its_message(clock):
+    scheduler = RateLimitScheduler()
+    body = '{"message": "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."}'
+    assert scheduler.observe(403, budget_headers(10, 60), body)
+    assert scheduler.blocked_until == NOW + SECONDARY_LIMIT_WAIT
+    assert scheduler.interval == MIN_BACKOFF_INTERVAL
+    assert scheduler.observe(403, {}, '{"message": "You have triggered an abuse detection mechanism."}')
+    assert scheduler.interval == 2 * MIN_BACKOFF_INTERVAL
+
+
+def test_forbidden_without_rate_limit_is_not_retried(clock):
+    scheduler = RateLimitScheduler()
+    assert not scheduler.observe(403, budget_headers(10, 60), '{"message": "Resource not accessible by integration"}')
+    assert scheduler.blocked_until == 0
+
+
+def test_not_modified_refunds_the_token(clock):
+    scheduler = RateLimitScheduler()
+    scheduler.observe(200, budget_headers(1, 60))
+    scheduler.try_acquire("search")
+    scheduler.refund("search", {})
+    assert scheduler.try_acquire("search") == 0
+
+
+def test_pool_sends_to_the_token_with_most_headroom(clock):
+    pool = TokenPool(["a", "b"])
+    pool.schedulers["a"].observe(200, budget_headers(1, 60))
+    pool.schedulers["b"].observe(200, budget_headers(3, 60))
+    tokens = [pool.acquire("search")[0] for _ in range(4)]
+    assert tokens == ["b", "b", "a", "b"]
+    assert clock.slept == []
+
+
+def test_pool_sleeps_until_the_first_token_resets(clock):
+    pool = TokenPool(["a", "b", "a"])
+    assert list(pool.schedulers) == ["a", "b"]
+    pool.schedulers["a"].observe(200, budget_headers(0, 50))
+    pool.schedulers["b"].observe(200, budget_headers(0, 20))
+    token, _ = pool.acquire("search")
+    assert token == "b"
+    assert clock.slept == [pytest.approx(20)]
+
+
+def test_pool_needs_a_token():
+    with pytest.raises(ValueError):
+        TokenPool([])